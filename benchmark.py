@@ -0,0 +1,192 @@
+# benchmark.py
+"""
+Benchmarks des calculs de l'application sur des données de club synthétiques.
+
+    python benchmark.py                                  # tailles 100 à 1 000 000 matchs
+    python benchmark.py --tailles 100 1000 --sortie bench.json
+    python benchmark.py --reference bench_v1.json        # compare et signale les régressions
+
+Le fichier de résultats (JSON) contient la version du code et une mesure par
+(fonction, taille) ; il peut être passé en --reference lors d'une version suivante.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+from moteur_stats import IndexDates, MatchsCompacts, calculer_stats_resultats, tableau_confrontations
+from championnat import stats_championnat, calculer_classement, generer_appariements_aleatoires
+from calendrier import planifier
+
+TAILLES_DEFAUT = [100, 1_000, 10_000, 100_000, 1_000_000]
+BUDGET_DEFAUT = 30.0   # secondes : au-delà, les tailles suivantes de la même fonction sont sautées
+SEUIL_REGRESSION = 1.2  # 20 % plus lent que la référence
+
+#############################
+# Données synthétiques      #
+#############################
+
+def generer_joueurs(n, seed=0):
+    """Noms "Prénom Nom" uniques"""
+    rng = np.random.default_rng(seed)
+    prenoms = ["Alice", "Bruno", "Chloé", "David", "Emma", "Farid", "Gaëlle", "Hugo", "Inès", "Julien", "Karim", "Léa", "Marc", "Nina", "Olivier", "Paul"]
+    return [f"{prenoms[i % len(prenoms)]} Joueur{i:04d}" for i in rng.permutation(n)]
+
+def generer_sets(n, seed=0):
+    """
+    Tableau (n, 5) de sets au format signé, avec des scores 3-0, 3-1 et 3-2 valides :
+    le vainqueur gagne toujours le dernier set, les bulles (0 et -99) sont incluses.
+    Les sets non joués valent "".
+    """
+    rng = np.random.default_rng(seed)
+    sets_perdant = rng.choice([0, 1, 2], size=n, p=[0.4, 0.35, 0.25])
+    nb_sets = 3 + sets_perdant
+    # score du perdant de chaque set : surtout 2 à 9, quelques bulles et prolongations
+    scores = rng.choice(np.arange(0, 15), size=(n, 5), p=[0.02, 0.03] + [0.09] * 8 + [0.08, 0.06, 0.04, 0.03, 0.02])
+    # place des sets gagnés par le perdant parmi les nb_sets - 1 premiers
+    cles = rng.random((n, 5))
+    cles[np.arange(5) >= (nb_sets - 1)[:, None]] = 2.0
+    rangs = cles.argsort(axis=1).argsort(axis=1)
+    perdus = rangs < sets_perdant[:, None]
+    valeurs = np.where(perdus, np.where(scores == 0, -99, -scores), scores).astype(object)
+    valeurs[np.arange(5) >= nb_sets[:, None]] = ""
+    return valeurs
+
+def generer_resultats(n, joueurs, seed=0):
+    """Résultats en jeu libre (colonnes du sheet resultats_simple)"""
+    rng = np.random.default_rng(seed)
+    joueurs = np.asarray(joueurs, dtype=object)
+    a = rng.integers(0, len(joueurs), size=n)
+    b = (a + rng.integers(1, len(joueurs), size=n)) % len(joueurs)
+    df = pd.DataFrame({"vainqueur": joueurs[a], "adversaire": joueurs[b]})
+    sets = generer_sets(n, seed)
+    for i in range(5):
+        df[f"Set_{i + 1}"] = sets[:, i]
+    debut = pd.Timestamp("2020-09-01 20:00:00")
+    df["date"] = (debut + pd.to_timedelta(np.sort(rng.integers(0, 5 * 365 * 24 * 3600, size=n)), unit="s")).strftime("%Y-%m-%d %H:%M:%S")
+    return df
+
+def generer_championnat(n, joueurs, seed=0):
+    """Matchs de championnat (colonnes du sheet championnat), 90 % terminés"""
+    rng = np.random.default_rng(seed)
+    df = generer_resultats(n, joueurs, seed)
+    termine = rng.random(n) < 0.9
+    championnat = pd.DataFrame({
+        "joueur_1": df["vainqueur"],
+        "joueur_2": df["adversaire"],
+        "tour n°": [f"Tour {t}" for t in rng.integers(1, max(len(joueurs), 2), size=n)],
+        "statut": np.where(termine, "terminé", "à jouer"),
+    })
+    for colonne in ["vainqueur", "adversaire", "Set_1", "Set_2", "Set_3", "Set_4", "Set_5", "date"]:
+        championnat[colonne] = df[colonne].where(termine, "")
+    return championnat
+
+def nb_joueurs_pour(taille):
+    """Un club réaliste : ~sqrt(2 x matchs) joueurs, entre 10 et 2000"""
+    return int(min(max(10, (2 * taille) ** 0.5), 2000))
+
+#############################
+# Mesures                   #
+#############################
+
+def mesurer(fonction, repetitions):
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        durees.append(time.perf_counter() - debut)
+    return min(durees), statistics.median(durees)
+
+def scenarios(taille, seed):
+    """(nom, fonction à mesurer) pour une taille de données donnée"""
+    joueurs = generer_joueurs(nb_joueurs_pour(taille), seed)
+    resultats = generer_resultats(taille, joueurs, seed)
+    championnat = generer_championnat(taille, joueurs, seed)
+    stats = stats_championnat(championnat, joueurs)
+    index_dates = IndexDates(MatchsCompacts.depuis_dataframe(resultats, joueurs, strict=False))
+    # Calendrier : au plus 150 joueurs (11 175 paires), un quart des joueurs à table à chaque créneau
+    participants = joueurs[:150]
+    tables = max(len(participants) // 4, 1)
+    nb_soirees = -(-len(participants) * (len(participants) - 1) // 2 // (tables * 3)) + 2
+    soirees = list(pd.date_range("2024-09-02", periods=nb_soirees, freq="7D").date)
+    return [
+        ("calculer_stats", lambda: calculer_stats_resultats(resultats, joueurs)),
+        ("calculer_stats_championnat", lambda: stats_championnat(championnat, joueurs)),
+        ("matrice_confrontations", lambda: tableau_confrontations(championnat, joueurs)),
+        ("classement", lambda: calculer_classement(stats)),
+        ("stats_periode", lambda: index_dates.stats(joueurs, "2023-09-01", "2023-10-01")),
+        ("tableau_mensuel", lambda: index_dates.tableau_mensuel(joueurs)),
+        ("generer_appariements_aleatoires", lambda: generer_appariements_aleatoires(joueurs, seed=seed)),
+        ("planifier_calendrier", lambda: planifier(participants, soirees, tables, seed=seed)),
+    ]
+
+def version_code():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "inconnue"
+
+def lancer(tailles, repetitions=3, budget=BUDGET_DEFAUT, seed=0):
+    mesures = []
+    trop_lents = set()
+    for taille in tailles:
+        for nom, fonction in scenarios(taille, seed):
+            if nom in trop_lents:
+                print(f"{nom:<34} {taille:>9}  sauté (taille précédente > {budget:.0f} s)")
+                continue
+            minimum, mediane = mesurer(fonction, repetitions)
+            mesures.append({"fonction": nom, "taille": taille, "joueurs": nb_joueurs_pour(taille), "min_s": minimum, "mediane_s": mediane})
+            print(f"{nom:<34} {taille:>9}  {mediane * 1000:>10.2f} ms")
+            if minimum * repetitions > budget:
+                trop_lents.add(nom)
+    return {
+        "version": version_code(),
+        "date": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "mesures": mesures,
+    }
+
+def comparer(resultats, reference, seuil=SEUIL_REGRESSION):
+    """Affiche le rapport avec la référence ; retourne la liste des régressions"""
+    ancien = {(m["fonction"], m["taille"]): m["mediane_s"] for m in reference["mesures"]}
+    regressions = []
+    print(f"\nComparaison avec {reference.get('version', '?')} :")
+    for m in resultats["mesures"]:
+        avant = ancien.get((m["fonction"], m["taille"]))
+        if not avant:
+            continue
+        ratio = m["mediane_s"] / avant
+        alerte = "  <-- RÉGRESSION" if ratio > seuil else ""
+        print(f"{m['fonction']:<34} {m['taille']:>9}  x{ratio:6.2f}{alerte}")
+        if ratio > seuil:
+            regressions.append((m["fonction"], m["taille"], ratio))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks TTCV sur données synthétiques")
+    parser.add_argument("--tailles", type=int, nargs="+", default=TAILLES_DEFAUT, help="nombres de matchs")
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=BUDGET_DEFAUT, help="secondes max par mesure avant de sauter les tailles suivantes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sortie", default="benchmark.json", help="fichier de résultats JSON")
+    parser.add_argument("--reference", help="résultats d'une version précédente à comparer")
+    args = parser.parse_args()
+
+    resultats = lancer(args.tailles, args.repetitions, args.budget, args.seed)
+    with open(args.sortie, "w", encoding="utf-8") as f:
+        json.dump(resultats, f, indent=2, ensure_ascii=False)
+    print(f"\nRésultats écrits dans {args.sortie}")
+
+    if args.reference:
+        with open(args.reference, encoding="utf-8") as f:
+            if comparer(resultats, json.load(f)):
+                sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+# calendrier.py
+import math
+import random
+import time
+
+CRENEAUX_DEFAUT = 3         # matchs successifs par table et par soirée
+MAX_CONSECUTIFS_DEFAUT = 2  # au-delà, un joueur enchaîne sans repos
+POIDS_REPOS = 3             # une violation de repos pèse comme 3 créneaux d'attente
+ITERATIONS_DEFAUT = 20000
+TEMPS_MAX_DEFAUT = 5.0      # secondes, garde-fou de l'amélioration locale
+
+class Planning:
+    """
+    Résultat de planifier() :
+      - matchs : liste de (joueur_1, joueur_2, date, créneau, table), dans l'ordre du calendrier
+      - non_planifies : paires sans place (pas assez de tables, de soirées ou de disponibilités)
+      - attente : créneaux passés à attendre entre deux matchs d'une même soirée, tous joueurs
+      - violations_repos : matchs joués au-delà de MAX_CONSECUTIFS d'affilée
+    """
+
+    def __init__(self, matchs, non_planifies, attente, violations_repos, dates, creneaux):
+        self.matchs = matchs
+        self.non_planifies = non_planifies
+        self.attente = attente
+        self.violations_repos = violations_repos
+        self.dates = dates
+        self.creneaux = creneaux
+
+    def lignes(self):
+        """
+        Lignes du sheet championnat : le créneau devient le tour ("Tour 4 - Table 2"),
+        la date prévue est mise en colonne L (remplacée par la date du résultat à la saisie).
+        """
+        position = {d: k for k, d in enumerate(self.dates)}
+        lignes = []
+        for j1, j2, date, creneau, table in self.matchs:
+            tour = position[date] * self.creneaux + creneau + 1
+            lignes.append([j1, j2, f"Tour {tour} - Table {table}", "à jouer", "", "", "", "", "", "", "", str(date)])
+        return lignes
+
+class _Etat:
+    """État de la recherche : créneaux occupés par joueur et par soirée, tables libres par créneau"""
+
+    def __init__(self, n, nb_dates, creneaux, tables, max_consecutifs):
+        self.creneaux = creneaux
+        self.tables = tables
+        self.max_consecutifs = max_consecutifs
+        self.joues = [[[] for _ in range(nb_dates)] for _ in range(n)]    # joueur -> soirée -> créneaux
+        self.occupes = [set() for _ in range(nb_dates * creneaux)]        # créneau global -> joueurs
+        self.matchs = [[] for _ in range(nb_dates * creneaux)]            # créneau global -> paires
+
+    def cout(self, i, d):
+        """Attente + POIDS_REPOS x violations de repos du joueur i sur la soirée d"""
+        attente, violations = self.detail(i, d)
+        return attente + POIDS_REPOS * violations
+
+    def detail(self, i, d):
+        """(créneaux d'attente, violations de repos) du joueur i sur la soirée d"""
+        creneaux = sorted(self.joues[i][d])
+        if not creneaux:
+            return 0, 0
+        attente = creneaux[-1] - creneaux[0] + 1 - len(creneaux)
+        violations = 0
+        suite = 0
+        precedent = None
+        for c in creneaux:
+            suite = suite + 1 if precedent == c - 1 else 1
+            if suite > self.max_consecutifs:
+                violations += 1
+            precedent = c
+        return attente, violations
+
+    def placer(self, paire, s):
+        i, j = paire
+        d, c = divmod(s, self.creneaux)
+        self.joues[i][d].append(c)
+        self.joues[j][d].append(c)
+        self.occupes[s].update(paire)
+        self.matchs[s].append(paire)
+
+    def retirer(self, paire, s):
+        i, j = paire
+        d, c = divmod(s, self.creneaux)
+        self.joues[i][d].remove(c)
+        self.joues[j][d].remove(c)
+        self.occupes[s].difference_update(paire)
+        self.matchs[s].remove(paire)
+
+    def libre(self, paire, s):
+        return len(self.matchs[s]) < self.tables and not (self.occupes[s] & set(paire))
+
+def planifier(joueurs, dates, tables, creneaux=CRENEAUX_DEFAUT, indisponibilites=None,
+              max_consecutifs=MAX_CONSECUTIFS_DEFAUT, seed=42, iterations=ITERATIONS_DEFAUT, temps_max=TEMPS_MAX_DEFAUT):
+    """
+    Place toutes les paires du championnat (toutes rondes) sur des créneaux (soirée, créneau, table) :
+      - `tables` matchs au plus par créneau, `creneaux` créneaux par soirée, un match par joueur et par créneau ;
+      - un joueur n'est jamais placé à une date de `indisponibilites` (joueur -> dates) ;
+      - on minimise l'attente entre deux matchs d'une soirée et les enchaînements sans repos.
+    Construction gloutonne créneau par créneau (les joueurs qui ont le plus de matchs à caser
+    par rapport aux créneaux qui leur restent passent en premier), puis amélioration locale
+    par déplacements de matchs. Le résultat ne dépend que de `seed` et `iterations` ;
+    `temps_max` borne la durée de l'amélioration sur une machine lente.
+    """
+    rng = random.Random(seed)
+    joueurs = list(dict.fromkeys(joueurs))
+    dates = sorted(dict.fromkeys(dates))
+    n, nb_dates = len(joueurs), len(dates)
+    indisponibilites = indisponibilites or {}
+    disponibles = [[d not in set(indisponibilites.get(j, ())) for d in dates] for j in joueurs]
+    etat = _Etat(n, nb_dates, creneaux, tables, max_consecutifs)
+    restants = [set() for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            restants[i].add(j)
+            restants[j].add(i)
+
+    # Construction gloutonne
+    ########################
+    # Soirées disponibles à partir de la soirée d (incluse), pour l'urgence de chaque joueur
+    soirees_restantes = [[0] * (nb_dates + 1) for _ in range(n)]
+    for i in range(n):
+        for d in range(nb_dates - 1, -1, -1):
+            soirees_restantes[i][d] = soirees_restantes[i][d + 1] + disponibles[i][d]
+
+    for s in range(nb_dates * creneaux):
+        d, c = divmod(s, creneaux)
+        priorites = {}
+        for i in range(n):
+            if not restants[i] or not disponibles[i][d]:
+                continue
+            besoin = len(restants[i])
+            capacite = (soirees_restantes[i][d] - 1) * creneaux + (creneaux - c)
+            priorite = besoin / max(capacite, 1)
+            deja = etat.joues[i][d]
+            quota = math.ceil(besoin / max(soirees_restantes[i][d], 1)) + len(deja)
+            if len(deja) >= quota:
+                priorite -= 1                   # a déjà eu sa part de la soirée
+            if deja and deja[-1] == c - 1:
+                suite = 1
+                while c - 1 - suite in deja:
+                    suite += 1
+                priorite += -2 if suite >= max_consecutifs else 0.5    # repos, sinon enchaîner sans attendre
+            priorites[i] = priorite + rng.random() * 1e-3
+        ordre = sorted(priorites, key=priorites.get, reverse=True)
+        pris = set()
+        for i in ordre:
+            if len(etat.matchs[s]) == tables:
+                break
+            if i in pris:
+                continue
+            candidats = [j for j in restants[i] if j in priorites and j not in pris]
+            if not candidats:
+                continue
+            j = max(candidats, key=priorites.get)
+            pris.update((i, j))
+            paire = (min(i, j), max(i, j))
+            etat.placer(paire, s)
+            restants[i].discard(j)
+            restants[j].discard(i)
+
+    places = {}
+    for s, paires in enumerate(etat.matchs):
+        for paire in paires:
+            places[paire] = s
+    non_places = sorted({(min(i, j), max(i, j)) for i in range(n) for j in restants[i]})
+
+    def creneaux_possibles(paire):
+        i, j = paire
+        return [s for s in range(nb_dates * creneaux) if disponibles[i][s // creneaux] and disponibles[j][s // creneaux]]
+
+    # Les paires restantes prennent n'importe quelle place libre compatible
+    for paire in list(non_places):
+        for s in creneaux_possibles(paire):
+            if etat.libre(paire, s):
+                etat.placer(paire, s)
+                places[paire] = s
+                non_places.remove(paire)
+                break
+
+    # Amélioration locale
+    #####################
+    # Déplacement d'un match vers un créneau libre ou échange avec un match d'un autre créneau,
+    # accepté s'il ne dégrade pas le coût des joueurs concernés sur les soirées concernées.
+    liste_places = list(places)
+    limite = time.perf_counter() + temps_max
+    nb_creneaux = nb_dates * creneaux
+    for iteration in range(iterations if liste_places else 0):
+        if iteration % 256 == 0 and time.perf_counter() > limite:
+            break
+        paire = liste_places[rng.randrange(len(liste_places))]
+        s = places[paire]
+        d = s // creneaux
+        # Une fois sur deux dans la même soirée, où se joue l'attente
+        t = d * creneaux + rng.randrange(creneaux) if rng.random() < 0.5 else rng.randrange(nb_creneaux)
+        e = t // creneaux
+        if t == s or not (disponibles[paire[0]][e] and disponibles[paire[1]][e]):
+            continue
+        autre = None
+        if len(etat.matchs[t]) >= tables or etat.occupes[t] & set(paire):
+            # Échange avec un match de t qui peut aller en s
+            candidats = [q for q in etat.matchs[t] if disponibles[q[0]][d] and disponibles[q[1]][d]]
+            if not candidats:
+                continue
+            autre = candidats[rng.randrange(len(candidats))]
+            if (etat.occupes[t] - set(autre)) & set(paire) or (etat.occupes[s] - set(paire)) & set(autre):
+                continue
+        concernes = {(k, soiree) for k in paire + (autre or ()) for soiree in (d, e)}
+        avant = sum(etat.cout(k, soiree) for k, soiree in concernes)
+        etat.retirer(paire, s)
+        if autre:
+            etat.retirer(autre, t)
+            etat.placer(autre, s)
+        etat.placer(paire, t)
+        if sum(etat.cout(k, soiree) for k, soiree in concernes) <= avant:
+            places[paire] = t
+            if autre:
+                places[autre] = s
+        else:
+            etat.retirer(paire, t)
+            if autre:
+                etat.retirer(autre, s)
+                etat.placer(autre, t)
+            etat.placer(paire, s)
+
+    # Résultat
+    ##########
+    matchs = []
+    for s, paires in enumerate(etat.matchs):
+        d, c = divmod(s, creneaux)
+        for table, (i, j) in enumerate(sorted(paires), start=1):
+            matchs.append((joueurs[i], joueurs[j], dates[d], c, table))
+    details = [etat.detail(i, d) for i in range(n) for d in range(nb_dates)]
+    non_planifies = [(joueurs[i], joueurs[j]) for i, j in non_places]
+    return Planning(matchs, non_planifies, sum(a for a, _ in details), sum(v for _, v in details), dates, creneaux)
@@ -0,0 +1,139 @@
+# championnat.py
+import random
+import threading
+import numpy as np
+import pandas as pd
+from moteur_stats import COLONNES_STATS, IndexDates, MatchsCompacts, agreger_codes, calculer_stats_resultats, decoder_sets_ligne, tableau_classement
+
+POINTS_VICTOIRE = 2     # 2 points pour une victoire
+POINTS_DEFAITE = 1      # 1 point pour une défaite - récompense la participation
+EXEMPT = "BYE"              # adversaire fictif d'un joueur exempté (système suisse)
+STATUT_EXEMPT = "exempt"    # une exemption rapporte les points d'une victoire
+TRI_CHAMPIONNAT = ["Points", "Victoires", "Diff_sets", "Diff_points"]
+
+# Fonction pour calculer les stats d'un championnat
+###################################################
+def stats_championnat(championnat_df, joueurs):
+    """Stats par joueur sur les matchs terminés, avec les points du championnat en première colonne"""
+    if championnat_df.empty:
+        stats = calculer_stats_resultats(championnat_df, joueurs)
+    else:
+        stats = calculer_stats_resultats(championnat_df[championnat_df["statut"] == "terminé"], joueurs)
+    stats = ajouter_points(stats)
+    if not championnat_df.empty:
+        exemptions = championnat_df.loc[championnat_df["statut"] == STATUT_EXEMPT, "joueur_1"].value_counts()
+        stats["Points"] += exemptions.reindex(stats.index, fill_value=0) * POINTS_VICTOIRE
+    return stats
+
+def ajouter_points(stats):
+    """Ajoute les points du championnat en première colonne"""
+    stats.insert(0, "Points", (stats["Victoires"] * POINTS_VICTOIRE) + (stats["Défaites"] * POINTS_DEFAITE))
+    return stats
+
+def index_dates_championnat(championnat_df):
+    """Index des stats par période sur les matchs terminés (date en colonne L)"""
+    if championnat_df.empty:
+        return IndexDates(MatchsCompacts())
+    return IndexDates(MatchsCompacts.depuis_dataframe(championnat_df[championnat_df["statut"] == "terminé"], strict=False))
+
+# Fonction pour mettre en forme le classement
+#############################################
+def calculer_classement(stats):
+    """Classement trié (points, victoires, diff sets, diff points) avec les colonnes affichées"""
+    return tableau_classement(stats, TRI_CHAMPIONNAT)
+
+class ClassementChampionnat:
+    """
+    Classement du championnat matérialisé, partagé par toutes les sessions. Chaque ligne du
+    sheet apporte sa contribution (match terminé ou exemption) aux stats des joueurs ; une
+    ligne modifiée retire l'ancienne contribution et ajoute la nouvelle, sans rien recalculer
+    d'autre. Le tableau affiché est reconstruit une fois par écriture : une session qui ne
+    fait que lire reçoit le tableau tout prêt.
+    """
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self.generation = None
+        self.nb_lignes = 0
+        self._reinitialiser()
+
+    def _reinitialiser(self):
+        self.stats = {}         # joueur -> [Points] + COLONNES_STATS (int64)
+        self._lignes = {}       # numéro de ligne -> ligne prise en compte
+        self.tableau = calculer_classement(self._dataframe())
+
+    def synchroniser(self, generation, valeurs):
+        """Même principe que AppariementSuisse.synchroniser : seules les lignes qui ont changé sont appliquées"""
+        with self._verrou:
+            change = False
+            if len(valeurs) < self.nb_lignes:
+                self._reinitialiser()
+                self.nb_lignes = 1
+                change = True
+            debut = 1 if generation != self.generation else max(self.nb_lignes, 1)
+            for numero in range(debut, len(valeurs)):
+                ligne = list(valeurs[numero]) + [""] * 12
+                if self._lignes.get(numero) != ligne:
+                    if numero in self._lignes:
+                        self._appliquer(self._lignes.pop(numero), signe=-1)
+                    self._appliquer(ligne)
+                    self._lignes[numero] = ligne
+                    change = True
+            if change:
+                self.tableau = calculer_classement(self._dataframe())
+            self.generation = generation
+            self.nb_lignes = max(len(valeurs), 1)
+        return self
+
+    def _appliquer(self, ligne, signe=1):
+        j1, j2, _, statut, vainqueur, adversaire = ligne[:6]
+        for joueur in (j1, j2):
+            if joueur and joueur != EXEMPT and joueur not in self.stats:
+                self.stats[joueur] = np.zeros(len(COLONNES_STATS) + 1, dtype=np.int64)
+        if statut == STATUT_EXEMPT and j1 in self.stats:
+            self.stats[j1][0] += signe * POINTS_VICTOIRE
+        elif statut == "terminé" and vainqueur in self.stats and adversaire in self.stats:
+            delta = agreger_codes([0], [1], decoder_sets_ligne(ligne[6:11]), 2)
+            self.stats[vainqueur][1:] += signe * delta[0]
+            self.stats[adversaire][1:] += signe * delta[1]
+            self.stats[vainqueur][0] += signe * POINTS_VICTOIRE
+            self.stats[adversaire][0] += signe * POINTS_DEFAITE
+
+    def _dataframe(self):
+        colonnes = ["Points"] + COLONNES_STATS
+        return pd.DataFrame(
+            np.array(list(self.stats.values()), dtype=np.int64).reshape(len(self.stats), len(colonnes)),
+            index=pd.Index(list(self.stats), dtype=object), columns=colonnes,
+        )
+
+# Fonction pour générer les appariements complet du championnat
+###############################################################
+def generer_appariements_aleatoires(joueurs, seed=None):
+    """
+    Retourne une liste de rounds; chaque round est une liste de paires (j1, j2).
+    Pour n impair, on ajoute 'BYE' (match contre BYE = repos).
+    """
+    if seed is not None:
+        random.seed(seed)
+    joueurs = list(joueurs)
+    random.shuffle(joueurs)  # randomiser l'ordre initial
+    n = len(joueurs)
+    bye = None
+    if n % 2 == 1:
+        bye = "BYE"
+        joueurs.append(bye)
+        n += 1
+
+    rounds = []
+    # méthode du cercle : on fixe joueurs[0], on fait tourner le reste
+    for r in range(n - 1):
+        paires = []
+        for i in range(n // 2):
+            a = joueurs[i]
+            b = joueurs[n - 1 - i]
+            if a != bye and b != bye:
+                paires.append((a, b, f"Tour {r+1}", "à jouer"))
+        rounds.append(paires)
+        # rotation (fixer joueurs[0])
+        joueurs = [joueurs[0]] + [joueurs[-1]] + joueurs[1:-1]
+    return rounds
@@ -0,0 +1,190 @@
+# elo.py
+import hashlib
+import json
+import os
+import threading
+from moteur_stats import BULLE_PERDANT
+
+ELO_INITIAL = 1500
+K_DEFAUT = 32
+VARIANTES = ("classique", "marge")
+
+# Fonctions de calcul d'un match
+################################
+def score_attendu(note_a, note_b):
+    """Probabilité de victoire de a contre b"""
+    return 1 / (1 + 10 ** ((note_b - note_a) / 400))
+
+def sets_et_points(sets):
+    """
+    (sets du perdant, points du vainqueur, points du perdant) à partir des valeurs
+    signées d'une ligne du sheet (mêmes conventions que moteur_stats.detail_matchs).
+    """
+    sets_perdant = points_v = points_p = 0
+    for valeur in sets:
+        try:
+            valeur = int(valeur)
+        except (TypeError, ValueError):
+            continue                        # set non joué ou cellule illisible
+        if valeur >= 0:                     # set gagné par le vainqueur 11-valeur
+            points_v += 11
+            points_p += valeur
+        else:                               # set gagné par le perdant
+            sets_perdant += 1
+            points_p += 11
+            points_v += 0 if valeur == BULLE_PERDANT else -valeur
+    return sets_perdant, points_v, points_p
+
+def facteur_marge(sets):
+    """
+    Multiplicateur de K selon l'ampleur de la victoire : 0.5 + écart de sets / 6
+    + 0.5 x part des points d'avance. Un 3-2 serré vaut ~0.67, un 3-0 sec jusqu'à 1.5.
+    """
+    sets_perdant, points_v, points_p = sets_et_points(sets)
+    total = points_v + points_p
+    avance = max(points_v - points_p, 0) / total if total else 0
+    return 0.5 + (3 - sets_perdant) / 6 + 0.5 * avance
+
+##############################
+# Classement Elo incrémental #
+##############################
+
+class ClassementElo:
+    """
+    Notes Elo calculées à partir des lignes du sheet resultats_simple, dans l'ordre des dates.
+    Le point de reprise (notes, nombre de lignes traitées, dernière date, dernière ligne et
+    empreinte chaînée des lignes traitées) permet de n'appliquer que les nouveaux matchs :
+    chaque match coûte O(1). Si l'historique a été modifié ou si un nouveau match est
+    antérieur au dernier traité, tout est recalculé ; le résultat ne dépend que du contenu
+    du sheet, pas de l'ordre des mises à jour.
+    """
+
+    def __init__(self, variante="classique", k=K_DEFAUT):
+        if variante not in VARIANTES:
+            raise ValueError(f"Variante Elo inconnue : {variante}")
+        self._verrou = threading.Lock()
+        self.variante = variante
+        self.k = k
+        self.generation = None      # génération du cache de feuilles lors de la dernière synchronisation
+        self._reinitialiser()
+
+    def _reinitialiser(self):
+        self.notes = {}
+        self.parties = {}
+        self.nb_lignes = 1          # lignes du sheet déjà traitées (1 = en-tête)
+        self.derniere_date = ""
+        self.derniere_ligne = None
+        self.empreinte = ""         # sha1 chaîné des lignes 2..nb_lignes
+
+    def appliquer(self, vainqueur, perdant, sets=()):
+        """Met à jour les deux joueurs après un match"""
+        note_v = self.notes.get(vainqueur, ELO_INITIAL)
+        note_p = self.notes.get(perdant, ELO_INITIAL)
+        k = self.k * facteur_marge(sets) if self.variante == "marge" else self.k
+        delta = k * (1 - score_attendu(note_v, note_p))
+        self.notes[vainqueur] = note_v + delta
+        self.notes[perdant] = note_p - delta
+        self.parties[vainqueur] = self.parties.get(vainqueur, 0) + 1
+        self.parties[perdant] = self.parties.get(perdant, 0) + 1
+
+    def synchroniser(self, valeurs, verifier=False):
+        """
+        Applique les nouvelles lignes de `valeurs` (get_all_values du sheet, en-tête compris).
+        Par défaut seule la dernière ligne traitée est comparée ; avec `verifier`, l'empreinte
+        de toutes les lignes traitées est recalculée (à faire après un rechargement complet).
+        Retourne True si un recalcul complet a été nécessaire.
+        """
+        with self._verrou:
+            if not valeurs:
+                self._reinitialiser()
+                return True
+            entete = valeurs[0]
+            try:
+                i_v, i_p, i_date = entete.index("vainqueur"), entete.index("adversaire"), entete.index("date")
+            except ValueError:
+                return False
+            i_sets = [i for i, c in enumerate(entete) if c.startswith("Set_")]
+
+            reprise = len(valeurs) >= self.nb_lignes and (
+                self.nb_lignes == 1 or valeurs[self.nb_lignes - 1] == self.derniere_ligne
+            )
+            if reprise and verifier:
+                reprise = _empreinte("", valeurs[1:self.nb_lignes]) == self.empreinte
+            def matchs(debut):
+                return [(ligne[i_date] if i_date < len(ligne) else "", numero, ligne)
+                        for numero, ligne in enumerate(valeurs[debut:], start=debut)
+                        if len(ligne) > i_p and ligne[i_v] and ligne[i_p]]
+
+            debut = self.nb_lignes if reprise else 1
+            nouvelles = matchs(debut)
+            if reprise and nouvelles and min(nouvelles)[0] < self.derniere_date:
+                reprise = False
+                debut = 1
+                nouvelles = matchs(debut)
+            if not reprise:
+                self._reinitialiser()
+
+            # Ordre déterministe : date puis numéro de ligne
+            for date, _, ligne in sorted(nouvelles, key=lambda m: (m[0], m[1])):
+                self.appliquer(ligne[i_v], ligne[i_p], [ligne[i] if i < len(ligne) else "" for i in i_sets])
+                self.derniere_date = max(self.derniere_date, date)
+            self.empreinte = _empreinte(self.empreinte, valeurs[debut:])
+            self.nb_lignes = len(valeurs)
+            self.derniere_ligne = list(valeurs[-1])
+            return not reprise
+
+    def classement(self, joueurs):
+        """Liste de (joueur, note arrondie, parties) pour les joueurs demandés"""
+        return [(j, round(self.notes.get(j, ELO_INITIAL)), self.parties.get(j, 0)) for j in joueurs]
+
+    # Point de reprise persistant
+    #############################
+    def vers_dict(self):
+        return {
+            "variante": self.variante,
+            "k": self.k,
+            "nb_lignes": self.nb_lignes,
+            "derniere_date": self.derniere_date,
+            "derniere_ligne": self.derniere_ligne,
+            "empreinte": self.empreinte,
+            "notes": self.notes,
+            "parties": self.parties,
+        }
+
+    @classmethod
+    def depuis_dict(cls, donnees):
+        elo = cls(donnees["variante"], donnees["k"])
+        elo.nb_lignes = donnees["nb_lignes"]
+        elo.derniere_date = donnees["derniere_date"]
+        elo.derniere_ligne = donnees["derniere_ligne"]
+        elo.empreinte = donnees["empreinte"]
+        elo.notes = dict(donnees["notes"])
+        elo.parties = dict(donnees["parties"])
+        return elo
+
+    def sauvegarder(self, chemin):
+        """Écriture atomique du point de reprise (fichier temporaire puis renommage)"""
+        with self._verrou:
+            donnees = self.vers_dict()
+        temporaire = chemin + ".tmp"
+        with open(temporaire, "w", encoding="utf-8") as f:
+            json.dump(donnees, f, ensure_ascii=False)
+        os.replace(temporaire, chemin)
+
+    @classmethod
+    def charger(cls, chemin, variante="classique", k=K_DEFAUT):
+        """Point de reprise du fichier s'il correspond à la variante et à K, classement vide sinon"""
+        try:
+            with open(chemin, encoding="utf-8") as f:
+                donnees = json.load(f)
+            if donnees.get("variante") == variante and donnees.get("k") == k:
+                return cls.depuis_dict(donnees)
+        except (OSError, ValueError, KeyError):
+            pass
+        return cls(variante, k)
+
+def _empreinte(empreinte, lignes):
+    """Empreinte chaînée : prolonger l'empreinte de n lignes avec la ligne n+1 coûte O(1)"""
+    for ligne in lignes:
+        empreinte = hashlib.sha1((empreinte + json.dumps(ligne, ensure_ascii=False)).encode("utf-8")).hexdigest()
+    return empreinte
@@ -0,0 +1,386 @@
+# evenements.py
+import json
+import threading
+import time
+import numpy as np
+import pandas as pd
+from championnat import EXEMPT, STATUT_EXEMPT, POINTS_VICTOIRE, TRI_CHAMPIONNAT, ajouter_points
+from elo import ClassementElo
+from moteur_stats import COLONNES_STATS, TRI_JEU_LIBRE, agreger_codes, decoder_sets_ligne, tableau_classement
+from saisons import compresser, decompresser
+from ordonnanceur import lignes_en_fin
+from gspread.utils import a1_range_to_grid_range
+
+# Types d'événements du journal (sheet evenements : type, date, données JSON)
+MATCH_PROGRAMME = "match_programme"
+RESULTAT_ENREGISTRE = "resultat_enregistre"
+RESULTAT_CORRIGE = "resultat_corrige"
+JOUEUR_AJOUTE = "joueur_ajoute"
+SAISON_CLOTUREE = "saison_cloturee"
+TYPES = (MATCH_PROGRAMME, RESULTAT_ENREGISTRE, RESULTAT_CORRIGE, JOUEUR_AJOUTE, SAISON_CLOTUREE)
+
+# Contextes d'un match : standings, confrontations et Elo sont tenus par contexte
+CONTEXTES = ("simple", "double", "championnat", "tournoi")
+INTERVALLE_INSTANTANE = 200     # événements entre deux instantanés de la projection
+COLONNES_EVENEMENTS = ["type", "date", "donnees"]
+COLONNES_INSTANTANES = ["derniere_ligne", "date", "partie", "donnees"]   # dernière ligne du journal couverte
+DELAI_RAPPROCHEMENT = 60        # secondes : un résultat plus récent peut encore être en route vers le journal
+FORMAT_DATE = "%Y-%m-%d %H:%M:%S"
+
+def maintenant():
+    """Date courante au format des sheets, avec la même horloge que les pages (pd.to_datetime('now'))"""
+    return pd.to_datetime('now').strftime(FORMAT_DATE)
+
+def evenement(type_, date, **donnees):
+    """Ligne du sheet evenements"""
+    if type_ not in TYPES:
+        raise ValueError(f"Type d'événement inconnu : {type_}")
+    return [type_, date, json.dumps(donnees, ensure_ascii=False, separators=(",", ":"))]
+
+def resultat(contexte, vainqueurs, perdants, sets, date, match=None, corrige=False):
+    """
+    Événement résultat enregistré (ou corrigé) ; vainqueurs et perdants : un nom ou une
+    liste (double). Sans identifiant de match (jeu libre), le résultat est identifié par
+    sa date et ses joueurs.
+    """
+    vainqueurs = [vainqueurs] if isinstance(vainqueurs, str) else list(vainqueurs)
+    perdants = [perdants] if isinstance(perdants, str) else list(perdants)
+    if match is None:
+        match = id_resultat(date, vainqueurs, perdants)
+    return evenement(RESULTAT_CORRIGE if corrige else RESULTAT_ENREGISTRE, date, contexte=contexte, match=match,
+                     vainqueurs=vainqueurs, perdants=perdants, sets=[str(s) for s in sets])
+
+def match_programme(contexte, match, joueurs, date, prevu=""):
+    return evenement(MATCH_PROGRAMME, date, contexte=contexte, match=match, joueurs=list(joueurs), prevu=str(prevu))
+
+def id_match_championnat(tour, j1, j2):
+    """Identifiant d'un match de championnat dans le journal (unique dans une saison)"""
+    return f"{tour}|{j1}|{j2}"
+
+def id_resultat(date, vainqueurs, perdants):
+    """Identifiant d'un résultat de jeu libre dans le journal (date à la seconde et joueurs)"""
+    return f"{date}|{'+'.join(vainqueurs)}|{'+'.join(perdants)}"
+
+def resultats_sheet(contexte, valeurs):
+    """
+    Résultats d'un sheet de données (get_all_values, en-tête compris), dans l'ordre du
+    sheet : liste de (match, vainqueurs, perdants, sets, date) avec les identifiants du journal.
+    """
+    resultats = []
+    for ligne in valeurs[1:]:
+        ligne = [str(v) for v in ligne] + [""] * 12
+        if contexte == "simple":
+            vainqueurs, perdants, sets, date, match = ligne[0:1], ligne[1:2], ligne[2:7], ligne[7], None
+        elif contexte == "double":
+            vainqueurs, perdants, sets, date, match = ligne[0:2], ligne[2:4], ligne[4:9], ligne[9], None
+        elif contexte == "championnat":
+            if ligne[3] != "terminé":
+                continue
+            vainqueurs, perdants, sets, date = ligne[4:5], ligne[5:6], ligne[6:11], ligne[11]
+            match = id_match_championnat(ligne[2], ligne[0], ligne[1])
+        else:
+            # Tournoi : les qualifications d'office (exemptés) ne sont pas des résultats
+            if EXEMPT in ligne[2:4]:
+                continue
+            vainqueurs, perdants = ligne[4:5], [ligne[3] if ligne[4] == ligne[2] else ligne[2]]
+            sets, date, match = ligne[5:10], ligne[10], f"{ligne[0]}-{ligne[1]}"
+        if vainqueurs[0]:
+            resultats.append((match or id_resultat(date, vainqueurs, perdants), vainqueurs, perdants, sets, date))
+    return resultats
+
+def lignes_ajoutees(reponse):
+    """(première, dernière) ligne écrites par un append_rows, d'après la réponse de l'API ; None si inconnues"""
+    try:
+        grille = a1_range_to_grid_range(reponse["updates"]["updatedRange"].split("!")[-1])
+        return grille["startRowIndex"] + 1, grille["endRowIndex"]
+    except (TypeError, KeyError, ValueError, AttributeError):
+        return None
+
+def evenements_manquants(projection, donnees, instant):
+    """
+    Rapprochement du journal avec les sheets de données (donnees : contexte -> valeurs).
+    Retourne (lignes à ajouter au journal, vrai si des résultats trop récents ont été
+    laissés de côté) : matchs de championnat programmés absents, résultats absents et,
+    pour le championnat, résultats dont les sets diffèrent (correction non journalisée).
+    """
+    instant = pd.Timestamp(instant)
+    limite = (instant - pd.Timedelta(seconds=DELAI_RAPPROCHEMENT)).strftime(FORMAT_DATE)
+    date = instant.strftime(FORMAT_DATE)
+    lignes, en_attente = [], False
+    for ligne in donnees.get("championnat", [])[1:]:
+        ligne = [str(v) for v in ligne] + [""] * 12
+        match = id_match_championnat(ligne[2], ligne[0], ligne[1])
+        if ligne[0] and match not in projection.programmes["championnat"]:
+            prevu = ligne[11] if ligne[3] not in ("terminé", STATUT_EXEMPT) else ""
+            lignes.append(match_programme("championnat", match, ligne[:2], date, prevu))
+    for contexte in CONTEXTES:
+        connus = projection.resultats[contexte]
+        for match, vainqueurs, perdants, sets, date_match in resultats_sheet(contexte, donnees.get(contexte, [[]])):
+            if match in connus and (contexte != "championnat" or connus[match] == [vainqueurs, perdants, sets]):
+                continue
+            if date_match > limite:
+                en_attente = True
+                continue
+            lignes.append(resultat(contexte, vainqueurs, perdants, sets, date_match, match=match, corrige=match in connus))
+    return lignes, en_attente
+
+##############
+# Projection #
+##############
+
+class Projection:
+    """
+    État dérivé du journal : stats par joueur et confrontations par contexte, matchs
+    programmés et résultats connus (pour appliquer une correction), bonus d'exemption
+    du championnat et notes Elo du jeu libre en simple. Chaque événement se rejoue en O(1).
+    """
+
+    def __init__(self):
+        self.joueurs = []
+        self.stats = {c: {} for c in CONTEXTES}             # contexte -> joueur -> COLONNES_STATS
+        self.confrontations = {c: {} for c in CONTEXTES}    # contexte -> "vainqueur\tperdant" -> [matchs, sets v, sets p, points v, points p]
+        self.programmes = {c: {} for c in CONTEXTES}        # contexte -> match -> [joueurs, date prévue]
+        self.resultats = {c: {} for c in CONTEXTES}         # contexte -> match -> [vainqueurs, perdants, sets]
+        self.bonus = {}                                     # joueur -> points d'exemption (championnat)
+        self.elo = ClassementElo()
+
+    def appliquer(self, type_, donnees):
+        contexte = donnees.get("contexte")
+        if type_ == JOUEUR_AJOUTE:
+            if donnees["joueur"] not in self.joueurs:
+                self.joueurs.append(donnees["joueur"])
+        elif type_ == MATCH_PROGRAMME:
+            deja_programme = donnees["match"] in self.programmes[contexte]
+            self.programmes[contexte][donnees["match"]] = [donnees["joueurs"], donnees.get("prevu", "")]
+            if contexte == "championnat" and EXEMPT in donnees["joueurs"] and not deja_programme:
+                joueur = next(j for j in donnees["joueurs"] if j != EXEMPT)
+                self.bonus[joueur] = self.bonus.get(joueur, 0) + POINTS_VICTOIRE
+        elif type_ in (RESULTAT_ENREGISTRE, RESULTAT_CORRIGE):
+            match = donnees.get("match")
+            if type_ == RESULTAT_CORRIGE and match in self.resultats[contexte]:
+                self._resultat(contexte, *self.resultats[contexte][match], signe=-1)
+            self._resultat(contexte, donnees["vainqueurs"], donnees["perdants"], donnees["sets"])
+            if match is not None:
+                self.resultats[contexte][match] = [donnees["vainqueurs"], donnees["perdants"], donnees["sets"]]
+            if contexte == "simple" and type_ == RESULTAT_ENREGISTRE:
+                self.elo.appliquer(donnees["vainqueurs"][0], donnees["perdants"][0], donnees["sets"])
+        elif type_ == SAISON_CLOTUREE:
+            # Le championnat repart de zéro ; les résumés de la saison sont dans le sheet saisons
+            for etat in (self.stats, self.confrontations, self.programmes, self.resultats):
+                etat["championnat"] = {}
+            self.bonus = {}
+
+    def _resultat(self, contexte, vainqueurs, perdants, sets, signe=1):
+        delta = agreger_codes([0], [1], decoder_sets_ligne(sets), 2) * signe
+        stats = self.stats[contexte]
+        for joueurs, ligne in ((vainqueurs, delta[0]), (perdants, delta[1])):
+            for joueur in joueurs:
+                actuel = stats.get(joueur) or [0] * len(COLONNES_STATS)
+                stats[joueur] = [a + int(d) for a, d in zip(actuel, ligne)]
+        if len(vainqueurs) == 1 and len(perdants) == 1:
+            cle = f"{vainqueurs[0]}\t{perdants[0]}"
+            actuel = self.confrontations[contexte].get(cle) or [0] * 5
+            # Sets et points du vainqueur puis du perdant (colonnes Sets_gagnés, Sets_concédés, Points_gagnés, Points_concédés)
+            increment = [signe, int(delta[0][2]), int(delta[0][3]), int(delta[0][5]), int(delta[0][6])]
+            self.confrontations[contexte][cle] = [a + d for a, d in zip(actuel, increment)]
+
+    # Vues
+    ########
+    def classement(self, contexte, joueurs=None):
+        """Tableau du classement d'un contexte (même mise en forme que les pages)"""
+        stats = self.stats[contexte]
+        index = pd.Index(joueurs if joueurs is not None else list(stats), dtype=object).drop_duplicates()
+        tableau = pd.DataFrame([stats.get(j, [0] * len(COLONNES_STATS)) for j in index], index=index, columns=COLONNES_STATS, dtype=np.int64)
+        if contexte != "championnat":
+            return tableau_classement(tableau, TRI_JEU_LIBRE)
+        tableau = ajouter_points(tableau)
+        tableau["Points"] += pd.Series(self.bonus, dtype=np.int64).reindex(index, fill_value=0)
+        return tableau_classement(tableau, TRI_CHAMPIONNAT)
+
+    def tableau_confrontations(self, contexte, joueurs, mesure="Sets"):
+        """Tableau joueur x joueur "gagnés-concédés" (Victoires, Sets ou Points), comme moteur_stats.tableau_confrontations"""
+        index = pd.Index(joueurs, dtype=object).drop_duplicates()
+        position = {j: k for k, j in enumerate(index)}
+        bilans = {}     # (joueur, adversaire) -> [pour, contre]
+        for cle, (matchs, sets_v, sets_p, points_v, points_p) in self.confrontations[contexte].items():
+            if matchs <= 0:
+                continue
+            vainqueur, perdant = cle.split("\t")
+            pour, contre = {"Victoires": (matchs, 0), "Sets": (sets_v, sets_p), "Points": (points_v, points_p)}[mesure]
+            for a, b, gagnes, concedes in ((vainqueur, perdant, pour, contre), (perdant, vainqueur, contre, pour)):
+                bilan = bilans.setdefault((a, b), [0, 0])
+                bilan[0] += gagnes
+                bilan[1] += concedes
+        cases = np.full((len(index), len(index)), "", dtype=object)
+        for (a, b), (pour, contre) in bilans.items():
+            if a in position and b in position:
+                cases[position[a], position[b]] = f"{pour}-{contre}"
+        return pd.DataFrame(cases, index=index, columns=index)
+
+    def notes_elo(self, joueurs):
+        return pd.DataFrame(
+            [(note, parties) for _, note, parties in self.elo.classement(joueurs)],
+            index=pd.Index(joueurs, dtype=object), columns=["Elo", "Parties"],
+        )
+
+    # Instantané
+    ############
+    def vers_dict(self):
+        return {
+            "joueurs": self.joueurs,
+            "stats": self.stats,
+            "confrontations": self.confrontations,
+            "programmes": self.programmes,
+            "resultats": self.resultats,
+            "bonus": self.bonus,
+            "elo": self.elo.vers_dict(),
+        }
+
+    @classmethod
+    def depuis_dict(cls, donnees):
+        projection = cls()
+        projection.joueurs = list(donnees["joueurs"])
+        for attribut in ("stats", "confrontations", "programmes", "resultats"):
+            getattr(projection, attribut).update(donnees[attribut])
+        projection.bonus = dict(donnees["bonus"])
+        projection.elo = ClassementElo.depuis_dict(donnees["elo"])
+        return projection
+
+###########
+# Journal #
+###########
+
+class Journal:
+    """
+    Journal des événements en ajout seul (sheet evenements) et instantanés périodiques
+    de la projection (sheet instantanes, compressés comme les archives de saison). La
+    restauration lit le dernier instantané puis rejoue seulement les événements écrits
+    après lui : au plus `intervalle` événements, quelle que soit la taille de l'historique.
+    Les lignes du journal sont appliquées dans l'ordre du sheet, y compris celles écrites
+    par un autre process. Le journal est écrit après les sheets de données : rapprocher()
+    y rétablit ce qui manque (écriture du journal en échec, process arrêté entre les deux).
+    Les pages de jeu lisent toujours les sheets de données (instantanés du cache et vues
+    incrémentales) ; la projection sert aux vues de la page d'administration et à la
+    vérification des données. Chaque enregistrement coûte un append_rows.
+    """
+
+    def __init__(self, ordonnanceur, intervalle=INTERVALLE_INSTANTANE):
+        self._verrou = threading.RLock()
+        self.ordonnanceur = ordonnanceur
+        self.intervalle = intervalle
+        self.projection = None
+        self.ligne = 1              # dernière ligne du sheet evenements appliquée (1 = en-tête)
+        self.ligne_instantane = 1   # ligne couverte par le dernier instantané
+        self.rejoues = 0            # événements rejoués à la dernière restauration
+        self.temps = {}             # durées (ms) de la dernière restauration
+        self.a_rapprocher = True    # rapprochement avec les sheets de données à faire (démarrage, écriture en échec)
+        self.echecs = 0             # écritures du journal en échec
+        self.rapproches = 0         # événements rétablis par rapprochement
+
+    def restaurer(self, ws_evenements, ws_instantanes):
+        """Dernier instantané + événements écrits depuis"""
+        with self._verrou:
+            debut = time.perf_counter()
+            projection, ligne = Projection(), 1
+            colonne = self.ordonnanceur.lire(("colonne", ws_instantanes.title, 1), ws_instantanes.col_values, 1)
+            couvertes = [int(v) for v in colonne[1:] if str(v).isdigit()]
+            if couvertes:
+                ligne = max(couvertes)
+                rangs = [k for k, v in enumerate(colonne, start=1) if str(v) == str(ligne)]
+                plage = f"A{rangs[0]}:D{rangs[-1]}"
+                lignes = self.ordonnanceur.lire(("plage", ws_instantanes.title, plage), ws_instantanes.get, plage)
+                # Un instantané réécrit après une reprise : la dernière version de chaque partie l'emporte
+                morceaux = {int(l[2]): l[3] for l in lignes if len(l) > 3 and str(l[0]) == str(ligne)}
+                projection = Projection.depuis_dict(decompresser([morceaux[p] for p in sorted(morceaux)]))
+            self.temps["Lecture de l'instantané"] = (time.perf_counter() - debut) * 1000
+            self.projection, self.ligne, self.ligne_instantane = projection, ligne, ligne
+            self.a_rapprocher = True
+            debut = time.perf_counter()
+            self.rejoues = self._rattraper(ws_evenements)
+            self.temps["Événements rejoués"] = (time.perf_counter() - debut) * 1000
+        return self
+
+    def _rattraper(self, ws_evenements):
+        """Applique les lignes du journal écrites après la dernière appliquée ; retourne leur nombre"""
+        plage = f"A{self.ligne + 1}:C"
+        lignes = self.ordonnanceur.lire(("plage", ws_evenements.title, plage), ws_evenements.get, plage)
+        for ligne in lignes:
+            ligne = list(ligne) + [""] * 3
+            if ligne[0] in TYPES:
+                self.projection.appliquer(ligne[0], json.loads(ligne[2] or "{}"))
+        self.ligne += len(lignes)
+        return len(lignes)
+
+    def _ajouter(self, ws_evenements, lignes):
+        """
+        Un seul append_rows, puis mise à jour de la projection. La réponse de l'API dit
+        où les lignes sont arrivées : juste après la dernière appliquée, elles sont
+        appliquées sans relire le journal ; sinon (lignes d'un autre process entre-temps,
+        réponse inconnue) les lignes nouvelles sont relues dans l'ordre du sheet.
+        """
+        reponse = self.ordonnanceur.ajouter(ws_evenements.append_rows, lignes, deja_applique=lambda: lignes_en_fin(ws_evenements, lignes))
+        if lignes_ajoutees(reponse) != (self.ligne + 1, self.ligne + len(lignes)):
+            self._rattraper(ws_evenements)
+            return
+        for ligne in lignes:
+            self.projection.appliquer(ligne[0], json.loads(ligne[2] or "{}"))
+        self.ligne += len(lignes)
+
+    def synchroniser(self, ws_evenements, ws_instantanes):
+        """Projection à jour du sheet (restaurée au premier appel)"""
+        with self._verrou:
+            if self.projection is None:
+                self.restaurer(ws_evenements, ws_instantanes)
+            else:
+                self._rattraper(ws_evenements)
+        return self
+
+    def enregistrer(self, ws_evenements, ws_instantanes, lignes, joueurs=()):
+        """
+        Ajoute des événements au journal (un seul append_rows), précédés d'un joueur_ajoute
+        pour chaque joueur de `joueurs` encore inconnu. Écrit un
+        instantané quand `intervalle` événements se sont accumulés depuis le précédent.
+        En cas d'échec, le prochain rapprochement rétablira les événements.
+        """
+        with self._verrou:
+            try:
+                if self.projection is None:
+                    self.restaurer(ws_evenements, ws_instantanes)
+                date = lignes[0][1] if lignes else maintenant()
+                # Un joueur_ajoute en double (écrit entre-temps par un autre process) est sans effet
+                nouveaux = [evenement(JOUEUR_AJOUTE, date, joueur=j) for j in dict.fromkeys(joueurs) if j not in self.projection.joueurs]
+                self._ajouter(ws_evenements, nouveaux + list(lignes))
+            except Exception:
+                self.echecs += 1
+                self.a_rapprocher = True
+                raise
+            if self.ligne - self.ligne_instantane >= self.intervalle:
+                self.ecrire_instantane(ws_instantanes)
+
+    def rapprocher(self, ws_evenements, ws_instantanes, donnees):
+        """
+        Vérifie le journal contre les sheets de données (donnees : contexte -> valeurs) et
+        y ajoute les événements manquants en un seul append_rows. Retourne leur nombre.
+        Les résultats de moins de DELAI_RAPPROCHEMENT secondes sont laissés à la session
+        qui les écrit : le rapprochement reste alors à faire.
+        """
+        with self._verrou:
+            self.synchroniser(ws_evenements, ws_instantanes)
+            lignes, en_attente = evenements_manquants(self.projection, donnees, maintenant())
+            if lignes:
+                try:
+                    self._ajouter(ws_evenements, lignes)
+                except Exception:
+                    self.echecs += 1
+                    raise
+                self.rapproches += len(lignes)
+            self.a_rapprocher = en_attente
+            return len(lignes)
+
+    def ecrire_instantane(self, ws_instantanes):
+        with self._verrou:
+            date = maintenant()
+            morceaux = compresser(self.projection.vers_dict())
+            # Rejouable sans risque : une partie réécrite après une reprise est dédoublonnée à la lecture
+            self.ordonnanceur.ecrire(ws_instantanes.append_rows, [[self.ligne, date, partie, m] for partie, m in enumerate(morceaux, start=1)])
+            self.ligne_instantane = self.ligne
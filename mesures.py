@@ -0,0 +1,186 @@
+# mesures.py
+import functools
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+JOURNALISATION = logging.getLogger(__name__)
+
+TAILLE_ECHANTILLON = 1000   # dernières durées gardées par opération pour les percentiles
+
+# Préfixes des noms d'opérations :
+#   sheets.*  appels à l'API Google Sheets (via l'ordonnanceur)
+#   calcul.*  calculs pandas / numpy
+#   rendu.*   mise en forme et affichage Streamlit
+#   script.*  exécution complète d'une page, fragment.* réexécution d'un onglet
+
+class Mesures:
+    """Durées et nombre d'appels par opération, partagés par tout le process"""
+
+    def __init__(self, taille=TAILLE_ECHANTILLON):
+        self.taille = taille
+        self._verrou = threading.Lock()
+        self._durees = {}       # opération -> deque des dernières durées (s)
+        self._appels = {}       # opération -> nombre total d'appels
+        self._totaux = {}       # opération -> durée cumulée (s)
+        self._erreurs = {}      # opération -> nombre d'appels terminés par une exception
+        self.debut = time.time()
+
+    def enregistrer(self, operation, duree, erreur=False):
+        with self._verrou:
+            if operation not in self._durees:
+                self._durees[operation] = deque(maxlen=self.taille)
+                self._appels[operation] = self._totaux[operation] = self._erreurs[operation] = 0
+            self._durees[operation].append(duree)
+            self._appels[operation] += 1
+            self._totaux[operation] += duree
+            self._erreurs[operation] += int(erreur)
+
+    @contextmanager
+    def mesurer(self, operation):
+        debut = time.perf_counter()
+        erreur = False
+        try:
+            yield
+        except Exception:
+            erreur = True
+            raise
+        finally:
+            self.enregistrer(operation, time.perf_counter() - debut, erreur)
+
+    def decorer(self, operation):
+        """Décorateur : mesure chaque appel de la fonction"""
+        def decorateur(fonction):
+            @functools.wraps(fonction)
+            def enveloppe(*args, **kwargs):
+                with self.mesurer(operation):
+                    return fonction(*args, **kwargs)
+            return enveloppe
+        return decorateur
+
+    def resume(self):
+        """Une ligne par opération : appels, erreurs, total, moyenne, p50, p95 et max (ms)"""
+        with self._verrou:
+            copies = {op: sorted(d) for op, d in self._durees.items()}
+            appels, totaux, erreurs = dict(self._appels), dict(self._totaux), dict(self._erreurs)
+        lignes = []
+        for op in sorted(copies):
+            durees = copies[op]
+            lignes.append({
+                "operation": op,
+                "appels": appels[op],
+                "erreurs": erreurs[op],
+                "total_ms": round(totaux[op] * 1000, 1),
+                "moyenne_ms": round(totaux[op] / appels[op] * 1000, 2),
+                "p50_ms": round(_percentile(durees, 0.50) * 1000, 2),
+                "p95_ms": round(_percentile(durees, 0.95) * 1000, 2),
+                "max_ms": round(durees[-1] * 1000, 2),
+            })
+        return lignes
+
+    def vers_json(self, autres=None):
+        return json.dumps({"date": time.strftime("%Y-%m-%d %H:%M:%S"), "operations": self.resume(), "autres": autres or {}}, ensure_ascii=False)
+
+    def prometheus(self, autres=None):
+        """Format texte Prometheus : un summary par opération, `autres` en gauges"""
+        lignes = [
+            "# HELP ttcv_operation_secondes Durée des opérations de l'application",
+            "# TYPE ttcv_operation_secondes summary",
+        ]
+        with self._verrou:
+            copies = {op: sorted(d) for op, d in self._durees.items()}
+            appels, totaux, erreurs = dict(self._appels), dict(self._totaux), dict(self._erreurs)
+        for op in sorted(copies):
+            etiquette = f'operation="{op}"'
+            for q in (0.5, 0.95):
+                lignes.append(f'ttcv_operation_secondes{{{etiquette},quantile="{q}"}} {_percentile(copies[op], q):.6f}')
+            lignes.append(f"ttcv_operation_secondes_sum{{{etiquette}}} {totaux[op]:.6f}")
+            lignes.append(f"ttcv_operation_secondes_count{{{etiquette}}} {appels[op]}")
+        lignes.append("# TYPE ttcv_operation_erreurs_total counter")
+        for op in sorted(erreurs):
+            lignes.append(f'ttcv_operation_erreurs_total{{operation="{op}"}} {erreurs[op]}')
+        for nom, valeur in (autres or {}).items():
+            lignes.append(f"# TYPE ttcv_{nom} gauge")
+            lignes.append(f"ttcv_{nom} {valeur}")
+        return "\n".join(lignes) + "\n"
+
+    def reinitialiser(self):
+        with self._verrou:
+            self._durees.clear()
+            self._appels.clear()
+            self._totaux.clear()
+            self._erreurs.clear()
+            self.debut = time.time()
+
+def _percentile(durees_triees, q):
+    """Percentile par rang le plus proche sur une liste triée"""
+    if not durees_triees:
+        return 0.0
+    return durees_triees[min(len(durees_triees) - 1, int(q * len(durees_triees)))]
+
+# Instance unique du process (les modules sont importés une fois, toutes les sessions la partagent)
+MESURES = Mesures()
+mesurer = MESURES.mesurer
+mesure = MESURES.decorer
+
+###########################
+# Export                  #
+###########################
+
+ADRESSE_EXPORT_DEFAUT = "127.0.0.1"     # "0.0.0.0" pour exposer /metrics au réseau (derrière un pare-feu)
+
+def demarrer_export(autres=None, port=None, journal=None, intervalle=60, adresse=ADRESSE_EXPORT_DEFAUT):
+    """
+    Démarre les exports en arrière-plan (threads démons) :
+      - port : serveur HTTP qui répond au format Prometheus sur /metrics, sans
+        authentification : il n'écoute que sur `adresse` (la machine locale par défaut) ;
+      - journal : fichier où une ligne JSON est ajoutée toutes les `intervalle` secondes.
+    `autres` est une fonction sans argument qui retourne des valeurs supplémentaires
+    (par ex. les compteurs de l'ordonnanceur). Un export en échec n'arrête pas l'application :
+    retourne l'état des exports (port indisponible, écritures du journal en échec).
+    """
+    autres = autres or dict
+    etat = {"export_prometheus": "désactivé", "export_journal_erreurs": 0}
+    if port:
+        class Gestionnaire(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                corps = MESURES.prometheus(autres()).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(corps)))
+                self.end_headers()
+                self.wfile.write(corps)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            serveur = ThreadingHTTPServer((adresse, int(port)), Gestionnaire)
+        except OSError as e:
+            # Port déjà pris (autre process, redémarrage) : l'application tourne sans /metrics
+            JOURNALISATION.warning("Export Prometheus désactivé (%s:%s) : %s", adresse, port, e)
+            etat["export_prometheus"] = f"indisponible : {e}"
+        else:
+            threading.Thread(target=serveur.serve_forever, name="export-prometheus", daemon=True).start()
+            etat["export_prometheus"] = f"{adresse}:{port}"
+    if journal:
+        def ecrire():
+            while True:
+                time.sleep(intervalle)
+                try:
+                    with open(journal, "a", encoding="utf-8") as f:
+                        f.write(MESURES.vers_json(autres()) + "\n")
+                except Exception:
+                    # Disque plein, fichier inaccessible : la ligne est perdue, la suivante réessaiera
+                    etat["export_journal_erreurs"] += 1
+                    JOURNALISATION.exception("Écriture du journal des mesures %s en échec", journal)
+
+        threading.Thread(target=ecrire, name="journal-mesures", daemon=True).start()
+    return etat
@@ -0,0 +1,492 @@
+# moteur_stats.py
+import numpy as np
+import pandas as pd
+
+# Format des sets (vu du vainqueur du match) :
+#   X > 0  : set gagné par le vainqueur 11-X
+#   0      : set gagné par le vainqueur 11-0 (bulle infligée)
+#   -X < 0 : set gagné par le perdant 11-X
+#   -99    : set gagné par le perdant 11-0 (bulle concédée)
+#   ""     : set non joué
+COLONNES_SETS = ["Set_1", "Set_2", "Set_3", "Set_4", "Set_5"]
+BULLE_PERDANT = -99
+SET_NON_JOUE = -128  # sentinelle du tableau décodé (tient dans un int8)
+
+COLONNES_STATS = ["Victoires", "Défaites", "Sets_gagnés", "Sets_concédés", "Diff_sets", "Points_gagnés", "Points_concédés", "Diff_points", "Bulles_infligées", "Bulles_concédées"]
+
+#############
+# Décodage  #
+#############
+
+def decoder_sets(df):
+    """Décode les colonnes Set_1..Set_5 en un tableau int8 (n_matchs, 5), SET_NON_JOUE pour les sets vides"""
+    if df.empty:
+        return np.empty((0, len(COLONNES_SETS)), dtype=np.int8)
+    valeurs = df.reindex(columns=COLONNES_SETS).apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    sets = np.full(valeurs.shape, SET_NON_JOUE, dtype=np.int8)
+    joues = ~np.isnan(valeurs)
+    sets[joues] = np.trunc(valeurs[joues]).astype(np.int8)
+    return sets
+
+def decoder_sets_ligne(valeurs):
+    """Comme decoder_sets pour un seul match (valeurs Set_1..Set_5 d'une ligne du sheet), sans passer par pandas"""
+    sets = np.full((1, len(COLONNES_SETS)), SET_NON_JOUE, dtype=np.int8)
+    for i, valeur in enumerate(list(valeurs)[:len(COLONNES_SETS)]):
+        try:
+            sets[0, i] = int(float(valeur))
+        except (TypeError, ValueError, OverflowError):
+            pass    # set non joué ou cellule illisible
+    return sets
+
+def detail_matchs(sets):
+    """Calcule par match les sets, points et bulles du vainqueur et du perdant à partir des sets décodés"""
+    joues = sets != SET_NON_JOUE
+    set_perdant = joues & (sets < 0)          # inclut -99 (perdant gagne 11-0)
+    set_vainqueur = joues & (sets >= 0)
+    valeur = sets.astype(np.int16)
+
+    points_vainqueur = np.where(set_vainqueur, 11, np.where(set_perdant & (sets != BULLE_PERDANT), -valeur, 0))
+    points_perdant = np.where(set_perdant, 11, np.where(set_vainqueur, valeur, 0))
+
+    return {
+        "sets_vainqueur": np.full(len(sets), 3, dtype=np.int64),  # toujours 3 pour le vainqueur
+        "sets_perdant": set_perdant.sum(axis=1),
+        "points_vainqueur": points_vainqueur.sum(axis=1),
+        "points_perdant": points_perdant.sum(axis=1),
+        "bulles_gagnant": (set_vainqueur & (sets == 0)).sum(axis=1),
+        "bulles_perdant": (sets == BULLE_PERDANT).sum(axis=1),
+    }
+
+##############
+# Agrégation #
+##############
+
+def agreger_codes(code_v, code_p, sets, n):
+    """
+    Agrège les stats par identifiant de joueur (0..n-1) avec des sommes groupées (np.bincount).
+    Les codes négatifs (joueur hors liste) sont ignorés : le match ne compte que pour l'autre joueur.
+    Retourne un tableau int64 (n, len(COLONNES_STATS)).
+    """
+    code_v = np.asarray(code_v)
+    code_p = np.asarray(code_p)
+    ok_v = code_v >= 0
+    ok_p = code_p >= 0
+    d = detail_matchs(sets)
+
+    def somme(codes, ok, poids=None):
+        if poids is not None:
+            poids = np.asarray(poids)[ok]
+        return np.bincount(codes[ok], weights=poids, minlength=n).astype(np.int64)
+
+    stats = {}
+    stats["Victoires"] = somme(code_v, ok_v)
+    stats["Défaites"] = somme(code_p, ok_p)
+    stats["Sets_gagnés"] = somme(code_v, ok_v, d["sets_vainqueur"]) + somme(code_p, ok_p, d["sets_perdant"])
+    stats["Sets_concédés"] = somme(code_v, ok_v, d["sets_perdant"]) + somme(code_p, ok_p, d["sets_vainqueur"])
+    stats["Diff_sets"] = stats["Sets_gagnés"] - stats["Sets_concédés"]
+    stats["Points_gagnés"] = somme(code_v, ok_v, d["points_vainqueur"]) + somme(code_p, ok_p, d["points_perdant"])
+    stats["Points_concédés"] = somme(code_v, ok_v, d["points_perdant"]) + somme(code_p, ok_p, d["points_vainqueur"])
+    stats["Diff_points"] = stats["Points_gagnés"] - stats["Points_concédés"]
+    stats["Bulles_infligées"] = somme(code_v, ok_v, d["bulles_gagnant"]) + somme(code_p, ok_p, d["bulles_perdant"])
+    stats["Bulles_concédées"] = somme(code_v, ok_v, d["bulles_perdant"]) + somme(code_p, ok_p, d["bulles_gagnant"])
+    return np.column_stack([stats[c] for c in COLONNES_STATS]).reshape(n, len(COLONNES_STATS))
+
+def agreger_stats(vainqueurs, perdants, sets, joueurs):
+    """
+    Agrège les stats par joueur avec des sommes groupées (np.bincount).
+    Retourne un DataFrame indexé par joueur avec les colonnes COLONNES_STATS.
+    Toutes les colonnes sont additives : les stats de deux lots de matchs s'additionnent.
+    Les matchs impliquant un joueur absent de `joueurs` ne sont comptés que pour l'autre joueur.
+    """
+    index = pd.Index(joueurs).drop_duplicates()
+    code_v = index.get_indexer(pd.Index(vainqueurs))
+    code_p = index.get_indexer(pd.Index(perdants))
+    return pd.DataFrame(agreger_codes(code_v, code_p, sets, len(index)), index=index, columns=COLONNES_STATS)
+
+def calculer_stats_resultats(df, joueurs):
+    """Stats par joueur à partir d'un DataFrame de résultats (colonnes vainqueur, adversaire, Set_1..Set_5)"""
+    if df.empty:
+        return agreger_stats([], [], decoder_sets(df), joueurs)
+    return agreger_stats(df["vainqueur"].to_numpy(), df["adversaire"].to_numpy(), decoder_sets(df), joueurs)
+
+##################
+# Confrontations #
+##################
+
+MESURES_CONFRONTATIONS = {
+    "Victoires": ("Victoires", "Défaites"),
+    "Sets": ("Sets_gagnés", "Sets_concédés"),
+    "Points": ("Points_gagnés", "Points_concédés"),
+}
+
+def matrices_confrontations(code_v, code_p, sets, n):
+    """
+    Matrices n x n (joueur en ligne, adversaire en colonne) calculées en une passe groupée :
+    matchs gagnés/perdus, sets et points gagnés/concédés face à chaque adversaire.
+    """
+    code_v = np.asarray(code_v)
+    code_p = np.asarray(code_p)
+    ok = (code_v >= 0) & (code_p >= 0)
+    paire = code_v[ok] * n + code_p[ok]   # case (vainqueur, perdant)
+    d = {k: np.asarray(v)[ok] for k, v in detail_matchs(sets).items()}
+
+    def matrice(poids=None):
+        return np.bincount(paire, weights=poids, minlength=n * n).astype(np.int64).reshape(n, n)
+
+    victoires = matrice()
+    sets_v, sets_p = matrice(d["sets_vainqueur"]), matrice(d["sets_perdant"])
+    points_v, points_p = matrice(d["points_vainqueur"]), matrice(d["points_perdant"])
+    # Vu du joueur en ligne : ce qu'il a pris en gagnant + ce qu'il a pris en perdant (transposée)
+    return {
+        "Victoires": victoires,
+        "Défaites": victoires.T,
+        "Sets_gagnés": sets_v + sets_p.T,
+        "Sets_concédés": sets_p + sets_v.T,
+        "Points_gagnés": points_v + points_p.T,
+        "Points_concédés": points_p + points_v.T,
+    }
+
+def tableau_confrontations(df, joueurs, mesure="Sets"):
+    """
+    Tableau joueur x joueur de textes "gagnés-concédés" pour la mesure choisie
+    (Victoires, Sets ou Points) ; case vide si les deux joueurs ne se sont pas rencontrés.
+    """
+    index = pd.Index(joueurs).drop_duplicates()
+    if df.empty:
+        code_v = code_p = np.empty(0, dtype=np.int64)
+    else:
+        code_v = index.get_indexer(pd.Index(df["vainqueur"]))
+        code_p = index.get_indexer(pd.Index(df["adversaire"]))
+    return _tableau(matrices_confrontations(code_v, code_p, decoder_sets(df), len(index)), index, mesure)
+
+def tableau_confrontations_compact(matchs, joueurs, mesure="Sets"):
+    """Comme tableau_confrontations, à partir d'un MatchsCompacts"""
+    index = pd.Index(joueurs).drop_duplicates()
+    codes = pd.Index(matchs.noms, dtype=object).get_indexer(index)
+    # Renumérotation des identifiants vers les positions dans `joueurs` (-1 = hors liste)
+    position = np.full(len(matchs.noms), -1, dtype=np.int64)
+    position[codes[codes >= 0]] = np.nonzero(codes >= 0)[0]
+    return _tableau(matrices_confrontations(position[matchs.vainqueurs], position[matchs.perdants], matchs.sets, len(index)), index, mesure)
+
+def _tableau(matrices, index, mesure):
+    pour, contre = (matrices[c] for c in MESURES_CONFRONTATIONS[mesure])
+    joues = (matrices["Victoires"] + matrices["Défaites"]) > 0
+
+    cases = np.full(joues.shape, "", dtype=object)
+    lignes, colonnes = np.nonzero(joues)
+    cases[lignes, colonnes] = [f"{a}-{b}" for a, b in zip(pour[lignes, colonnes], contre[lignes, colonnes])]
+    return pd.DataFrame(cases, index=index, columns=index)
+
+##############
+# Classement #
+##############
+
+TRI_JEU_LIBRE = ["Victoires", "Diff_sets", "Diff_points"]
+NOMS_AFFICHES = {"Sets_gagnés": "Sets Gagnés", "Sets_concédés": "Sets Perdus", "Points_gagnés": "Points Gagnés", "Points_concédés": "Points Perdus"}
+
+def tableau_classement(stats, tri=TRI_JEU_LIBRE):
+    """
+    Tableau affiché à partir des stats par joueur (COLONNES_STATS, précédées de Points pour
+    le championnat) : parties jouées et % de victoires ajoutés, tri décroissant sur `tri`.
+    """
+    victoires = stats["Victoires"].to_numpy()
+    jouees = victoires + stats["Défaites"].to_numpy()
+    pourcentages = np.round(np.divide(100 * victoires, jouees, out=np.zeros(len(stats)), where=jouees > 0)).astype(int)
+    tableau = stats.copy()
+    tableau["Joués"] = jouees
+    tableau["% Vict"] = [f"{p}%" for p in pourcentages]
+    tableau = tableau.sort_values(by=tri, ascending=False)
+    colonnes = [c for c in stats.columns if c not in COLONNES_STATS] + ["Joués"] + COLONNES_STATS[:2] + ["% Vict"] + COLONNES_STATS[2:]
+    return tableau[colonnes].rename(columns=NOMS_AFFICHES)
+
+###########################
+# Stockage compact        #
+###########################
+
+FORMAT_DATE = "%Y-%m-%d %H:%M:%S"
+
+class MatchsCompacts:
+    """
+    Matchs codés en entiers pour les agrégations :
+      - vainqueurs / perdants : identifiants int32, position du nom dans `noms`
+        (ordre du sheet joueurs, puis les noms inconnus dans l'ordre d'apparition)
+      - sets : int8 (n, 5) au format signé, -99 conservé, SET_NON_JOUE pour un set vide
+      - dates : datetime64[s] ; une date qui ne suit pas FORMAT_DATE est gardée telle quelle
+        dans `dates_brutes` pour que l'aller-retour avec le sheet soit sans perte.
+    """
+
+    def __init__(self, noms=()):
+        self.noms = []
+        self._index = pd.Index([], dtype=object)
+        self.vainqueurs = np.empty(0, dtype=np.int32)
+        self.perdants = np.empty(0, dtype=np.int32)
+        self.sets = np.empty((0, len(COLONNES_SETS)), dtype=np.int8)
+        self.dates = np.empty(0, dtype="datetime64[s]")
+        self.dates_brutes = {}   # numéro de match -> texte d'origine
+        self.coder(noms)
+
+    def __len__(self):
+        return len(self.vainqueurs)
+
+    def copie(self):
+        """Copie indépendante (les tableaux numpy ne sont jamais modifiés sur place, ils sont partagés)"""
+        autre = MatchsCompacts.__new__(MatchsCompacts)
+        autre.__dict__.update(self.__dict__)
+        autre.noms = list(self.noms)
+        autre.dates_brutes = dict(self.dates_brutes)
+        return autre
+
+    @property
+    def nbytes(self):
+        return self.vainqueurs.nbytes + self.perdants.nbytes + self.sets.nbytes + self.dates.nbytes
+
+    def coder(self, noms):
+        """Identifiants des noms, en enregistrant les noms encore inconnus"""
+        noms = pd.Index(noms, dtype=object)
+        codes = self._index.get_indexer(noms)
+        if (codes < 0).any():
+            self.noms.extend(pd.unique(noms[codes < 0]))
+            self._index = pd.Index(self.noms, dtype=object)
+            codes = self._index.get_indexer(noms)
+        return codes.astype(np.int32)
+
+    def ajouter_dataframe(self, df, strict=True):
+        """
+        Ajoute des matchs au format du sheet (colonnes vainqueur, adversaire, Set_1..Set_5, date).
+        En mode strict une valeur de set illisible lève ValueError ; sinon elle est comptée
+        comme set non joué, comme dans decoder_sets.
+        """
+        if df.empty:
+            return
+        debut = len(self)
+        self.vainqueurs = np.concatenate([self.vainqueurs, self.coder(df["vainqueur"].astype(str))])
+        self.perdants = np.concatenate([self.perdants, self.coder(df["adversaire"].astype(str))])
+        self.sets = np.concatenate([self.sets, _sets_stricts(df) if strict else decoder_sets(df)])
+
+        textes = df["date"].astype(str).to_numpy() if "date" in df.columns else np.full(len(df), "", dtype=object)
+        dates = pd.to_datetime(pd.Series(textes), format=FORMAT_DATE, errors="coerce")
+        dates = dates.to_numpy(dtype="datetime64[s]")
+        relues = pd.Series(dates).dt.strftime(FORMAT_DATE).fillna("").to_numpy()
+        for i in np.nonzero(relues != textes)[0]:
+            self.dates_brutes[debut + int(i)] = textes[i]
+        self.dates = np.concatenate([self.dates, dates])
+
+    @classmethod
+    def depuis_dataframe(cls, df, noms=(), strict=True):
+        matchs = cls(noms)
+        matchs.ajouter_dataframe(df, strict)
+        return matchs
+
+    def vers_dataframe(self):
+        """DataFrame au format de get_all_records (sets en int, "" pour un set vide)"""
+        noms = np.asarray(self.noms + [""], dtype=object)
+        df = pd.DataFrame({"vainqueur": noms[self.vainqueurs], "adversaire": noms[self.perdants]})
+        for i, colonne in enumerate(COLONNES_SETS):
+            valeurs = self.sets[:, i].astype(object)
+            valeurs[self.sets[:, i] == SET_NON_JOUE] = ""
+            df[colonne] = valeurs
+        dates = pd.Series(self.dates).dt.strftime(FORMAT_DATE).fillna("").to_numpy(dtype=object)
+        for i, texte in self.dates_brutes.items():
+            dates[i] = texte
+        df["date"] = dates
+        return df
+
+    def vers_lignes(self):
+        """Lignes prêtes pour append_rows"""
+        return self.vers_dataframe().values.tolist()
+
+    def stats(self, joueurs):
+        """Stats par joueur (colonnes COLONNES_STATS) calculées sur les identifiants"""
+        tableau = agreger_codes(self.vainqueurs, self.perdants, self.sets, len(self.noms))
+        return pd.DataFrame(tableau, index=self._index, columns=COLONNES_STATS).reindex(pd.Index(joueurs).drop_duplicates(), fill_value=0)
+
+def _sets_stricts(df):
+    """Comme decoder_sets, mais refuse les valeurs qui ne sont ni un entier ni vides"""
+    brut = df.reindex(columns=COLONNES_SETS).astype(object)
+    brut = brut.where(brut.notna(), "")
+    vides = brut.astype(str).apply(lambda c: c.str.strip() == "").to_numpy()
+    valeurs = brut.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    invalides = np.isnan(valeurs) & ~vides
+    invalides |= ~np.isnan(valeurs) & ((valeurs != np.trunc(valeurs)) | (valeurs < -99) | (valeurs > 99))
+    if invalides.any():
+        ligne, colonne = np.argwhere(invalides)[0]
+        raise ValueError(f"{COLONNES_SETS[colonne]} invalide au match {ligne + 1} : {brut.iloc[ligne, colonne]!r}")
+    sets = np.full(valeurs.shape, SET_NON_JOUE, dtype=np.int8)
+    sets[~vides] = valeurs[~vides].astype(np.int8)
+    return sets
+
+###########################
+# Stats par période       #
+###########################
+
+class IndexDates:
+    """
+    Index trié (joueur, date) avec sommes cumulées des stats, construit une fois à partir
+    d'un MatchsCompacts. Chaque match donne une entrée pour le vainqueur et une pour le
+    perdant ; les stats d'un joueur sur [début, fin[ sont la différence de deux sommes
+    cumulées trouvées par recherche dichotomique, sans refiltrer les matchs.
+    Les matchs sans date lisible ne comptent dans aucune période.
+    """
+
+    def __init__(self, matchs):
+        self.noms = list(matchs.noms)
+        self._index = pd.Index(self.noms, dtype=object)
+        d = detail_matchs(matchs.sets)
+        sv, sp = d["sets_vainqueur"], d["sets_perdant"]
+        pv, pp = d["points_vainqueur"], d["points_perdant"]
+        bg, bp = d["bulles_gagnant"], d["bulles_perdant"]
+        un, zero = np.ones(len(matchs), dtype=np.int64), np.zeros(len(matchs), dtype=np.int64)
+        # Lignes dans l'ordre de COLONNES_STATS, vues du vainqueur puis du perdant
+        contributions = np.concatenate([
+            np.column_stack([un, zero, sv, sp, sv - sp, pv, pp, pv - pp, bg, bp]),
+            np.column_stack([zero, un, sp, sv, sp - sv, pp, pv, pp - pv, bp, bg]),
+        ])
+        joueurs = np.concatenate([matchs.vainqueurs, matchs.perdants]).astype(np.int64)
+        secondes = np.concatenate([matchs.dates, matchs.dates]).astype(np.int64)
+        garder = (joueurs >= 0) & ~np.isnat(np.concatenate([matchs.dates, matchs.dates]))
+        joueurs, secondes, contributions = joueurs[garder], secondes[garder], contributions[garder]
+
+        # Clé unique joueur * pas + seconde relative : un seul searchsorted pour tous les joueurs
+        self.origine = int(secondes.min()) if len(secondes) else 0
+        self.pas = (int(secondes.max()) - self.origine + 1) if len(secondes) else 1
+        cles = joueurs * self.pas + (secondes - self.origine)
+        ordre = np.argsort(cles, kind="stable")
+        self.cles = cles[ordre]
+        # int32 : 2 x 10 millions de matchs restent loin de la limite
+        self.cumuls = np.zeros((len(ordre) + 1, len(COLONNES_STATS)), dtype=np.int32)
+        np.cumsum(contributions[ordre], axis=0, out=self.cumuls[1:])
+
+    def _positions(self, bornes):
+        """Position dans self.cles de chaque (joueur, borne) : tableau (n_joueurs, n_bornes)"""
+        relatives = np.array([
+            -1 if b is None else np.datetime64(pd.Timestamp(b), "s").astype(np.int64) - self.origine
+            for b in bornes
+        ], dtype=np.int64)
+        # None en fin de liste = sans limite haute
+        if bornes and bornes[-1] is None:
+            relatives[-1] = self.pas
+        relatives = np.clip(relatives, 0, self.pas)
+        cles = np.arange(len(self.noms), dtype=np.int64)[:, None] * self.pas + relatives[None, :]
+        return np.searchsorted(self.cles, cles, side="left")
+
+    def stats_periodes(self, bornes):
+        """
+        Stats de chaque joueur sur les périodes [bornes[i], bornes[i+1][ :
+        tableau (n_joueurs, len(bornes) - 1, len(COLONNES_STATS)).
+        Une borne None vaut le début (en premier) ou la fin (en dernier) de l'historique.
+        """
+        cumuls = self.cumuls[self._positions(list(bornes))].astype(np.int64)
+        return np.diff(cumuls, axis=1)
+
+    def stats(self, joueurs, debut=None, fin=None):
+        """Stats par joueur (colonnes COLONNES_STATS) sur [debut, fin["""
+        tableau = self.stats_periodes([debut, fin])[:, 0, :]
+        return pd.DataFrame(tableau, index=self._index, columns=COLONNES_STATS).reindex(pd.Index(joueurs).drop_duplicates(), fill_value=0)
+
+    def tableau_mensuel(self, joueurs, colonne="Victoires", debut=None, fin=None):
+        """Tableau joueur x mois (AAAA-MM) de la stat demandée, tous les mois calculés en une passe"""
+        if len(self.cles) == 0:
+            return pd.DataFrame(index=pd.Index(joueurs).drop_duplicates())
+        premier = pd.Timestamp(debut) if debut is not None else pd.Timestamp(np.datetime64(self.origine, "s"))
+        dernier = pd.Timestamp(fin) if fin is not None else pd.Timestamp(np.datetime64(self.origine + self.pas, "s"))
+        mois = pd.period_range(premier, dernier - pd.Timedelta(seconds=1), freq="M")
+        if len(mois) == 0:
+            return pd.DataFrame(index=pd.Index(joueurs).drop_duplicates())
+        bornes = [max(m.start_time, premier) for m in mois] + [min(mois[-1].end_time.ceil("s"), dernier)]
+        tableau = self.stats_periodes(bornes)[:, :, COLONNES_STATS.index(colonne)]
+        tableau = pd.DataFrame(tableau, index=self._index, columns=[str(m) for m in mois])
+        return tableau.reindex(pd.Index(joueurs).drop_duplicates(), fill_value=0)
+
+###########################
+# Doubles                 #
+###########################
+
+COLONNES_EQUIPES = ["vainqueur_1", "vainqueur_2", "adversaire_1", "adversaire_2"]
+
+class MatchsDoubles:
+    """
+    Matchs de double codés en entiers, sur le modèle de MatchsCompacts :
+      - equipes : identifiants int32 (n, 4) dans l'ordre de COLONNES_EQUIPES
+      - sets : int8 (n, 5) au format signé, vu de l'équipe gagnante
+    Une paire est non ordonnée : (A, B) et (B, A) sont la même association.
+    """
+
+    def __init__(self, noms=()):
+        self.codes = MatchsCompacts(noms)     # uniquement pour le codage des noms
+        self.equipes = np.empty((0, len(COLONNES_EQUIPES)), dtype=np.int32)
+        self.sets = np.empty((0, len(COLONNES_SETS)), dtype=np.int8)
+
+    def __len__(self):
+        return len(self.equipes)
+
+    @property
+    def noms(self):
+        return self.codes.noms
+
+    @classmethod
+    def depuis_dataframe(cls, df, noms=()):
+        matchs = cls(noms)
+        if not df.empty and not set(COLONNES_EQUIPES) <= set(df.columns) and df.shape[1] >= len(COLONNES_EQUIPES) + len(COLONNES_SETS):
+            # Sheet créé avant l'en-tête actuel : colonnes lues par position (4 joueurs, 5 sets, date),
+            # l'ordre dans lequel la saisie écrit
+            df = df.set_axis(COLONNES_EQUIPES + COLONNES_SETS + list(df.columns[len(COLONNES_EQUIPES) + len(COLONNES_SETS):]), axis=1)
+        if df.empty or not set(COLONNES_EQUIPES) <= set(df.columns):
+            return matchs
+        # Lignes incomplètes (joueur manquant) ignorées
+        df = df[(df[COLONNES_EQUIPES].astype(str).apply(lambda c: c.str.strip()) != "").all(axis=1)]
+        matchs.equipes = np.column_stack([matchs.codes.coder(df[c].astype(str)) for c in COLONNES_EQUIPES])
+        matchs.sets = decoder_sets(df)
+        return matchs
+
+    def stats_joueurs(self, joueurs):
+        """Stats individuelles (colonnes COLONNES_STATS) : chaque joueur porte le résultat de son équipe"""
+        n = len(self.noms)
+        v1, v2, p1, p2 = self.equipes.T
+        tableau = agreger_codes(v1, p1, self.sets, n) + agreger_codes(v2, p2, self.sets, n)
+        return pd.DataFrame(tableau, index=pd.Index(self.noms, dtype=object), columns=COLONNES_STATS).reindex(pd.Index(joueurs).drop_duplicates(), fill_value=0)
+
+    def stats_paires(self):
+        """
+        Stats par paire non ordonnée, agrégées en une passe groupée sur les codes de paires.
+        Retourne un DataFrame avec Joueur_1, Joueur_2 (ordre des identifiants) puis COLONNES_STATS.
+        """
+        n = max(len(self.noms), 1)
+        v1, v2, p1, p2 = self.equipes.T.astype(np.int64)
+        cle_v = np.minimum(v1, v2) * n + np.maximum(v1, v2)
+        cle_p = np.minimum(p1, p2) * n + np.maximum(p1, p2)
+        cles, codes = np.unique(np.concatenate([cle_v, cle_p]), return_inverse=True)
+        code_v, code_p = codes[:len(cle_v)], codes[len(cle_v):]
+        tableau = agreger_codes(code_v, code_p, self.sets, len(cles))
+        noms = np.asarray(self.noms, dtype=object)
+        paires = pd.DataFrame({"Joueur_1": noms[cles // n], "Joueur_2": noms[cles % n]}) if len(cles) else pd.DataFrame(columns=["Joueur_1", "Joueur_2"])
+        return pd.concat([paires, pd.DataFrame(tableau, columns=COLONNES_STATS)], axis=1)
+
+def partenaires(paires, joueurs):
+    """
+    Meilleur et pire partenaire de chaque joueur d'après les stats par paire :
+    % de victoires, puis différence de sets, puis nombre de matchs joués ensemble.
+    Retourne un DataFrame indexé par joueur (vide pour un joueur sans double).
+    """
+    index = pd.Index(joueurs).drop_duplicates()
+    colonnes = ["Meilleur partenaire", "Bilan meilleur", "Pire partenaire", "Bilan pire"]
+    if paires.empty:
+        return pd.DataFrame("", index=index, columns=colonnes)
+    # Chaque paire vue depuis ses deux joueurs
+    vues = pd.concat([
+        paires.rename(columns={"Joueur_1": "Joueur", "Joueur_2": "Partenaire"}),
+        paires.rename(columns={"Joueur_2": "Joueur", "Joueur_1": "Partenaire"}),
+    ], ignore_index=True)
+    joues = vues["Victoires"] + vues["Défaites"]
+    vues["Taux"] = vues["Victoires"] / joues.where(joues > 0, 1)
+    vues["Joués"] = joues
+    vues["Bilan"] = vues["Victoires"].astype(str) + "V-" + vues["Défaites"].astype(str) + "D"
+    vues = vues.sort_values(["Joueur", "Taux", "Diff_sets", "Joués"], ascending=[True, False, False, False])
+    meilleurs = vues.drop_duplicates("Joueur", keep="first").set_index("Joueur")
+    pires = vues.drop_duplicates("Joueur", keep="last").set_index("Joueur")
+    resultat = pd.DataFrame({
+        "Meilleur partenaire": meilleurs["Partenaire"],
+        "Bilan meilleur": meilleurs["Bilan"],
+        "Pire partenaire": pires["Partenaire"],
+        "Bilan pire": pires["Bilan"],
+    })
+    return resultat.reindex(index, fill_value="")
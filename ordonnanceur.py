@@ -0,0 +1,245 @@
+# ordonnanceur.py
+import random
+import threading
+import time
+from gspread.exceptions import APIError
+from mesures import MESURES
+
+# Erreurs de l'API Sheets qui valent la peine d'être retentées (quota, indisponibilité)
+CODES_A_RETENTER = {429, 500, 502, 503}
+# Seule une erreur de quota garantit que la requête n'a pas été appliquée ; après une erreur
+# serveur, un ajout (non idempotent) n'est renvoyé qu'après avoir vérifié qu'il n'est pas arrivé
+CODES_NON_APPLIQUES = {429}
+
+# Quotas Google Sheets par utilisateur (le compte de service) : 60 lectures et 60 écritures par minute
+LECTURES_PAR_MINUTE_DEFAUT = 60
+ECRITURES_PAR_MINUTE_DEFAUT = 60
+FENETRE_GROUPAGE_DEFAUT = 0.05  # secondes d'attente d'autres écritures avant d'envoyer un lot
+
+class SeauJetons:
+    """
+    Seau à jetons : `par_minute` jetons par minute, au plus `capacite` d'avance
+    (10 secondes de quota par défaut). prendre() bloque jusqu'à ce qu'un jeton soit
+    disponible et retourne le temps d'attente en secondes.
+    """
+
+    def __init__(self, par_minute, capacite=None):
+        self.debit = par_minute / 60
+        self.capacite = capacite or max(1, par_minute // 6)
+        self.jetons = float(self.capacite)
+        self._date = time.monotonic()
+        self._verrou = threading.Lock()
+
+    def prendre(self):
+        attente_totale = 0.0
+        while True:
+            with self._verrou:
+                maintenant = time.monotonic()
+                self.jetons = min(self.capacite, self.jetons + (maintenant - self._date) * self.debit)
+                self._date = maintenant
+                if self.jetons >= 1:
+                    self.jetons -= 1
+                    return attente_totale
+                attente = (1 - self.jetons) / self.debit
+            time.sleep(attente)
+            attente_totale += attente
+
+class _Appel:
+    """Résultat partagé d'une requête fusionnée ou d'un lot d'écritures"""
+
+    def __init__(self):
+        self.fini = threading.Event()
+        self.resultat = None
+        self.erreur = None
+
+    def attendre(self):
+        self.fini.wait()
+        if self.erreur is not None:
+            raise self.erreur
+        return self.resultat
+
+class Ordonnanceur:
+    """
+    Point de passage unique des requêtes vers l'API Sheets pour tout le process :
+      - un seau à jetons pour les lectures et un pour les écritures, réglés sur le quota ;
+      - les lectures identiques simultanées (même clé) partagent une seule requête ;
+      - les écritures arrivées pendant la même fenêtre sont envoyées en un seul lot ;
+      - les erreurs de quota sont retentées avec un délai exponentiel et une part aléatoire.
+    Sans quota (None), les seaux sont désactivés (stockage SQLite).
+    """
+
+    def __init__(self, lectures_par_minute=LECTURES_PAR_MINUTE_DEFAUT, ecritures_par_minute=ECRITURES_PAR_MINUTE_DEFAUT,
+                 tentatives=5, attente=1.0, fenetre_groupage=FENETRE_GROUPAGE_DEFAUT):
+        self.seau_lectures = SeauJetons(lectures_par_minute) if lectures_par_minute else None
+        self.seau_ecritures = SeauJetons(ecritures_par_minute) if ecritures_par_minute else None
+        self.tentatives = tentatives
+        self.attente = attente
+        self.fenetre_groupage = fenetre_groupage
+        self._verrou = threading.Lock()
+        self._lectures = {}     # clé -> _Appel de la lecture en cours
+        self._lots = {}         # clé -> [éléments, _Appel] du lot en préparation
+        self._file = 0          # requêtes en attente d'un jeton, d'une lecture ou d'un lot
+        self._ecritures = 0     # écritures en cours (isolées, ajouts ou lots)
+        self.compteurs = {
+            "requetes": 0,              # appels réellement envoyés à l'API
+            "lectures_fusionnees": 0,   # lectures servies par une requête déjà en cours
+            "ecritures_groupees": 0,    # écritures envoyées dans le lot d'une autre
+            "lots": 0,                  # lots d'écritures envoyés
+            "lots_sans_attente": 0,     # lots envoyés aussitôt (aucune autre écriture en cours)
+            "limitations": 0,           # requêtes retardées par le seau à jetons
+            "attente_limitations_s": 0.0,
+            "reprises": 0,              # erreurs de quota ou serveur retentées
+            "reprises_evitees": 0,      # ajouts arrivés malgré une erreur serveur (pas renvoyés)
+            "echecs": 0,                # erreurs remontées après la dernière tentative
+            "file_max": 0,
+        }
+
+    def _compter(self, nom, valeur=1):
+        with self._verrou:
+            self.compteurs[nom] += valeur
+
+    def _entrer_file(self, delta):
+        with self._verrou:
+            self._file += delta
+            self.compteurs["file_max"] = max(self.compteurs["file_max"], self._file)
+
+    def _executer(self, seau, fonction, args, kwargs, idempotent=True, deja_applique=None):
+        for tentative in range(self.tentatives):
+            if seau is not None:
+                self._entrer_file(1)
+                try:
+                    attendu = seau.prendre()
+                finally:
+                    self._entrer_file(-1)
+                if attendu:
+                    self._compter("limitations")
+                    self._compter("attente_limitations_s", attendu)
+                    MESURES.enregistrer("sheets.attente_quota", attendu)
+            self._compter("requetes")
+            try:
+                with MESURES.mesurer(f"sheets.{getattr(fonction, '__name__', 'appel')}"):
+                    return fonction(*args, **kwargs)
+            except APIError as e:
+                verifier = not idempotent and e.code not in CODES_NON_APPLIQUES
+                if e.code not in CODES_A_RETENTER or tentative == self.tentatives - 1 or (verifier and deja_applique is None):
+                    self._compter("echecs")
+                    raise
+                time.sleep(self.attente * 2 ** tentative + random.uniform(0, self.attente))
+                if verifier and self._executer(self.seau_lectures, deja_applique, (), {}):
+                    self._compter("reprises_evitees")
+                    return None
+                self._compter("reprises")
+
+    def lire(self, cle, fonction, *args, **kwargs):
+        """Lecture ; les appels simultanés avec la même clé attendent le résultat de la première"""
+        with self._verrou:
+            appel = self._lectures.get(cle)
+            meneur = appel is None
+            if meneur:
+                appel = self._lectures[cle] = _Appel()
+            else:
+                self.compteurs["lectures_fusionnees"] += 1
+        if not meneur:
+            self._entrer_file(1)
+            try:
+                return appel.attendre()
+            finally:
+                self._entrer_file(-1)
+        try:
+            appel.resultat = self._executer(self.seau_lectures, fonction, args, kwargs)
+        except Exception as e:
+            appel.erreur = e
+        finally:
+            with self._verrou:
+                self._lectures.pop(cle, None)
+            appel.fini.set()
+        return appel.attendre()
+
+    def _ecriture(self, delta):
+        with self._verrou:
+            self._ecritures += delta
+
+    def ecrire(self, fonction, *args, **kwargs):
+        """Écriture isolée (seau des écritures et reprises)"""
+        self._ecriture(1)
+        try:
+            return self._executer(self.seau_ecritures, fonction, args, kwargs)
+        finally:
+            self._ecriture(-1)
+
+    def ajouter(self, fonction, *args, deja_applique=None, **kwargs):
+        """
+        Écriture non idempotente (append_rows) : une erreur de quota est retentée, une
+        erreur serveur seulement si deja_applique() (lecture, sans argument) dit que
+        l'ajout n'est pas arrivé. Sans deja_applique, l'erreur serveur est remontée.
+        """
+        self._ecriture(1)
+        try:
+            return self._executer(self.seau_ecritures, fonction, args, kwargs, idempotent=False, deja_applique=deja_applique)
+        finally:
+            self._ecriture(-1)
+
+    def grouper(self, cle, element, envoyer):
+        """
+        Écriture groupée : les éléments arrivés pour la même clé pendant la fenêtre de
+        groupage sont passés ensemble, dans l'ordre d'arrivée, à envoyer(éléments),
+        appelée une seule fois par le premier arrivé. Tous reçoivent son résultat.
+        La fenêtre n'est attendue que si d'autres écritures sont en cours (sessions qui
+        écrivent en même temps, seau des écritures vide) : une écriture seule part aussitôt.
+        envoyer passe par ecrire() pour l'appel à l'API.
+        """
+        self._ecriture(1)
+        with self._verrou:
+            lot = self._lots.get(cle)
+            meneur = lot is None
+            if meneur:
+                lot = self._lots[cle] = [[], _Appel()]
+            else:
+                self.compteurs["ecritures_groupees"] += 1
+            lot[0].append(element)
+            self._file += 1
+            self.compteurs["file_max"] = max(self.compteurs["file_max"], self._file)
+        elements, appel = lot
+        try:
+            if meneur:
+                with self._verrou:
+                    attendre = self._ecritures > 1
+                if attendre:
+                    time.sleep(self.fenetre_groupage)
+                else:
+                    self._compter("lots_sans_attente")
+                with self._verrou:
+                    self._lots.pop(cle, None)    # les suivants ouvrent un nouveau lot
+                self._compter("lots")
+                try:
+                    appel.resultat = envoyer(elements)
+                except Exception as e:
+                    appel.erreur = e
+                finally:
+                    appel.fini.set()
+            return appel.attendre()
+        finally:
+            self._entrer_file(-1)
+            self._ecriture(-1)
+
+    def metriques(self):
+        """Compteurs cumulés et état courant (profondeur de file, lectures en cours, jetons)"""
+        with self._verrou:
+            metriques = dict(self.compteurs)
+            metriques["file"] = self._file
+            metriques["lectures_en_cours"] = len(self._lectures)
+            metriques["lots_en_preparation"] = len(self._lots)
+        for nom, seau in (("jetons_lectures", self.seau_lectures), ("jetons_ecritures", self.seau_ecritures)):
+            if seau is not None:
+                metriques[nom] = round(seau.jetons, 1)
+        return metriques
+
+def lignes_en_fin(ws, lignes):
+    """Vrai si le worksheet se termine par `lignes` (vérification d'un append_rows après une erreur serveur)"""
+    def texte(ligne):
+        ligne = ["" if v is None else str(v) for v in ligne]
+        while ligne and ligne[-1] == "":
+            ligne.pop()
+        return ligne
+    valeurs = ws.get_all_values()
+    return len(valeurs) >= len(lignes) and [texte(l) for l in valeurs[len(valeurs) - len(lignes):]] == [texte(l) for l in lignes]
@@ -1,16 +1,19 @@
+import time
 import streamlit as st
-import gspread
 import pandas as pd
-import random
-import itertools
 import sys
 sys.path.append('..')  # Pour importer depuis la racine
-from utils import init_google_sheets
+from utils import init_google_sheets, lire_records, version_feuille, ajouter_ligne, ajouter_lignes, get_resultats_incrementaux, notes_elo, choisir_periode, journaliser, suivre_mises_a_jour, chrono, rapport_demarrage
+from saisie import lire_fichier_import, valider_import, valider_match
+from moteur_stats import tableau_confrontations_compact, tableau_classement, MatchsDoubles, partenaires
+from evenements import resultat
+from mesures import MESURES, mesure, mesurer
 
 #############
 # Affichage #
 #############
 st.set_page_config(page_title="Jeu libre", page_icon="🏆")
+debut_script = time.perf_counter()
 
 #######################
 # Liens et chargement #
@@ -19,97 +22,41 @@ st.set_page_config(page_title="Jeu libre", page_icon="🏆")
 init_google_sheets()
 liste_joueurs_complet = st.session_state.liste_joueurs_complet
 
-# Charger les parties en jeu libre tête-à-tête
-resultats_simp_rows = st.session_state.sheet_resultats_simp.get_all_records()
-resultats_simp_df = pd.DataFrame(resultats_simp_rows)
-
-# Charger les parties en jeu libre tête-à-tête
-resultats_doub_rows = st.session_state.sheet_resultats_doub.get_all_records()
-resultats_doub_df = pd.DataFrame(resultats_doub_rows)
+# Charger les parties en jeu libre tête-à-tête (seules les nouvelles lignes sont téléchargées)
+with chrono("Résultats en simple"):
+    resultats_simp = get_resultats_incrementaux("resultats_simple").synchroniser(st.session_state.sheet_resultats_simp, liste_joueurs_complet)
+rapport_demarrage()
+# Les résultats en double ne sont chargés qu'à l'ouverture du mode double
 
 #############
 # Fonctions #
 #############
 
-def parse_score(value):
-    if value == "" or pd.isna(value):
-        return None
-    try:
-        return int(value)
-    except:
-        return None
-
 # Fonction pour calculer les stats du jeu libre
 ###############################################
-def calculer_stats():
-    stats = {j: {"Victoires": 0, "Défaites": 0, "Sets_gagnés": 0, "Sets_concédés": 0, "Diff_sets": 0, "Points_gagnés": 0, "Points_concédés": 0, "Diff_points": 0, "Bulles_infligées": 0, "Bulles_concédées": 0} for j in liste_joueurs_complet}
-    
-    if not resultats_simp_df.empty:
-        for _, row in resultats_simp_df.iterrows():
-            vainq = row["vainqueur"]
-            perdant = row["adversaire"]
-            # Récupérer les scores des sets
-            sets = [parse_score(row["Set_1"]), parse_score(row["Set_2"]), parse_score(row["Set_3"]), parse_score(row["Set_4"]), parse_score(row["Set_5"])]
-                
-            # Compter les sets remportés par le perdant (ceux avec signe négatif)
-            sets_perdant = sum(1 for s in sets if s is not None and (s < 0 or s == -99))  # -99 = perdant gagne 11-0
-            sets_vainqueur = 3 
-
-            # Calculer les points totaux
-            points_perdant_total = 0
-            points_vainqueur_total = 0
-            bulles_gagnant = 0
-            bulles_perdant = 0
-
-            for score_set in sets:
-                if score_set is None: 
-                    continue
-                    
-                if score_set == -99:
-                    # Perdant gagne 11-0
-                    points_perdant_total += 11
-                    points_vainqueur_total += 0
-                    bulles_perdant += 1
-                elif score_set < 0:
-                    # Set remporté par le perdant du match (11-X)
-                    points_perdant_total += 11
-                    points_vainqueur_total += abs(score_set)
-                elif score_set == 0:
-                    # Set remporté par le vainqueur du match (11-0)
-                    points_vainqueur_total += 11
-                    points_perdant_total += score_set
-                    bulles_gagnant += 1
-                else: 
-                    # Set remporté par le vainqueur du match (11-X)
-                    points_vainqueur_total += 11
-                    points_perdant_total += score_set
-
-            if vainq in stats:
-                stats[vainq]["Victoires"] += 1
-                stats[vainq]["Sets_gagnés"] += sets_vainqueur
-                stats[vainq]["Sets_concédés"] += sets_perdant
-                stats[vainq]["Points_gagnés"] += points_vainqueur_total
-                stats[vainq]["Points_concédés"] += points_perdant_total
-                stats[vainq]["Bulles_infligées"] += bulles_gagnant
-                stats[vainq]["Bulles_concédées"] += bulles_perdant
-                
-            if perdant in stats:
-                stats[perdant]["Défaites"] += 1
-                stats[perdant]["Sets_gagnés"] += sets_perdant
-                stats[perdant]["Sets_concédés"] += sets_vainqueur
-                stats[perdant]["Points_gagnés"] += points_perdant_total
-                stats[perdant]["Points_concédés"] += points_vainqueur_total
-                stats[perdant]["Bulles_infligées"] += bulles_perdant
-                stats[perdant]["Bulles_concédées"] += bulles_gagnant
-    
-    for j in stats:
-        stats[j]["Diff_sets"] = stats[j]["Sets_gagnés"] - stats[j]["Sets_concédés"]
-        stats[j]["Diff_points"] = stats[j]["Points_gagnés"] - stats[j]["Points_concédés"]
-    
-    return stats
+@mesure("calcul.calculer_stats")
+def calculer_stats(debut=None, fin=None):
+    # Agrégats tenus à jour à chaque synchronisation : il ne reste qu'à sélectionner les joueurs
+    if debut is None and fin is None:
+        return resultats_simp.stats_joueurs(liste_joueurs_complet)
+    # Période : deux recherches dans l'index des dates, sans refiltrer les matchs
+    return resultats_simp.index_dates.stats(liste_joueurs_complet, debut, fin)
+
+# Tableau des confrontations, recalculé seulement quand un résultat est ajouté
+@st.cache_data(max_entries=8)
+def confrontations_en_cache(_matchs, joueurs, mesure, version):
+    with mesurer("calcul.confrontations"):
+        return tableau_confrontations_compact(_matchs, list(joueurs), mesure)
+
+# Stats des doubles (par joueur et par paire), recalculées seulement quand un résultat est ajouté
+@st.cache_data(max_entries=4)
+def stats_doubles_en_cache(_records, joueurs, version):
+    with mesurer("calcul.stats_doubles"):
+        matchs = MatchsDoubles.depuis_dataframe(pd.DataFrame(_records), list(joueurs))
+        return matchs.stats_joueurs(list(joueurs)), matchs.stats_paires()
 
 # Tableau complet avec mise en surbrillance du joueur sélectionné
-def highlight_joueur(row):
+def highlight_joueur(row, joueur):
     if row.name == joueur:
         return ['background-color: #90EE90; font-weight: bold'] * len(row)  # vert
     return [''] * len(row)
@@ -129,12 +76,17 @@ st.divider()
 # Mode Jeu libre #
 ##################
 if mode == "👤 Simple": 
-    tabs = st.tabs(["➕ Saisie résultat", "📊 Statistiques"])
+    # Seul l'onglet affiché est calculé ; chaque onglet est un fragment
+    # (un widget ne réexécute que l'onglet auquel il appartient)
+    ONGLETS = ["➕ Saisie résultat", "📥 Import", "📊 Statistiques", "🤝 Confrontations"]
+    onglet = st.radio("Onglet", ONGLETS, horizontal=True, key="onglet_simple", label_visibility="collapsed")
     
     # --------------------- #
     # --- Onglet Saisie --- # 
     # --------------------- #
-    with tabs[0]:
+    @st.fragment
+    @mesure("fragment.jeu_libre.saisie")
+    def onglet_saisie():
         # Saisie simplifiée sans lien avec le tournoi
         st.header("Saisie d'un résultat libre en simple")
 
@@ -143,238 +95,109 @@ if mode == "👤 Simple":
         j2 = st.selectbox("Joueur 2", options=[j for j in liste_joueurs_complet if j != j1], key="j2")
 
         with st.form("saisie_resultat_open"):
-            # Vainqueur dépend des joueurs choisis
-            vainqueur = st.radio("Qui a gagné ?", [j1, j2])
-            if vainqueur == j1:
-                perdant = j2 
-            else: 
-                perdant = j1
-            
-            # Règles de gestion de la saisie des scores
-            col0, col1, col2, col3, col4, col5 = st.columns(6)
-
-            with col0:
+            colonnes = st.columns(6)
+            with colonnes[0]:
                 st.write("")
                 st.write("")
                 st.write(f"**{j1}**")
                 st.write("")
                 st.write(f"**{j2}**")
-                    
-            with col1: 
-                st.write("**Set 1**")
-                score_j1_s1 = st.number_input("", min_value=0, max_value=99, value=0, key="j1_s1", label_visibility="collapsed")
-                score_j2_s1 = st.number_input("", min_value=0, max_value=99, value=0, key="j2_s1", label_visibility="collapsed")
-                    
-            with col2: 
-                st.write("**Set 2**")
-                score_j1_s2 = st.number_input("", min_value=0, max_value=99, value=0, key="j1_s2", label_visibility="collapsed")
-                score_j2_s2 = st.number_input("", min_value=0, max_value=99, value=0, key="j2_s2", label_visibility="collapsed")
-
-            with col3: 
-                st.write("**Set 3**")
-                score_j1_s3 = st.number_input("", min_value=0, max_value=99, value=0, key="j1_s3", label_visibility="collapsed")
-                score_j2_s3 = st.number_input("", min_value=0, max_value=99, value=0, key="j2_s3", label_visibility="collapsed")
-
-            with col4: 
-                st.write("**Set 4**")
-                score_j1_s4 = st.number_input("", min_value=0, max_value=99, value=0, key="j1_s4", label_visibility="collapsed")
-                score_j2_s4 = st.number_input("", min_value=0, max_value=99, value=0, key="j2_s4", label_visibility="collapsed")
-
-            with col5: 
-                st.write("**Set 5**")
-                score_j1_s5 = st.number_input("", min_value=0, max_value=99, value=0, key="j1_s5", label_visibility="collapsed")
-                score_j2_s5 = st.number_input("", min_value=0, max_value=99, value=0, key="j2_s5", label_visibility="collapsed")
-
-                date = pd.to_datetime('now').strftime("%Y-%m-%d %H:%M:%S")
+            scores_j1, scores_j2 = [], []
+            for i, col in enumerate(colonnes[1:], start=1):
+                with col:
+                    st.write(f"**Set {i}**")
+                    scores_j1.append(st.number_input("", min_value=0, max_value=99, value=0, key=f"j1_s{i}", label_visibility="collapsed"))
+                    scores_j2.append(st.number_input("", min_value=0, max_value=99, value=0, key=f"j2_s{i}", label_visibility="collapsed"))
 
             submitted = st.form_submit_button("✅ Enregistrer", use_container_width=True)
 
             if submitted:
-                # Calculer les sets gagnés par chaque joueur
-                sets_j1 = 0
-                sets_j2 = 0
-
-                # 1er set
-                if (score_j1_s1 >= 11) and (score_j1_s1 >= score_j2_s1 + 2):
-                    sets_j1 += 1
-                elif (score_j2_s1 >= 11) and (score_j2_s1 >= score_j1_s1 + 2):
-                    sets_j2 += 1
-                else:
-                    st.error("❌ Score du 1er set invalide")
+                try:
+                    gagnant, sets_v, sets_p, sets = valider_match(scores_j1, scores_j2)
+                except ValueError as e:
+                    st.error(f"❌ {e}")
                     st.stop()
 
-                # 2eme set
-                if (score_j1_s2 >= 11) and (score_j1_s2 >= score_j2_s2 + 2):
-                    sets_j1 += 1
-                elif (score_j2_s2 >= 11) and (score_j2_s2 >= score_j1_s2 + 2):
-                    sets_j2 += 1
-                else:
-                    st.error("❌ Score du 2ème set invalide")
-                    st.stop()
-                # 3eme set
-                if (score_j1_s3 >= 11) and (score_j1_s3 >= score_j2_s3 + 2):
-                    sets_j1 += 1
-                elif (score_j2_s3 >= 11) and (score_j2_s3 >= score_j1_s3 + 2):
-                    sets_j2 += 1
-                else:
-                    st.error("❌ Score du 3ème set invalide")
-                    st.stop()
+                vainqueur, perdant = (j1, j2) if gagnant == 1 else (j2, j1)
+                st.success(f"🏆 **{vainqueur}** remporte le match {sets_v}-{sets_p}")
+                joues = sets_v + sets_p
+                st.info("Détail : " + ", ".join(f"{a}-{b}" for a, b in zip(scores_j1[:joues], scores_j2[:joues])))
 
-                if sets_j1 != 3 and sets_j2 != 3:
-                    # 4eme set
-                    if (score_j1_s4 >= 11) and (score_j1_s4 >= score_j2_s4 + 2):
-                        sets_j1 += 1
-                    elif (score_j2_s4 >= 11) and (score_j2_s4 >= score_j1_s4 + 2):
-                        sets_j2 += 1
-                    elif sets_j1 < 3 and sets_j2 < 3:
-                        st.error("❌ Score du 4ème set invalide")
-                        st.stop()
-
-                    if sets_j1 != 3 and sets_j2 != 3:
-                        # 5eme set
-                        if (score_j1_s5 >= 11) and (score_j1_s5 >= score_j2_s5 + 2):
-                            sets_j1 += 1
-                        elif (score_j2_s5 >= 11) and (score_j2_s5 >= score_j1_s5 + 2):
-                            sets_j2 += 1
-                        elif sets_j1 < 3 and sets_j2 < 3:
-                            st.error("❌ Score du 5ème set invalide")
-                            st.stop()
-
-                score_set_1, score_set_2, score_set_3, score_set_4, score_set_5 = 0, 0, 0, "", ""
-
-                # Déterminer le vainqueur
-                if sets_j1 > sets_j2:
-                    vainqueur = j1
-                    perdant = j2
-                    score_vainqueur = sets_j1
-                    score_perdant = sets_j2
-
-                    # 1er set
-                    if score_j1_s1 > score_j2_s1:
-                        score_set_1 = score_j2_s1
-                    else:
-                        score_set_1 = -score_j1_s1
-
-                    # 2ème set
-                    if score_j1_s2 > score_j2_s2:
-                        score_set_2 = score_j2_s2
-                    else:
-                        score_set_2 = -score_j1_s2
-
-                    # 3ème set
-                    if score_j1_s3 > score_j2_s3:
-                        score_set_3 = score_j2_s3
-                    else:
-                        score_set_3 = -score_j1_s3
-
-                    if score_perdant > 0:
-                        # 4ème set
-                        if score_j1_s4 > score_j2_s4:
-                            score_set_4 = score_j2_s4
-                        else:
-                            score_set_4 = -score_j1_s4
-
-                        if score_perdant > 1:
-                            # 5ème set
-                            if score_j1_s5 > score_j2_s5:
-                                score_set_5 = score_j2_s5
-                            else:
-                                st.error("❌ Impossible que le vainqueur perde le 5ème set. Vérifier les scores saisis.")
-                                st.stop()
-
-                elif sets_j2 > sets_j1:
-                    vainqueur = j2
-                    perdant = j1
-                    score_vainqueur = sets_j2
-                    score_perdant = sets_j1
-
-                    # 1er set
-                    if score_j1_s1 < score_j2_s1:
-                        score_set_1 = score_j1_s1
-                    else:
-                        score_set_1 = -score_j2_s1
-
-                    # 2ème set
-                    if score_j1_s2 < score_j2_s2:
-                        score_set_2 = score_j1_s2
-                    else:
-                        score_set_2 = -score_j2_s2
-
-                    # 3ème set
-                    if score_j1_s3 < score_j2_s3:
-                        score_set_3 = score_j1_s3
-                    else:
-                        score_set_3 = -score_j2_s3
-
-                    if score_perdant > 0:
-                        # 4ème set
-                        if score_j1_s4 < score_j2_s4:
-                            score_set_4 = score_j1_s4
-                        else:
-                            score_set_4 = -score_j2_s4
-
-                        if score_perdant > 1:
-                            # 5ème set
-                            if score_j1_s5 < score_j2_s5:
-                                score_set_5 = score_j1_s5
-                            else:
-                                st.error("❌ Impossible que le vainqueur perde le 5ème set. Vérifier les scores saisis.")
-                                st.stop()
-
-                        if score_perdant > 2:
-                            st.error("❌ Erreur de score_perdant. Vérifier les scores saisis.")
-                            st.stop()
-                else:
-                    st.error("❌ Erreur : égalité de sets. Vérifier les scores saisis.")
-                    st.stop()
-                
-                # Vérification : au moins 3 sets gagnés (meilleur des 5)
-                if score_vainqueur < 3:
-                    st.error("❌ Le vainqueur doit avoir gagné au moins 3 sets (meilleur des 5)")
-                    st.stop()
-                
-                # Afficher le résumé
-                st.success(f"🏆 **{vainqueur}** remporte le match {score_vainqueur}-{score_perdant}")
-                
-                # Construire le détail des scores
-                detail_scores = f"{score_j1_s1}-{score_j2_s1}, {score_j1_s2}-{score_j2_s2}, {score_j1_s3}-{score_j2_s3}"
-                if score_j1_s4 > 0 or score_j2_s4 > 0:
-                    detail_scores += f", {score_j1_s4}-{score_j2_s4}"
-                if score_j1_s5 > 0 or score_j2_s5 > 0:
-                    detail_scores += f", {score_j1_s5}-{score_j2_s5}"
-                
-                st.info(f"Détail : {detail_scores}")
-
-                # Ajouter aussi dans les résultats généraux
-                perdant = j2 if vainqueur == j1 else j1
-                st.session_state.sheet_resultats_simp.append_row([vainqueur, perdant, score_set_1, score_set_2, score_set_3, score_set_4, score_set_5, date])
+                date = pd.to_datetime('now').strftime("%Y-%m-%d %H:%M:%S")
+                ajouter_ligne(st.session_state.sheet_resultats_simp, [vainqueur, perdant] + sets + [date])
+                # Le classement est mis à jour ici, par la session qui écrit : les autres n'ont qu'à l'afficher
+                resultats_simp.synchroniser(st.session_state.sheet_resultats_simp, liste_joueurs_complet)
+                journaliser(resultat("simple", vainqueur, perdant, sets, date))
                 st.success("✅ Résultat enregistré !")
                 st.rerun()
 
+    # --------------------- #
+    # --- Onglet Import --- #
+    # --------------------- #
+    @st.fragment
+    @mesure("fragment.jeu_libre.import")
+    def onglet_import():
+        st.header("Import de résultats en masse")
+        st.write("Fichier CSV ou Excel avec une ligne par match et les colonnes `joueur_1`, `joueur_2`, `set_1` à `set_5` "
+                 "(scores vus du joueur_1, par ex. `11-7`, vide si le set n'est pas joué) et éventuellement `date`.")
+
+        fichier = st.file_uploader("Fichier de résultats", type=["csv", "xlsx"], key="fichier_import")
+
+        if fichier is not None:
+            try:
+                import_df = lire_fichier_import(fichier, fichier.name)
+                date_import = pd.to_datetime('now').strftime("%Y-%m-%d %H:%M:%S")
+                lignes_valides, erreurs_import = valider_import(import_df, liste_joueurs_complet, date_import)
+            except (ValueError, ImportError) as e:
+                st.error(f"❌ Fichier illisible : {e}")
+                st.stop()
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Matchs valides", len(lignes_valides))
+            with col2:
+                st.metric("Lignes en erreur", len(erreurs_import))
+
+            if not erreurs_import.empty:
+                st.warning("⚠️ Les lignes suivantes ne seront pas enregistrées :")
+                st.dataframe(erreurs_import, use_container_width=True, hide_index=True)
+
+            if lignes_valides:
+                if st.button(f"✅ Enregistrer les {len(lignes_valides)} matchs valides", use_container_width=True, key="btn_import"):
+                    # Tous les matchs valides en une seule écriture (reprises gérées par l'ordonnanceur)
+                    ajouter_lignes(st.session_state.sheet_resultats_simp, lignes_valides)
+                    resultats_simp.synchroniser(st.session_state.sheet_resultats_simp, liste_joueurs_complet)
+                    journaliser(*[resultat("simple", l[0], l[1], l[2:7], l[7]) for l in lignes_valides])
+                    st.success(f"✅ {len(lignes_valides)} résultats enregistrés !")
+                    st.rerun()
+
     # -------------------- #
     # --- Onglet stats --- #
     # -------------------- #
-    with tabs[1]:
+    @st.fragment
+    @mesure("fragment.jeu_libre.statistiques")
+    def onglet_statistiques():
         # Statistiques globales tous joueurs
         st.header("Choisissez un joueur pour afficher ses stats et le mettre en surbrillance dans le tableau")
-        # Classement basé sur tous les résultats
-        stats = calculer_stats()
+        # Classement basé sur les résultats de la période choisie
+        debut_periode, fin_periode = choisir_periode("periode_stats")
 
         # Sélection d'un joueur à afficher
         joueur = st.selectbox("Choix du joueur", options=liste_joueurs_complet, key="joueur")
+        variante_elo = st.radio("Classement Elo (tout l'historique)", ["classique", "marge"], horizontal=True, key="variante_elo",
+                                format_func=lambda v: "Classique" if v == "classique" else "Pondéré par l'écart (sets et points)")
 
-        # Mise en forme des stats
-        stats_tab = pd.DataFrame(stats).T
-        
-        # Calcul de stats additionnelles
-        stats_tab["Parties jouées"] = stats_tab["Victoires"] + stats_tab["Défaites"]
-        stats_tab["%_Victoires"] = ((stats_tab["Victoires"] / stats_tab["Parties jouées"]) * 100).fillna(0).replace([float('inf'), -float('inf')], 0).round(0).astype(int).astype(str) + "%"
-        stats_tab = stats_tab.sort_values(by=["Victoires", "Diff_sets", "Diff_points"], ascending=[False, False, False])
-        stats_tab = stats_tab[["Parties jouées", "Victoires", "Défaites", "%_Victoires", "Sets_gagnés", "Sets_concédés", "Diff_sets", "Points_gagnés", "Points_concédés", "Diff_points", "Bulles_infligées", "Bulles_concédées"]]
-        stats_tab.columns = ["Joués", "Victoires", "Défaites", "% Vict", "Sets Gagnés", "Sets Perdus", "Diff_sets", "Points Gagnés", "Points Perdus", "Diff_points", "Bulles_infligées", "Bulles_concédées"]
+        # Tout l'historique : classement matérialisé à l'écriture, rien à calculer ici
+        if debut_periode is None and fin_periode is None:
+            stats_tab = resultats_simp.classement.copy()
+        else:
+            stats_tab = tableau_classement(calculer_stats(debut_periode, fin_periode))
+        stats_tab.insert(0, "Elo", notes_elo(st.session_state.sheet_resultats_simp, stats_tab.index, variante_elo)["Elo"])
 
         # Afficher sous forme de métriques plutôt qu'un tableau
-        col1, col2, col3, col4, col5 = st.columns(5)
+        col0, col1, col2, col3, col4, col5 = st.columns(6)
+        with col0:
+            st.metric("Elo", stats_tab.loc[joueur, "Elo"])
         with col1:
             st.metric("Parties jouées", stats_tab.loc[joueur, "Joués"])
         with col2:
@@ -389,14 +212,180 @@ if mode == "👤 Simple":
         st.divider()
 
         # Affichage du tableau complet
-        stats_tab_styled = stats_tab.style.apply(highlight_joueur, axis=1)
-        st.dataframe(stats_tab_styled, use_container_width=True)
+        # La mise en forme (Styler) est calculée par st.dataframe : mesurée avec l'affichage
+        with mesurer("rendu.tableau_stats"):
+            stats_tab_styled = stats_tab.style.apply(highlight_joueur, joueur=joueur, axis=1)
+            st.dataframe(stats_tab_styled, use_container_width=True)
+
+        # Tableau mensuel (tous les mois en une passe sur l'index des dates)
+        with st.expander("📅 Tableau par mois"):
+            colonne_mois = st.selectbox("Statistique", ["Victoires", "Défaites", "Diff_sets", "Diff_points", "Bulles_infligées"], key="stat_mensuelle")
+            with mesurer("calcul.tableau_mensuel"):
+                mensuel = resultats_simp.index_dates.tableau_mensuel(liste_joueurs_complet, colonne_mois, debut_periode, fin_periode)
+            with mesurer("rendu.tableau_mensuel"):
+                st.dataframe(mensuel.style.apply(highlight_joueur, joueur=joueur, axis=1), use_container_width=True)
+
+    # ----------------------------- #
+    # --- Onglet Confrontations --- #
+    # ----------------------------- #
+    @st.fragment
+    @mesure("fragment.jeu_libre.confrontations")
+    def onglet_confrontations():
+        st.header("Tableau des confrontations")
+        st.write("Lecture : bilan du joueur en ligne face au joueur en colonne")
+
+        mesure = st.radio("Afficher", ["Victoires", "Sets", "Points"], horizontal=True, key="mesure_confrontations")
+        version = (resultats_simp.generation, resultats_simp.nb_lignes)
+        recap = confrontations_en_cache(resultats_simp.matchs, tuple(liste_joueurs_complet), mesure, version)
+        with mesurer("rendu.confrontations"):
+            st.dataframe(recap, use_container_width=True)
+
+    # -------------------------- #
+    # --- Onglet sélectionné --- #
+    # -------------------------- #
+    affichage_onglet = {
+        "➕ Saisie résultat": onglet_saisie,
+        "📥 Import": onglet_import,
+        "📊 Statistiques": onglet_statistiques,
+        "🤝 Confrontations": onglet_confrontations,
+    }
+    affichage_onglet[onglet]()
+    # Onglets d'affichage : redessinés d'eux-mêmes quand le rafraîchisseur apporte des changements
+    if onglet in ("📊 Statistiques", "🤝 Confrontations"):
+        suivre_mises_a_jour(st.session_state.sheet_resultats_simp)
+
+else:
+    # Charger les parties en jeu libre en double
+    with chrono("Résultats en double"):
+        resultats_doub_rows = lire_records(st.session_state.sheet_resultats_doub)
+        version_doub = version_feuille(st.session_state.sheet_resultats_doub)
+
+    ONGLETS_DOUBLE = ["➕ Saisie résultat", "📊 Statistiques", "🤝 Paires"]
+    onglet = st.radio("Onglet", ONGLETS_DOUBLE, horizontal=True, key="onglet_double", label_visibility="collapsed")
+
+    # --------------------- #
+    # --- Onglet Saisie --- #
+    # --------------------- #
+    @st.fragment
+    @mesure("fragment.jeu_libre.saisie_double")
+    def onglet_saisie_double():
+        st.header("Saisie d'un résultat libre en double")
+
+        col_a, col_b = st.columns(2)
+        with col_a:
+            st.write("**Équipe A**")
+            a1 = st.selectbox("Joueur A1", options=liste_joueurs_complet, key="d_a1")
+            a2 = st.selectbox("Joueur A2", options=[j for j in liste_joueurs_complet if j != a1], key="d_a2")
+        with col_b:
+            st.write("**Équipe B**")
+            restants = [j for j in liste_joueurs_complet if j not in (a1, a2)]
+            b1 = st.selectbox("Joueur B1", options=restants, key="d_b1")
+            b2 = st.selectbox("Joueur B2", options=[j for j in restants if j != b1], key="d_b2")
+
+        if None in (a1, a2, b1, b2):
+            st.info("Il faut au moins 4 joueurs pour saisir un double")
+            return
+
+        with st.form("saisie_resultat_double"):
+            colonnes = st.columns(6)
+            with colonnes[0]:
+                st.write("")
+                st.write("")
+                st.write(f"**{a1.split()[0]} / {a2.split()[0]}**")
+                st.write("")
+                st.write(f"**{b1.split()[0]} / {b2.split()[0]}**")
+            scores_a, scores_b = [], []
+            for i, col in enumerate(colonnes[1:], start=1):
+                with col:
+                    st.write(f"**Set {i}**")
+                    scores_a.append(st.number_input("", min_value=0, max_value=99, value=0, key=f"da_s{i}", label_visibility="collapsed"))
+                    scores_b.append(st.number_input("", min_value=0, max_value=99, value=0, key=f"db_s{i}", label_visibility="collapsed"))
+
+            submitted = st.form_submit_button("✅ Enregistrer", use_container_width=True)
+
+            if submitted:
+                try:
+                    gagnante, sets_v, sets_p, sets = valider_match(scores_a, scores_b)
+                except ValueError as e:
+                    st.error(f"❌ {e}")
+                    st.stop()
+
+                vainqueurs, perdants = ((a1, a2), (b1, b2)) if gagnante == 1 else ((b1, b2), (a1, a2))
+                st.success(f"🏆 **{vainqueurs[0]} / {vainqueurs[1]}** remportent le match {sets_v}-{sets_p}")
+
+                date = pd.to_datetime('now').strftime("%Y-%m-%d %H:%M:%S")
+                ajouter_ligne(st.session_state.sheet_resultats_doub, list(vainqueurs) + list(perdants) + sets + [date])
+                journaliser(resultat("double", vainqueurs, perdants, sets, date))
+                st.success("✅ Résultat enregistré !")
+                st.rerun()
+
+    # -------------------- #
+    # --- Onglet stats --- #
+    # -------------------- #
+    @st.fragment
+    @mesure("fragment.jeu_libre.statistiques_double")
+    def onglet_statistiques_double():
+        st.header("Statistiques individuelles en double")
+        stats_doub, paires = stats_doubles_en_cache(resultats_doub_rows, tuple(liste_joueurs_complet), version_doub)
+
+        joueur = st.selectbox("Choix du joueur", options=liste_joueurs_complet, key="joueur_double")
 
-else: 
-    tabs = st.tabs(["➕ Saisie résultat", "📊 Statistiques"])
-    st.image("images/WIP2.jpg", use_container_width=True) 
-    st.header("Je finis de peaufiner la partie simple et je ferai ensuite les doubles 😉")
+        stats_tab = tableau_classement(stats_doub)
+        stats_tab = stats_tab.join(partenaires(paires, stats_tab.index))
+        stats_tab = stats_tab[["Joués", "Victoires", "Défaites", "% Vict", "Diff_sets", "Diff_points", "Bulles_infligées", "Bulles_concédées", "Meilleur partenaire", "Bilan meilleur", "Pire partenaire", "Bilan pire"]]
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Parties jouées", stats_tab.loc[joueur, "Joués"])
+        with col2:
+            st.metric("Victoires", stats_tab.loc[joueur, "Victoires"])
+        with col3:
+            st.metric("Meilleur partenaire", stats_tab.loc[joueur, "Meilleur partenaire"] or "-")
+        with col4:
+            st.metric("Pire partenaire", stats_tab.loc[joueur, "Pire partenaire"] or "-")
+
+        st.divider()
+
+        with mesurer("rendu.tableau_stats_double"):
+            st.dataframe(stats_tab.style.apply(highlight_joueur, joueur=joueur, axis=1), use_container_width=True)
 
     # --------------------- #
-    # --- Onglet Saisie --- # 
-    # --------------------- #
\ No newline at end of file
+    # --- Onglet paires --- #
+    # --------------------- #
+    @st.fragment
+    @mesure("fragment.jeu_libre.paires")
+    def onglet_paires():
+        st.header("Statistiques par paire")
+        _, paires = stats_doubles_en_cache(resultats_doub_rows, tuple(liste_joueurs_complet), version_doub)
+
+        if paires.empty:
+            st.info("Aucun double enregistré pour le moment")
+            return
+
+        joueur = st.selectbox("Filtrer sur un joueur", options=["Tous"] + liste_joueurs_complet, key="joueur_paires")
+        tableau = paires.copy()
+        if joueur != "Tous":
+            tableau = tableau[(tableau["Joueur_1"] == joueur) | (tableau["Joueur_2"] == joueur)]
+        tableau.insert(0, "Paire", tableau["Joueur_1"] + " / " + tableau["Joueur_2"])
+        tableau["Joués"] = tableau["Victoires"] + tableau["Défaites"]
+        tableau["% Vict"] = (tableau["Victoires"] / tableau["Joués"] * 100).round(0).astype(int).astype(str) + "%"
+        tableau = tableau.sort_values(by=["Victoires", "Diff_sets", "Diff_points"], ascending=[False, False, False])
+        tableau = tableau[["Paire", "Joués", "Victoires", "Défaites", "% Vict", "Sets_gagnés", "Sets_concédés", "Diff_sets", "Points_gagnés", "Points_concédés", "Diff_points", "Bulles_infligées", "Bulles_concédées"]]
+        with mesurer("rendu.tableau_paires"):
+            st.dataframe(tableau.set_index("Paire"), use_container_width=True)
+
+    # -------------------------- #
+    # --- Onglet sélectionné --- #
+    # -------------------------- #
+    affichage_onglet = {
+        "➕ Saisie résultat": onglet_saisie_double,
+        "📊 Statistiques": onglet_statistiques_double,
+        "🤝 Paires": onglet_paires,
+    }
+    affichage_onglet[onglet]()
+    # Onglets d'affichage : redessinés d'eux-mêmes quand le rafraîchisseur apporte des changements
+    if onglet in ("📊 Statistiques", "🤝 Paires"):
+        suivre_mises_a_jour(st.session_state.sheet_resultats_doub)
+
+# Durée de l'exécution complète de la page (les réexécutions de fragments sont mesurées à part)
+MESURES.enregistrer("script.jeu_libre", time.perf_counter() - debut_script)
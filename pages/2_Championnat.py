@@ -1,16 +1,24 @@
+import time
 import streamlit as st
-import gspread
 import pandas as pd
-import random
-import itertools
 import sys
 sys.path.append('..')  # Pour importer depuis la racine
-from utils import init_google_sheets
+from gspread.exceptions import GSpreadException
+from utils import init_google_sheets, lire_valeurs, lire_records, version_feuille, ecrire_bloc, ajouter_lignes, mettre_a_jour, effacer, get_index_championnat, appariement_suisse, classement_championnat, choisir_periode, debut_saison, est_admin, journaliser, suivre_mises_a_jour, chrono, rapport_demarrage
+from calendrier import planifier
+from championnat import stats_championnat, calculer_classement, generer_appariements_aleatoires, ajouter_points, index_dates_championnat, EXEMPT
+from suisse import AppariementSuisse, PREFIXE_RONDE
+from moteur_stats import tableau_confrontations
+from saisie import valider_match
+from evenements import evenement, resultat, match_programme, id_match_championnat, SAISON_CLOTUREE
+from saisons import nom_saison, lignes_archive, lire_archive, lignes_resume, stats_toutes_saisons
+from mesures import MESURES, mesure, mesurer
 
 #############
 # Affichage #
 #############
 st.set_page_config(page_title="Championnat du Lundi", page_icon="🏆")
+debut_script = time.perf_counter()
 #st.image("images/img_tournoi.png", use_container_width=True) # A modifier #################
 st.write("# Championnat interne du club de tennis de table de Vaux-sur-Seine")
 
@@ -22,14 +30,17 @@ init_google_sheets()
 liste_joueurs_complet = st.session_state.liste_joueurs_complet
 
 # Charger les matchs du championnat tête-à-tête
-championnat_rows = st.session_state.sheet_championnat.get_all_records()
-championnat_df = pd.DataFrame(championnat_rows)
+with chrono("Matchs du championnat"):
+    championnat_rows = lire_records(st.session_state.sheet_championnat)
+    championnat_df = pd.DataFrame(championnat_rows)
+    version_championnat = version_feuille(st.session_state.sheet_championnat)
+rapport_demarrage()
 
 joueurs_championnat = []
 if not championnat_df.empty:
     j1_list = championnat_df["joueur_1"].unique().tolist()
     j2_list = championnat_df["joueur_2"].unique().tolist()
-    joueurs_championnat = list(set(j1_list + j2_list))
+    joueurs_championnat = [j for j in set(j1_list + j2_list) if j != EXEMPT]
     liste_joueurs = joueurs_championnat
 else:
     liste_joueurs = liste_joueurs_complet
@@ -38,123 +49,35 @@ else:
 # Fonctions #
 #############
 
-def parse_score(value):
-    if value == "" or pd.isna(value):
-        return None
-    try:
-        return int(value)
-    except:
-        return None
-
 # Fonction pour calculer les stats du championnat actuel
 ########################################################
-def calculer_stats_championnat():
-
-    points_victoire = 2     #2 points pour une victoire
-    points_défaite = 1      #1 point pour un défaite - récompense la participation 
-    stats_championnat = {j: {"Points": 0, "Victoires": 0, "Défaites": 0, "Sets_gagnés": 0, "Sets_concédés": 0, "Diff_sets": 0, "Points_gagnés": 0, "Points_concédés": 0, "Diff_points": 0, "Bulles_infligées": 0, "Bulles_concédées": 0} for j in liste_joueurs}
-    
-    if not championnat_df.empty:
-        for _, row in championnat_df.iterrows():
-            if row["statut"] == "terminé":
-                vainq = row["vainqueur"]
-                perdant = row["adversaire"]
-
-                # Récupérer les scores des sets
-                sets = [parse_score(row["Set_1"]), parse_score(row["Set_2"]), parse_score(row["Set_3"]), parse_score(row["Set_4"]), parse_score(row["Set_5"])]
-                
-                # Compter les sets remportés par le perdant (ceux avec signe négatif)
-                sets_perdant = sum(1 for s in sets if s is not None and (s < 0 or s == -99))  # -99 = perdant gagne 11-0
-                sets_vainqueur = 3  # Toujours 3 pour le vainqueur
-
-                # Calculer les points totaux
-                points_perdant_total = 0
-                points_vainqueur_total = 0
-                bulles_gagnant = 0
-                bulles_perdant = 0
-
-                for score_set in sets:
-                    if score_set is None:  # Set non joué
-                        continue
-                    
-                    if score_set == -99:
-                        # Perdant gagne 11-0
-                        points_perdant_total += 11
-                        points_vainqueur_total += 0
-                        bulles_perdant += 1
-                    elif score_set < 0:
-                        # Set remporté par le perdant du match (11-X)
-                        points_perdant_total += 11
-                        points_vainqueur_total += abs(score_set)
-                    elif score_set == 0:
-                        # Set remporté par le vainqueur du match (11-0)
-                        points_vainqueur_total += 11
-                        points_perdant_total += score_set
-                        bulles_gagnant += 1
-                    else: 
-                        # Set remporté par le vainqueur du match (11-X)
-                        points_vainqueur_total += 11
-                        points_perdant_total += score_set
-
-                if vainq in stats_championnat:
-                    stats_championnat[vainq]["Victoires"] += 1
-                    stats_championnat[vainq]["Sets_gagnés"] += sets_vainqueur
-                    stats_championnat[vainq]["Sets_concédés"] += sets_perdant
-                    stats_championnat[vainq]["Points_gagnés"] += points_vainqueur_total
-                    stats_championnat[vainq]["Points_concédés"] += points_perdant_total
-                    stats_championnat[vainq]["Bulles_infligées"] += bulles_gagnant
-                    stats_championnat[vainq]["Bulles_concédées"] += bulles_perdant
-                
-                if perdant in stats_championnat:
-                    stats_championnat[perdant]["Défaites"] += 1
-                    stats_championnat[perdant]["Sets_gagnés"] += sets_perdant
-                    stats_championnat[perdant]["Sets_concédés"] += sets_vainqueur
-                    stats_championnat[perdant]["Points_gagnés"] += points_perdant_total
-                    stats_championnat[perdant]["Points_concédés"] += points_vainqueur_total
-                    stats_championnat[perdant]["Bulles_infligées"] += bulles_perdant
-                    stats_championnat[perdant]["Bulles_concédées"] += bulles_gagnant
-    
-    for j in stats_championnat:
-        stats_championnat[j]["Diff_sets"] = stats_championnat[j]["Sets_gagnés"] - stats_championnat[j]["Sets_concédés"]
-        stats_championnat[j]["Diff_points"] = stats_championnat[j]["Points_gagnés"] - stats_championnat[j]["Points_concédés"]
-        stats_championnat[j]["Points"] = (stats_championnat[j]["Victoires"] * points_victoire) + (stats_championnat[j]["Défaites"] * points_défaite)
-    
-    return stats_championnat
-
-# Fonction pour générer les appariements complet du championnat
-###############################################################
-def generer_appariements_aleatoires(joueurs, seed=None):
-    """
-    Retourne une liste de rounds; chaque round est une liste de paires (j1, j2).
-    Pour n impair, on ajoute 'BYE' (match contre BYE = repos).
-    """
-    if seed is not None:
-        random.seed(seed)
-    joueurs = list(joueurs)
-    random.shuffle(joueurs)  # randomiser l'ordre initial
-    n = len(joueurs)
-    bye = None
-    if n % 2 == 1:
-        bye = "BYE"
-        joueurs.append(bye)
-        n += 1
-
-    rounds = []
-    # méthode du cercle : on fixe joueurs[0], on fait tourner le reste
-    for r in range(n - 1):
-        paires = []
-        for i in range(n // 2):
-            a = joueurs[i]
-            b = joueurs[n - 1 - i]
-            if a != bye and b != bye:
-                paires.append((a, b, f"Tour {r+1}", "à jouer"))
-        rounds.append(paires)
-        # rotation (fixer joueurs[0])
-        joueurs = [joueurs[0]] + [joueurs[-1]] + joueurs[1:-1]
-    return rounds
+@mesure("calcul.calculer_stats_championnat")
+def calculer_stats_championnat(debut=None, fin=None):
+    if debut is None and fin is None:
+        return stats_championnat(championnat_df, liste_joueurs)
+    return ajouter_points(index_en_cache(championnat_df, version_championnat).stats(liste_joueurs, debut, fin))
+
+# Index des dates du championnat, reconstruit seulement quand un résultat est enregistré
+@st.cache_resource(max_entries=2)
+def index_en_cache(_df, version):
+    return index_dates_championnat(_df)
+
+# Tableau des confrontations, recalculé seulement quand un résultat est enregistré
+@st.cache_data(max_entries=8)
+def confrontations_en_cache(_df, joueurs, mesure, version):
+    with mesurer("calcul.confrontations_championnat"):
+        return tableau_confrontations(_df, list(joueurs), mesure)
+
+# Matchs programmés inscrits au journal des événements (après l'écriture dans le sheet)
+def journaliser_programme(lignes):
+    date = pd.to_datetime('now').strftime("%Y-%m-%d %H:%M:%S")
+    journaliser(*[
+        match_programme("championnat", id_match_championnat(l[2], l[0], l[1]), l[:2], date, l[11] if len(l) > 11 else "")
+        for l in lignes
+    ])
 
 # Tableau complet avec mise en surbrillance du joueur sélectionné
-def highlight_joueur(row):
+def highlight_joueur(row, joueur):
     if row.name == joueur:
         return ['background-color: #90EE90; font-weight: bold'] * len(row)  # vert
     return [''] * len(row)
@@ -163,13 +86,17 @@ def highlight_joueur(row):
 # Choix du mode de jeu #
 ########################
 
-# Onglets de l'application
-tabs = st.tabs(["👥 Participants", "🎪 Championnat", "➕ Saisie résultat", "📊 Confrontations", "🏆 Classement"])
+# Onglets de l'application : seul l'onglet affiché est calculé, et chaque onglet est un
+# fragment (un widget ne réexécute que l'onglet auquel il appartient)
+ONGLETS = ["👥 Participants", "🎪 Championnat", "➕ Saisie résultat", "📊 Confrontations", "🏆 Classement", "📚 Saisons"]
+onglet = st.radio("Onglet", ONGLETS, horizontal=True, key="onglet_championnat", label_visibility="collapsed")
 
 # --------------------------- # 
 # --- Onglet Participants --- #
 # --------------------------- #
-with tabs[0]:
+@st.fragment
+@mesure("fragment.championnat.participants")
+def onglet_participants():
     st.header("👥 Sélection des participants")
     
     if not championnat_df.empty:
@@ -180,7 +107,7 @@ with tabs[0]:
         
         st.divider()
 
-        st.warning("⚠️ Pour modifier les participants, il faut réinitialiser le championnat (Contacter Stef-la-pétanque)")
+        st.warning("⚠️ Pour modifier les participants, il faut d'abord clôturer la saison en cours (onglet **📚 Saisons**, réservé aux administrateurs)")
     
     else:
         st.write("Sélectionner les joueurs qui participeront au championnat :")
@@ -217,36 +144,126 @@ with tabs[0]:
             st.error("⚠️ Sélectionne au moins 2 joueurs pour lancer le tournoi")
         else:
             st.success(f"✅ {len(joueurs_selectionnes)} joueurs sélectionnés")
-            nb_parties_tour = round(len(joueurs_selectionnes) // 2)
             nb_parties_total = len(joueurs_selectionnes) * (len(joueurs_selectionnes) - 1) // 2
             st.info(f"📊 Ce tournoi nécessitera **{nb_parties_total} parties** au total ({len(joueurs_selectionnes) - 1} par joueur)")
             
             st.divider()
+
+            mode_creation = st.radio("Organisation", ["🔄 Par tours", "📅 Calendrier des soirées", "♟️ Système suisse"], horizontal=True, key="mode_creation")
+            if mode_creation == "♟️ Système suisse":
+                # Une ronde à la fois, appariée sur le classement : adapté aux grands effectifs
+                nb_rondes = max(1, (len(joueurs_selectionnes) - 1).bit_length())
+                st.info(f"♟️ Chaque ronde oppose des joueurs de points proches, sans revanche : environ **{nb_rondes + 1} rondes** conseillées")
+                if st.button("♟️ Lancer la 1ère ronde", use_container_width=True, key="btn_suisse"):
+                    suisse = AppariementSuisse()
+                    suisse.inscrire(joueurs_selectionnes)
+                    paires, exempte = suisse.apparier(seed=42)
+                    lignes = suisse.lignes_ronde(paires, exempte)
+                    try:
+                        ecrire_bloc(st.session_state.sheet_championnat, 2, lignes)
+                    except GSpreadException as e:
+                        st.error(f"❌ Le championnat n'a pas pu être créé : {e}")
+                        st.stop()
+                    journaliser_programme(lignes)
+                    st.success(f"✅ Ronde 1 : {len(paires)} matchs générés !")
+                    st.rerun()
+                return
+            if mode_creation == "📅 Calendrier des soirées":
+                # Tables, soirées et absences : chaque match reçoit une soirée, un créneau et une table
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    nb_tables = st.number_input("Tables", min_value=1, max_value=50, value=4, key="nb_tables")
+                with col2:
+                    nb_creneaux = st.number_input("Matchs par table et par soirée", min_value=1, max_value=10, value=3, key="nb_creneaux")
+                with col3:
+                    nb_soirees_min = -(-nb_parties_total // (nb_tables * nb_creneaux))
+                    nb_soirees = st.number_input("Soirées", min_value=1, max_value=200, value=max(nb_soirees_min + 2, 1), key="nb_soirees")
+                premiere_soiree = st.date_input("Première soirée", key="premiere_soiree")
+                soirees = [premiere_soiree + pd.Timedelta(weeks=k).to_pytimedelta() for k in range(int(nb_soirees))]
+
+                with st.expander("🚫 Absences prévues"):
+                    indisponibilites = {}
+                    for j in joueurs_selectionnes:
+                        absences = st.multiselect(j, soirees, format_func=lambda d: d.strftime("%d/%m/%Y"), key=f"absences_{j}")
+                        if absences:
+                            indisponibilites[j] = absences
+
+                if st.button("📅 Création du calendrier", use_container_width=True, key="btn_calendrier"):
+                    with mesurer("calcul.calendrier"):
+                        planning = planifier(joueurs_selectionnes, soirees, int(nb_tables), int(nb_creneaux), indisponibilites, seed=42)
+                    if planning.non_planifies:
+                        st.error(f"❌ {len(planning.non_planifies)} matchs n'ont pas de place : ajouter des soirées ou des tables")
+                        st.stop()
+                    lignes = planning.lignes()
+                    try:
+                        ecrire_bloc(st.session_state.sheet_championnat, 2, lignes)
+                    except GSpreadException as e:
+                        st.error(f"❌ Le championnat n'a pas pu être créé : {e}")
+                        st.stop()
+                    journaliser_programme(lignes)
+                    st.success(f"✅ {len(lignes)} matchs planifiés ({planning.attente} créneaux d'attente, {planning.violations_repos} matchs sans repos)")
+                    st.rerun()
+                return
             
             if st.button("🎲 Création du championnat", use_container_width=True, key="btn_aleatoire"):
                 nouveaux_matchs = generer_appariements_aleatoires(joueurs_selectionnes, seed=42)
-                for match in nouveaux_matchs:
-                    st.session_state.sheet_championnat.append_rows(match)
-                    
-                # Recharger les données du championnat
-                st.session_state.championnat_df = pd.DataFrame(championnat_rows)
+                lignes = [match for tour in nouveaux_matchs for match in tour]
+
+                # Tout le calendrier en une seule écriture (ligne 2 = juste sous l'en-tête)
+                try:
+                    ecrire_bloc(st.session_state.sheet_championnat, 2, lignes)
+                except GSpreadException as e:
+                    st.error(f"❌ Le championnat n'a pas pu être créé : {e}")
+                    st.stop()
+                journaliser_programme(lignes)
                     
-                st.success(f"✅ {len(nouveaux_matchs)} matchs générés !")
+                st.success(f"✅ {len(lignes)} matchs générés !")
                 st.rerun()
 
 # -------------------------- # 
 # --- Onglet championnat --- #
 # -------------------------- # 
-with tabs[1]:
+@st.fragment
+@mesure("fragment.championnat.championnat")
+def onglet_championnat():
     st.header("🎪 Gestion du championnat")
     
     if championnat_df.empty:
         st.warning("⚠️ Voir dans l'onglet **👥 Participants** pour lancer le championnat")
     
     else:
+        # Système suisse : la ronde suivante est appariée quand la ronde en cours est terminée
+        suisse = championnat_df["tour n°"].astype(str).str.startswith(PREFIXE_RONDE).any()
+        if suisse:
+            etat_suisse = appariement_suisse(st.session_state.sheet_championnat)
+            st.subheader(f"♟️ Système suisse : ronde {etat_suisse.ronde}")
+            exemptes = championnat_df.loc[(championnat_df["joueur_2"] == EXEMPT) & (championnat_df["tour n°"] == f"{PREFIXE_RONDE} {etat_suisse.ronde}"), "joueur_1"]
+            if not exemptes.empty:
+                st.write(f"Exempté de la ronde (points d'une victoire) : **{exemptes.iloc[0]}**")
+            if etat_suisse.a_jouer == 0:
+                if st.button(f"♟️ Apparier la ronde {etat_suisse.ronde + 1}", use_container_width=True, key="btn_ronde"):
+                    try:
+                        with mesurer("calcul.appariement_suisse"):
+                            paires, exempte = etat_suisse.apparier()
+                    except ValueError as e:
+                        st.error(f"❌ {e}")
+                        st.stop()
+                    lignes = etat_suisse.lignes_ronde(paires, exempte)
+                    try:
+                        ecrire_bloc(st.session_state.sheet_championnat, etat_suisse.nb_lignes + 1, lignes)
+                    except GSpreadException as e:
+                        st.error(f"❌ La ronde n'a pas pu être enregistrée : {e}")
+                        st.stop()
+                    journaliser_programme(lignes)
+                    st.success(f"✅ Ronde {etat_suisse.ronde + 1} : {len(paires)} matchs générés !")
+                    st.rerun()
+            st.divider()
+
         # Calculs nécéssaires
-        nb_total = len(joueurs_championnat) * (len(joueurs_championnat) - 1) // 2
-        nb_parties_tour = round(len(liste_joueurs) // 2)
+        if suisse:
+            nb_total = int((championnat_df["joueur_2"] != EXEMPT).sum())     # matchs des rondes déjà appariées
+        else:
+            nb_total = len(joueurs_championnat) * (len(joueurs_championnat) - 1) // 2
         nb_joues = len(championnat_df[championnat_df["statut"] == "terminé"]) if not championnat_df.empty else 0
         nb_en_cours = len(championnat_df[championnat_df["statut"] == "à jouer"]) if not championnat_df.empty else 0
         
@@ -276,9 +293,12 @@ with tabs[1]:
             parties_en_cours = parties_en_cours.sort_values("tour_num")
 
             for tour_num, groupe in parties_en_cours.groupby("tour_num"):
-                st.markdown(f"### 🏁 Tour {tour_num}")
+                # Calendrier des soirées : date prévue en colonne L et table dans le tour
+                date_prevue = str(groupe["date"].iloc[0]) if "date" in groupe else ""
+                st.markdown(f"### 🏁 Tour {tour_num}" + (f" ({date_prevue})" if date_prevue else ""))
                 for _, parties in groupe.iterrows():
-                    st.info(f"🎯 **{parties['joueur_1']}** vs **{parties['joueur_2']}**")
+                    table = str(parties["tour n°"]).partition(" - ")[2]
+                    st.info(f"🎯 **{parties['joueur_1']}** vs **{parties['joueur_2']}**" + (f" · {table}" if table else ""))
         
         st.divider()
 
@@ -306,7 +326,9 @@ with tabs[1]:
 # --------------------- #
 # --- Onglet Saisie --- #
 # --------------------- #
-with tabs[2]:
+@st.fragment
+@mesure("fragment.championnat.saisie")
+def onglet_saisie():
     st.header("Saisie d'un résultat de championnat")
     
     # Récupérer les matchs à jouer
@@ -530,51 +552,81 @@ with tabs[2]:
                 st.info(f"Détail : {detail_scores}")
             
             if submitted:
-                # Trouver la ligne du match dans le sheet
-                all_data = st.session_state.sheet_championnat.get_all_values()
-                row_idx = None
-                
-                for i, row in enumerate(all_data[1:], start=2):
-                    if (row[0] == j1 and row[1] == j2) or (row[0] == j2 and row[1] == j1):
-                        if row[3] == "à jouer": 
-                            row_idx = i
-                            break
+                # Retrouver la ligne du match via l'index (sans relire le sheet) et l'écrire
+                index = get_index_championnat().synchroniser(st.session_state.sheet_championnat)
+                resultat_match = ["terminé", vainqueur, perdant, score_set_1, score_set_2, score_set_3, score_set_4, score_set_5, date]
                 
-                if row_idx:
-                    # Mettre à jour le championnat
-                    st.session_state.sheet_championnat.update(f"D{row_idx}:L{row_idx}", [["terminé", vainqueur, perdant, score_set_1, score_set_2, score_set_3, score_set_4, score_set_5, date]])
-                    
-                    # Recharger les données du championnat
-                    championnat_tat_rows = st.session_state.sheet_championnat.get_all_records()
-                    st.session_state.championnat_df = pd.DataFrame(championnat_tat_rows)
-                    
+                if index.enregistrer_resultat(st.session_state.sheet_championnat, j1, j2, resultat_match):
+                    # Le classement est mis à jour ici, par la session qui écrit : les autres n'ont qu'à l'afficher
+                    classement_championnat(st.session_state.sheet_championnat)
+                    tour = championnat_df.loc[(championnat_df["joueur_1"] == j1) & (championnat_df["joueur_2"] == j2) & (championnat_df["statut"] == "à jouer"), "tour n°"].iloc[0]
+                    journaliser(resultat("championnat", vainqueur, perdant, resultat_match[3:8], date, match=id_match_championnat(tour, j1, j2)))
                     st.success("✅ Résultat enregistré !")
                     st.rerun()
                 else:
                     st.error("❌ Erreur : impossible de trouver le match")
 
+    # Correction d'un résultat déjà saisi : la ligne du match est réécrite et la correction journalisée
+    termines = championnat_df[championnat_df["statut"] == "terminé"] if not championnat_df.empty else championnat_df
+    if termines.empty:
+        return
+    with st.expander("✏️ Corriger un résultat (administrateurs)"):
+        if not est_admin():
+            return
+        numero = st.selectbox("Match à corriger", termines.index, key="match_correction",
+                              format_func=lambda i: f"{termines.at[i, 'tour n°']} : {termines.at[i, 'joueur_1']} vs {termines.at[i, 'joueur_2']}")
+        c1, c2, tour = termines.at[numero, "joueur_1"], termines.at[numero, "joueur_2"], termines.at[numero, "tour n°"]
+
+        with st.form("correction_resultat"):
+            colonnes = st.columns(6)
+            with colonnes[0]:
+                st.write("")
+                st.write("")
+                st.write(f"**{c1}**")
+                st.write("")
+                st.write(f"**{c2}**")
+            scores_c1, scores_c2 = [], []
+            for i, col in enumerate(colonnes[1:], start=1):
+                with col:
+                    st.write(f"**Set {i}**")
+                    scores_c1.append(st.number_input("", min_value=0, max_value=99, value=0, key=f"c1_s{i}", label_visibility="collapsed"))
+                    scores_c2.append(st.number_input("", min_value=0, max_value=99, value=0, key=f"c2_s{i}", label_visibility="collapsed"))
+            corrige = st.form_submit_button("✏️ Corriger le résultat", use_container_width=True)
+
+        if corrige:
+            try:
+                gagnant, sets_v, sets_p, sets = valider_match(scores_c1, scores_c2)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                st.stop()
+            vainqueur, perdant = (c1, c2) if gagnant == 1 else (c2, c1)
+            date = pd.to_datetime('now').strftime("%Y-%m-%d %H:%M:%S")
+            ligne = numero + 2      # records à partir de la ligne 2 du sheet
+            try:
+                mettre_a_jour(st.session_state.sheet_championnat, f"D{ligne}:L{ligne}", [["terminé", vainqueur, perdant] + list(sets) + [date]])
+            except GSpreadException as e:
+                st.error(f"❌ La correction n'a pas pu être enregistrée : {e}")
+                st.stop()
+            classement_championnat(st.session_state.sheet_championnat)
+            journaliser(resultat("championnat", vainqueur, perdant, sets, date, match=id_match_championnat(tour, c1, c2), corrige=True))
+            st.success(f"✅ Résultat corrigé : **{vainqueur}** gagne {sets_v}-{sets_p}")
+            st.rerun()
+
 # ----------------------------- #
 # --- Onglet Confrontations --- #
 # ----------------------------- #
-with tabs[3]:
+@st.fragment
+@mesure("fragment.championnat.confrontations")
+def onglet_confrontations():
     st.header("Tableau des confrontations")
     
     if championnat_df.empty:
         st.info("Aucun résultat enregistré pour le moment")
     else:
-        recap = pd.DataFrame("", index=liste_joueurs, columns=liste_joueurs)
-        
-        for _, row in championnat_df.iterrows():
-            vainq = row["vainqueur"]
-            adv = row["adversaire"]
-            score_v = row.get("score_vainqueur", 1)
-            score_a = row.get("score_adversaire", row.get("score_adv", 0))
-            
-            if vainq in liste_joueurs and adv in liste_joueurs:
-                recap.loc[vainq, adv] = f"{score_v}-{score_a}"
-                recap.loc[adv, vainq] = f"{score_a}-{score_v}"
-        
-        st.dataframe(recap, use_container_width=True)
+        mesure = st.radio("Afficher", ["Sets", "Victoires", "Points"], horizontal=True, key="mesure_confrontations")
+        recap = confrontations_en_cache(championnat_df, tuple(liste_joueurs), mesure, version_championnat)
+        with mesurer("rendu.confrontations"):
+            st.dataframe(recap, use_container_width=True)
 
     st.divider()
 
@@ -586,21 +638,21 @@ with tabs[3]:
 # ------------------------- #
 # --- Onglet Classement --- #
 # ------------------------- #
-with tabs[4]:
+@st.fragment
+@mesure("fragment.championnat.classement")
+def onglet_classement():
     st.header("Classement du championnat")
     st.subheader("Choisissez un joueur pour afficher ses stats et le mettre en surbrillance dans le tableau")
 
     # Sélection d'un joueur à afficher
     joueur = st.selectbox("Choix du joueur", options=liste_joueurs, key="joueur")
+    debut_periode, fin_periode = choisir_periode("periode_classement")
     
-    stats_championnat = calculer_stats_championnat()
-    
-    classement = pd.DataFrame(stats_championnat).T
-    classement["Parties jouées"] = classement["Victoires"] + classement["Défaites"]
-    classement["%_Victoires"] = ((classement["Victoires"] / classement["Parties jouées"]) * 100).fillna(0).replace([float('inf'), -float('inf')], 0).round(0).astype(int).astype(str) + "%"
-    classement = classement.sort_values(by=["Points", "Victoires", "Diff_sets", "Diff_points"], ascending=[False, False, False, False])
-    classement = classement[["Points", "Parties jouées", "Victoires", "Défaites", "%_Victoires", "Sets_gagnés", "Sets_concédés", "Diff_sets", "Points_gagnés", "Points_concédés", "Diff_points", "Bulles_infligées", "Bulles_concédées"]]
-    classement.columns = ["Points", "Joués", "Victoires", "Défaites", "% Vict", "Sets Gagnés", "Sets Perdus", "Diff_sets", "Points Gagnés", "Points Perdus", "Diff_points", "Bulles_infligées", "Bulles_concédées"]
+    # Tout le championnat : classement matérialisé à l'écriture, rien à calculer ici
+    if debut_periode is None and fin_periode is None and not championnat_df.empty:
+        classement = classement_championnat(st.session_state.sheet_championnat).tableau
+    else:
+        classement = calculer_classement(calculer_stats_championnat(debut_periode, fin_periode))
         
     # Afficher sous forme de métriques plutôt qu'un tableau
     col1, col2, col3, col4, col5 = st.columns(5)
@@ -618,5 +670,92 @@ with tabs[4]:
     st.divider()
 
     # Affichage du tableau complet
-    classement_styled = classement.style.apply(highlight_joueur, axis=1)
-    st.dataframe(classement_styled, use_container_width=True)
+    # La mise en forme (Styler) est calculée par st.dataframe : mesurée avec l'affichage
+    with mesurer("rendu.classement"):
+        classement_styled = classement.style.apply(highlight_joueur, joueur=joueur, axis=1)
+        st.dataframe(classement_styled, use_container_width=True)
+
+# ---------------------- #
+# --- Onglet Saisons --- #
+# ---------------------- #
+@st.fragment
+@mesure("fragment.championnat.saisons")
+def onglet_saisons():
+    st.header("📚 Saisons précédentes")
+
+    # Les stats de toutes les saisons se lisent dans les résumés : aucun match archivé n'est relu
+    resumes = pd.DataFrame(lire_records(st.session_state.sheet_saisons))
+    saisons = sorted(resumes["saison"].astype(str).unique(), reverse=True) if not resumes.empty else []
+
+    if not saisons:
+        st.info("Aucune saison clôturée pour le moment")
+    else:
+        with mesurer("calcul.stats_toutes_saisons"):
+            cumul = stats_toutes_saisons(resumes)
+        st.subheader("Toutes saisons confondues")
+        st.dataframe(cumul, use_container_width=True)
+
+        st.subheader("Palmarès")
+        resumes["rang"] = pd.to_numeric(resumes["rang"], errors="coerce")
+        for saison in saisons:
+            podium = resumes[(resumes["saison"].astype(str) == saison) & (resumes["rang"] <= 3)].sort_values("rang")
+            st.write(f"**{saison}** : " + " · ".join(f"{'🥇🥈🥉'[int(r) - 1]} {j}" for r, j in zip(podium["rang"], podium["joueur"])))
+
+        # Matchs d'une saison : décompressés seulement à la demande
+        saison = st.selectbox("Matchs d'une saison", saisons, key="saison_archive")
+        if st.button("📦 Préparer le fichier des matchs", key="btn_archive"):
+            with mesurer("calcul.lire_archive"):
+                matchs = lire_archive(lire_records(st.session_state.sheet_archives), saison)
+            st.download_button("⬇️ Télécharger (CSV)", matchs.to_csv(index=False).encode("utf-8"), file_name=f"championnat_{saison}.csv", mime="text/csv", key="dl_archive")
+
+    if not est_admin():
+        return
+
+    # Clôture : résumé + archive compressée, puis le sheet championnat est vidé pour la saison suivante
+    st.divider()
+    st.subheader("🔒 Clôturer la saison")
+    if championnat_df.empty:
+        st.info("Aucun match dans le championnat en cours")
+        return
+    nom = st.text_input("Nom de la saison", value=nom_saison(debut_saison()), key="nom_saison").strip()
+    if nom in saisons:
+        st.warning(f"⚠️ La saison {nom} est déjà archivée : il ne reste qu'à vider le sheet championnat")
+    a_jouer = int((championnat_df["statut"] == "à jouer").sum())
+    if a_jouer:
+        st.warning(f"⚠️ {a_jouer} match(s) encore à jouer : ils seront archivés sans résultat")
+
+    if st.button("🔒 Clôturer et archiver", use_container_width=True, key="btn_cloture"):
+        cloture = pd.to_datetime('now').strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            # Rejouable : une saison déjà résumée n'est pas archivée une seconde fois
+            if nom not in saisons:
+                stats = stats_championnat(championnat_df, liste_joueurs)
+                classement = stats.loc[calculer_classement(stats).index]
+                ajouter_lignes(st.session_state.sheet_archives, lignes_archive(nom, lire_valeurs(st.session_state.sheet_championnat)))
+                ajouter_lignes(st.session_state.sheet_saisons, lignes_resume(nom, cloture, classement))
+            effacer(st.session_state.sheet_championnat)
+            journaliser(evenement(SAISON_CLOTUREE, cloture, saison=nom))
+        except GSpreadException as e:
+            st.error(f"❌ La saison n'a pas pu être clôturée : {e}")
+            st.stop()
+        st.success(f"✅ Saison {nom} archivée, le championnat est prêt pour la saison suivante")
+        st.rerun()
+
+# -------------------------- #
+# --- Onglet sélectionné --- #
+# -------------------------- #
+affichage_onglet = {
+    "👥 Participants": onglet_participants,
+    "🎪 Championnat": onglet_championnat,
+    "➕ Saisie résultat": onglet_saisie,
+    "📊 Confrontations": onglet_confrontations,
+    "🏆 Classement": onglet_classement,
+    "📚 Saisons": onglet_saisons,
+}
+affichage_onglet[onglet]()
+# Onglets d'affichage : redessinés d'eux-mêmes quand le rafraîchisseur apporte des changements
+if onglet in ("🎪 Championnat", "🏆 Classement"):
+    suivre_mises_a_jour(st.session_state.sheet_championnat)
+
+# Durée de l'exécution complète de la page (les réexécutions de fragments sont mesurées à part)
+MESURES.enregistrer("script.championnat", time.perf_counter() - debut_script)
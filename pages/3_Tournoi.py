@@ -0,0 +1,206 @@
+import time
+import streamlit as st
+import pandas as pd
+import sys
+sys.path.append('..')  # Pour importer depuis la racine
+from gspread.exceptions import GSpreadException
+from utils import init_google_sheets, lire_valeurs, version_feuille, ecrire_bloc, mettre_a_jour_plages, get_resultats_incrementaux, classement_championnat, notes_elo, journaliser, suivre_mises_a_jour, chrono, rapport_demarrage
+from saisie import valider_match
+from tournoi import Tableau, nom_tour
+from evenements import resultat, match_programme
+from mesures import MESURES, mesure, mesurer
+
+#############
+# Affichage #
+#############
+st.set_page_config(page_title="Tournoi", page_icon="🏆")
+debut_script = time.perf_counter()
+st.write("# Tournoi à élimination directe")
+
+#######################
+# Liens et chargement #
+#######################
+# Utiliser les données en cache
+init_google_sheets()
+liste_joueurs_complet = st.session_state.liste_joueurs_complet
+
+# Charger le tableau (un match par ligne du sheet tournoi)
+with chrono("Tableau du tournoi"):
+    version_tournoi = version_feuille(st.session_state.sheet_tournoi)
+rapport_demarrage()
+
+#############
+# Fonctions #
+#############
+
+# Tableau en mémoire, reconstruit seulement quand le sheet a changé
+@st.cache_resource(max_entries=2)
+def tableau_en_cache(_ws, version):
+    return Tableau.depuis_valeurs(lire_valeurs(_ws))
+
+# Fonction pour classer les participants selon la source choisie
+################################################################
+@mesure("calcul.tetes_de_serie")
+def tetes_de_serie(joueurs, source):
+    """Joueurs du meilleur au moins bon ; les joueurs sans résultat sont placés à la fin"""
+    if source == "🏆 Championnat":
+        classement = classement_championnat(st.session_state.sheet_championnat).tableau
+        return [j for j in classement.index if j in joueurs] + [j for j in joueurs if j not in classement.index]
+    if source == "📈 Elo (jeu libre)":
+        notes = notes_elo(st.session_state.sheet_resultats_simp, joueurs)
+        return list(notes.sort_values(["Elo", "Parties"], ascending=False, kind="stable").index)
+    resultats = get_resultats_incrementaux("resultats_simple").synchroniser(st.session_state.sheet_resultats_simp, liste_joueurs_complet)
+    stats = resultats.stats_joueurs(joueurs)
+    return list(stats.sort_values(["Victoires", "Diff_sets", "Diff_points"], ascending=False, kind="stable").index)
+
+tableau = tableau_en_cache(st.session_state.sheet_tournoi, version_tournoi)
+
+###########
+# Onglets #
+###########
+ONGLETS = ["🎯 Création", "🌳 Tableau", "➕ Saisie résultat"]
+onglet = st.radio("Onglet", ONGLETS, horizontal=True, key="onglet_tournoi", label_visibility="collapsed")
+
+# ----------------------- #
+# --- Onglet Création --- #
+# ----------------------- #
+@st.fragment
+@mesure("fragment.tournoi.creation")
+def onglet_creation():
+    st.header("🎯 Création du tableau")
+
+    if tableau is not None:
+        st.info(f"✅ Un tournoi est en cours ({tableau.taille} places, {tableau.nb_tours} tours)")
+        st.warning("⚠️ Pour lancer un nouveau tournoi, il faut vider le sheet tournoi (Contacter Stef-la-pétanque)")
+        return
+
+    participants = st.multiselect("Participants", liste_joueurs_complet, default=liste_joueurs_complet, key="participants_tournoi")
+    source = st.radio("Têtes de série", ["🏆 Championnat", "📊 Jeu libre", "📈 Elo (jeu libre)", "🎲 Tirage au sort"], horizontal=True, key="source_tetes")
+
+    if len(participants) < 2:
+        st.error("⚠️ Sélectionne au moins 2 joueurs pour lancer le tournoi")
+        return
+
+    if source == "🎲 Tirage au sort":
+        ordre, seed = participants, 42
+    else:
+        ordre, seed = tetes_de_serie(participants, source), None
+        st.write("**Têtes de série :** " + ", ".join(f"{k}. {j}" for k, j in enumerate(ordre[:8], start=1)))
+    taille = 1 << (len(participants) - 1).bit_length()
+    if taille > len(participants):
+        st.info(f"📊 Tableau de {taille} places : les {taille - len(participants)} meilleures têtes de série sont exemptées du premier tour")
+
+    if st.button("🏆 Création du tableau", use_container_width=True, key="btn_tableau"):
+        nouveau = Tableau.creer(ordre, seed=seed)
+        lignes = nouveau.vers_lignes()
+        # Tout le tableau en une seule écriture (ligne 2 = juste sous l'en-tête)
+        try:
+            ecrire_bloc(st.session_state.sheet_tournoi, 2, lignes)
+        except GSpreadException as e:
+            st.error(f"❌ Le tableau n'a pas pu être créé : {e}")
+            st.stop()
+        date = pd.to_datetime('now').strftime("%Y-%m-%d %H:%M:%S")
+        journaliser(*[match_programme("tournoi", f"{t}-{p}", [j1, j2], date) for t, p, j1, j2 in nouveau.a_jouer()])
+        st.success(f"✅ Tableau de {len(lignes)} matchs créé !")
+        st.rerun()
+
+# ---------------------- #
+# --- Onglet Tableau --- #
+# ---------------------- #
+@st.fragment
+@mesure("fragment.tournoi.tableau")
+def onglet_tableau():
+    st.header("🌳 Tableau")
+
+    if tableau is None:
+        st.warning("⚠️ Voir dans l'onglet **🎯 Création** pour lancer le tournoi")
+        return
+
+    if tableau.champion:
+        st.success(f"🏆 Vainqueur du tournoi : **{tableau.champion}**")
+
+    # Une colonne par tour, rendue depuis l'arbre en mémoire
+    with mesurer("rendu.tableau_tournoi"):
+        colonnes = st.columns(tableau.nb_tours)
+        for tour, colonne in enumerate(colonnes, start=1):
+            with colonne:
+                st.markdown(f"**{nom_tour(tour, tableau.nb_tours)}**")
+                for position in range(1, tableau.nb_matchs(tour) + 1):
+                    j1, j2, vainqueur = tableau.matchs[(tour, position)][:3]
+                    noms = [f"**{j}**" if j and j == vainqueur else (j or "…") for j in (j1, j2)]
+                    st.markdown(f"{noms[0]}  \n{noms[1]}")
+                    st.write("")
+
+# --------------------- #
+# --- Onglet Saisie --- #
+# --------------------- #
+@st.fragment
+@mesure("fragment.tournoi.saisie")
+def onglet_saisie():
+    st.header("Saisie d'un résultat du tournoi")
+
+    if tableau is None:
+        st.warning("⚠️ Voir dans l'onglet **🎯 Création** pour lancer le tournoi")
+        return
+
+    matchs = tableau.a_jouer()
+    if not matchs:
+        st.info("Aucun match à jouer pour le moment")
+        return
+
+    choix = st.selectbox("Match", matchs, format_func=lambda m: f"{nom_tour(m[0], tableau.nb_tours)} : {m[2]} vs {m[3]}", key="match_tournoi")
+    tour, position, j1, j2 = choix
+
+    with st.form("saisie_resultat_tournoi"):
+        colonnes = st.columns(6)
+        with colonnes[0]:
+            st.write("")
+            st.write("")
+            st.write(f"**{j1}**")
+            st.write("")
+            st.write(f"**{j2}**")
+        scores_j1, scores_j2 = [], []
+        for i, col in enumerate(colonnes[1:], start=1):
+            with col:
+                st.write(f"**Set {i}**")
+                scores_j1.append(st.number_input("", min_value=0, max_value=99, value=0, key=f"t1_s{i}", label_visibility="collapsed"))
+                scores_j2.append(st.number_input("", min_value=0, max_value=99, value=0, key=f"t2_s{i}", label_visibility="collapsed"))
+
+        submitted = st.form_submit_button("✅ Enregistrer", use_container_width=True)
+
+        if submitted:
+            try:
+                gagnant, sets_v, sets_p, sets = valider_match(scores_j1, scores_j2)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                st.stop()
+
+            vainqueur = j1 if gagnant == 1 else j2
+            date = pd.to_datetime('now').strftime("%Y-%m-%d %H:%M:%S")
+            # Seules la ligne du match et la case du match suivant sont écrites. Les plages sont
+            # calculées sur une copie : le tableau partagé est relu du sheet une fois l'écriture faite
+            try:
+                plages = tableau.copie().enregistrer(tour, position, vainqueur, sets, date)
+                mettre_a_jour_plages(st.session_state.sheet_tournoi, plages)
+            except (ValueError, GSpreadException) as e:
+                st.error(f"❌ Le résultat n'a pas pu être enregistré : {e}")
+                st.stop()
+            journaliser(resultat("tournoi", vainqueur, j2 if vainqueur == j1 else j1, sets, date, match=f"{tour}-{position}"))
+            st.success(f"🏆 **{vainqueur}** remporte le match {sets_v}-{sets_p}")
+            st.rerun()
+
+# -------------------------- #
+# --- Onglet sélectionné --- #
+# -------------------------- #
+affichage_onglet = {
+    "🎯 Création": onglet_creation,
+    "🌳 Tableau": onglet_tableau,
+    "➕ Saisie résultat": onglet_saisie,
+}
+affichage_onglet[onglet]()
+# Onglets d'affichage : redessinés d'eux-mêmes quand le rafraîchisseur apporte des changements
+if onglet == "🌳 Tableau":
+    suivre_mises_a_jour(st.session_state.sheet_tournoi)
+
+# Durée de l'exécution complète de la page (les réexécutions de fragments sont mesurées à part)
+MESURES.enregistrer("script.tournoi", time.perf_counter() - debut_script)
@@ -0,0 +1,115 @@
+import streamlit as st
+import pandas as pd
+import sys
+sys.path.append('..')  # Pour importer depuis la racine
+from gspread.exceptions import GSpreadException
+from utils import init_google_sheets, est_admin, get_stockage_sheets, get_ordonnanceur, get_cache_feuilles, get_journal, journal, rapprocher_journal, rafraichisseur, get_export_mesures
+from evenements import CONTEXTES
+from stockage import StockageSQLite, synchroniser_stockages
+from mesures import MESURES
+
+#############
+# Affichage #
+#############
+st.set_page_config(page_title="Administration", page_icon="🔧")
+st.write("# Administration")
+
+init_google_sheets()
+
+if not est_admin():
+    st.info("Page réservée aux administrateurs ([admin] mot_de_passe dans les secrets)")
+    st.stop()
+
+#####################
+# Mesures par étape #
+#####################
+st.header("Durées par opération")
+st.caption("Percentiles calculés sur les 1000 derniers appels de chaque opération, pour tout le process")
+
+resume = MESURES.resume()
+if resume:
+    prefixes = sorted({ligne["operation"].split(".")[0] for ligne in resume})
+    choix = st.multiselect("Catégories", prefixes, default=prefixes)
+    tableau = pd.DataFrame(resume).set_index("operation")
+    tableau = tableau[tableau.index.str.split(".").str[0].isin(choix)]
+    st.dataframe(tableau, use_container_width=True)
+else:
+    st.info("Aucune mesure pour le moment")
+
+#####################
+# API Google Sheets #
+#####################
+st.header("API Google Sheets")
+metriques = get_ordonnanceur().metriques()
+metriques["perimes_servis"] = get_cache_feuilles().perimes_servis
+if rafraichisseur() is not None:
+    metriques.update(rafraichisseur().metriques())
+metriques.update(get_export_mesures())
+st.dataframe(pd.Series(metriques, name="valeur").astype(str), use_container_width=True)
+
+##########################
+# Journal des événements #
+##########################
+st.header("Journal des événements")
+st.caption("Vues restaurées depuis le dernier instantané et les événements écrits depuis")
+
+etat = journal()
+col1, col2, col3, col4, col5 = st.columns(5)
+with col1:
+    st.metric("Événements", etat.ligne - 1)
+with col2:
+    st.metric("Depuis l'instantané", etat.ligne - etat.ligne_instantane)
+with col3:
+    st.metric("Rejoués au démarrage", etat.rejoues)
+with col4:
+    st.metric("Écritures en échec", etat.echecs)
+with col5:
+    st.metric("Rétablis", etat.rapproches)
+if etat.temps:
+    st.dataframe(pd.Series(etat.temps, name="ms").round(1), use_container_width=True)
+
+contexte = st.radio("Vue", CONTEXTES, horizontal=True, key="contexte_journal")
+st.dataframe(etat.projection.classement(contexte), use_container_width=True)
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    if st.button("🔁 Restaurer depuis le dernier instantané", use_container_width=True):
+        get_journal().restaurer(st.session_state.sheet_evenements, st.session_state.sheet_instantanes)
+        st.rerun()
+with col2:
+    if st.button("📸 Écrire un instantané maintenant", use_container_width=True):
+        get_journal().ecrire_instantane(st.session_state.sheet_instantanes)
+        st.rerun()
+with col3:
+    if st.button("🔎 Rapprocher avec les sheets de données", use_container_width=True):
+        st.info(f"{rapprocher_journal()} événement(s) rétabli(s) dans le journal")
+
+###################
+# Synchronisation #
+###################
+# Base SQLite locale : le Google Sheet du club peut servir de copie (lignes manquantes seulement pour les tables en ajout seul)
+if isinstance(st.session_state.get("stockage"), StockageSQLite) and "sheet" in st.secrets:
+    st.header("Synchronisation")
+    st.caption("Recopie de la base locale vers le Google Sheet du club")
+    if st.button("☁️ Recopier vers Google Sheets", use_container_width=True):
+        try:
+            with st.spinner("Recopie en cours..."):
+                synchroniser_stockages(st.session_state.stockage, get_stockage_sheets(st.secrets["sheet"]["id"]))
+        except GSpreadException as e:
+            st.error(f"❌ La recopie a échoué : {e}")
+        else:
+            st.success("✅ Google Sheet à jour")
+
+##########
+# Export #
+##########
+st.header("Export")
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.download_button("Format Prometheus", MESURES.prometheus(metriques), file_name="metrics.txt", mime="text/plain")
+with col2:
+    st.download_button("Format JSON", MESURES.vers_json(metriques), file_name="mesures.json", mime="application/json")
+with col3:
+    if st.button("Réinitialiser les mesures"):
+        MESURES.reinitialiser()
+        st.rerun()
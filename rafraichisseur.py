@@ -0,0 +1,85 @@
+# rafraichisseur.py
+import threading
+import time
+from mesures import mesurer
+
+INTERVALLE_DEFAUT = 15  # secondes entre deux sondages du stockage
+
+class Rafraichisseur:
+    """
+    Tient à jour, en arrière-plan, les instantanés du cache des feuilles partagés par
+    toutes les sessions du process. Toutes les `intervalle` secondes, une seule requête
+    légère (horodatage du stockage) dit si quelque chose a changé :
+      - non : les instantanés sont prolongés sans rien télécharger ;
+      - oui : les worksheets déjà en cache sont relus (par incréments pour les feuilles
+        en ajout seul) et `versions` compte ceux dont le contenu a changé.
+    Les pages ouvertes comparent ces versions pour se redessiner d'elles-mêmes : le coût
+    est d'un sondage par intervalle, quel que soit le nombre de sessions.
+    """
+
+    def __init__(self, cache, horodatage, intervalle=INTERVALLE_DEFAUT):
+        self.cache = cache
+        self._horodatage = horodatage   # fonction sans argument (Stockage.horodatage)
+        self.intervalle = intervalle
+        self.versions = {}              # titre -> nombre de changements apportés
+        self.dernier_jeton = None
+        self.sondages = 0
+        self.relectures = 0             # worksheets relus après un changement
+        self.changements = 0            # worksheets dont le contenu avait changé
+        self.erreurs = 0
+        self._fil = None
+
+    def demarrer(self):
+        """Lance le thread démon (une seule fois ; intervalle 0 = désactivé)"""
+        if self._fil is None and self.intervalle > 0:
+            self._fil = threading.Thread(target=self._boucle, name="rafraichisseur", daemon=True)
+            self._fil.start()
+        return self
+
+    @property
+    def actif(self):
+        return self._fil is not None
+
+    def _boucle(self):
+        while True:
+            time.sleep(self.intervalle)
+            try:
+                self.sonder()
+            except Exception:
+                # Le stockage est injoignable : les instantanés restent servis, le sondage suivant réessaiera
+                self.erreurs += 1
+
+    def sonder(self):
+        """Un sondage ; retourne les titres des worksheets dont le contenu a changé"""
+        with mesurer("rafraichissement.sondage"):
+            jeton = self.cache.ordonnanceur.lire(("horodatage",), self._horodatage)
+            self.sondages += 1
+            titres = self.cache.titres()
+            if jeton is not None and jeton == self.dernier_jeton:
+                for titre in titres:
+                    self.cache.prolonger(titre)
+                return []
+            perimes = self.cache.perimes_servis
+            changes = []
+            for titre in titres:
+                if self.cache.rafraichir(self.cache.feuille(titre)):
+                    self.versions[titre] = self.versions.get(titre, 0) + 1
+                    changes.append(titre)
+            self.relectures += len(titres)
+            self.changements += len(changes)
+            # Une relecture en échec (instantané périmé servi) : le même jeton devra tout relire au prochain sondage
+            if self.cache.perimes_servis == perimes:
+                self.dernier_jeton = jeton
+            return changes
+
+    def version(self, titres):
+        """Versions des worksheets donnés : change dès que le rafraîchisseur a apporté du nouveau"""
+        return tuple(self.versions.get(titre, 0) for titre in titres)
+
+    def metriques(self):
+        return {
+            "rafraichissement_sondages": self.sondages,
+            "rafraichissement_relectures": self.relectures,
+            "rafraichissement_changements": self.changements,
+            "rafraichissement_erreurs": self.erreurs,
+        }
@@ -0,0 +1,111 @@
+# saisie.py
+import pandas as pd
+from moteur_stats import BULLE_PERDANT, COLONNES_SETS, FORMAT_DATE
+
+NOMS_SETS = ["1er", "2ème", "3ème", "4ème", "5ème"]
+
+# Colonnes attendues dans un fichier d'import (scores "11-7" vus du joueur_1)
+COLONNES_IMPORT = ["joueur_1", "joueur_2", "set_1", "set_2", "set_3", "set_4", "set_5"]
+
+# Fonction de validation d'un match (mêmes règles que le formulaire de saisie)
+##############################################################################
+def valider_match(scores_j1, scores_j2):
+    """
+    Vérifie un match au meilleur des 5 sets à partir des scores de chaque joueur
+    (5 valeurs, 0-0 pour un set non joué). Un set est gagné à 11 points minimum
+    avec 2 points d'écart ; les sets joués après le 3ème set gagné sont ignorés.
+    Retourne (1 ou 2 selon le vainqueur, sets du vainqueur, sets du perdant, sets encodés)
+    avec les sets encodés au format du sheet ; lève ValueError sinon.
+    """
+    sets_j1 = 0
+    sets_j2 = 0
+    gagnants = []
+    for i in range(5):
+        if sets_j1 == 3 or sets_j2 == 3:
+            break
+        a, b = scores_j1[i], scores_j2[i]
+        if a >= 11 and a >= b + 2:
+            sets_j1 += 1
+            gagnants.append(1)
+        elif b >= 11 and b >= a + 2:
+            sets_j2 += 1
+            gagnants.append(2)
+        else:
+            raise ValueError(f"Score du {NOMS_SETS[i]} set invalide")
+
+    if sets_j1 < 3 and sets_j2 < 3:
+        raise ValueError("Le vainqueur doit avoir gagné au moins 3 sets (meilleur des 5)")
+
+    vainqueur = 1 if sets_j1 == 3 else 2
+
+    # Format du sheet, vu du vainqueur : score du perdant si le vainqueur gagne le set,
+    # -score du vainqueur sinon (-99 si le vainqueur n'a marqué aucun point)
+    scores_v, scores_p = (scores_j1, scores_j2) if vainqueur == 1 else (scores_j2, scores_j1)
+    encodes = []
+    for i, gagnant in enumerate(gagnants):
+        if gagnant == vainqueur:
+            encodes.append(scores_p[i])
+        else:
+            encodes.append(-scores_v[i] if scores_v[i] > 0 else BULLE_PERDANT)
+    encodes += [""] * (len(COLONNES_SETS) - len(encodes))
+    return vainqueur, max(sets_j1, sets_j2), min(sets_j1, sets_j2), encodes
+
+def lire_score_set(valeur):
+    """ "11-7" -> (11, 7) ; cellule vide -> (0, 0)"""
+    if pd.isna(valeur) or str(valeur).strip() == "":
+        return 0, 0
+    morceaux = str(valeur).replace(" ", "").split("-")
+    if len(morceaux) != 2 or not all(m.isdigit() for m in morceaux):
+        raise ValueError(f"Score de set illisible : {valeur!r} (format attendu 11-7)")
+    return int(morceaux[0]), int(morceaux[1])
+
+# Fonctions pour l'import en masse
+##################################
+def lire_fichier_import(fichier, nom_fichier):
+    """Lit un fichier CSV (séparateur , ou ;) ou Excel en DataFrame de texte"""
+    if nom_fichier.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(fichier, dtype=str)
+    else:
+        df = pd.read_csv(fichier, sep=None, engine="python", dtype=str)
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    return df
+
+def valider_import(df, joueurs, date_defaut):
+    """
+    Valide toutes les lignes d'un fichier d'import.
+    Retourne (lignes prêtes pour le sheet resultats_simple, DataFrame des erreurs ligne/joueurs/raison).
+    Les numéros de ligne sont ceux du fichier (en-tête = ligne 1).
+    """
+    manquantes = [c for c in COLONNES_IMPORT[:5] if c not in df.columns]
+    if manquantes:
+        raise ValueError(f"Colonnes manquantes dans le fichier : {', '.join(manquantes)}")
+
+    connus = set(joueurs)
+    valides = []
+    erreurs = []
+    for numero, row in enumerate(df.to_dict("records"), start=2):
+        j1 = str(row.get("joueur_1") or "").strip()
+        j2 = str(row.get("joueur_2") or "").strip()
+        try:
+            for j in (j1, j2):
+                if j not in connus:
+                    raise ValueError(f"Joueur inconnu : {j!r}")
+            if j1 == j2:
+                raise ValueError("Un joueur ne peut pas jouer contre lui-même")
+
+            scores = [lire_score_set(row.get(f"set_{i}")) for i in range(1, 6)]
+            vainqueur, _, _, sets = valider_match([a for a, _ in scores], [b for _, b in scores])
+
+            date = row.get("date")
+            if pd.isna(date) or str(date).strip() == "":
+                date = date_defaut
+            else:
+                date = pd.to_datetime(date, dayfirst=True).strftime(FORMAT_DATE)
+        except ValueError as e:
+            erreurs.append({"Ligne": numero, "Match": f"{j1} vs {j2}", "Erreur": str(e)})
+            continue
+
+        gagnant, perdant = (j1, j2) if vainqueur == 1 else (j2, j1)
+        valides.append([gagnant, perdant] + sets + [date])
+
+    return valides, pd.DataFrame(erreurs, columns=["Ligne", "Match", "Erreur"])
@@ -0,0 +1,72 @@
+# saisons.py
+import base64
+import json
+import zlib
+import pandas as pd
+
+# Résumé d'une saison : une ligne par joueur (sheet saisons)
+COLONNES_RESUME = ["saison", "cloture", "joueur", "rang", "Points", "Victoires", "Défaites", "Sets_gagnés", "Sets_concédés",
+                   "Points_gagnés", "Points_concédés", "Bulles_infligées", "Bulles_concédées"]
+# Archive d'une saison : matchs compressés, découpés en morceaux (sheet archives)
+TAILLE_MORCEAU = 40000  # caractères par cellule (limite Google Sheets : 50 000)
+
+def nom_saison(debut):
+    """Nom d'une saison commençant à la date `debut` : "2025-2026" """
+    return f"{debut.year}-{debut.year + 1}"
+
+# Fonctions d'archivage
+#######################
+def compresser(valeurs):
+    """Lignes du sheet (en-tête compris) -> liste de morceaux base64 d'un JSON compressé"""
+    donnees = base64.b64encode(zlib.compress(json.dumps(valeurs, ensure_ascii=False).encode("utf-8"), 9)).decode("ascii")
+    return [donnees[i:i + TAILLE_MORCEAU] for i in range(0, len(donnees), TAILLE_MORCEAU)] or [""]
+
+def decompresser(morceaux):
+    return json.loads(zlib.decompress(base64.b64decode("".join(morceaux))).decode("utf-8"))
+
+def lignes_archive(saison, valeurs):
+    """Lignes du sheet archives pour une saison : (saison, partie, données)"""
+    return [[saison, partie, morceau] for partie, morceau in enumerate(compresser(valeurs), start=1)]
+
+def lire_archive(archives, saison):
+    """Matchs archivés d'une saison en DataFrame (format du sheet championnat), à partir des records du sheet archives"""
+    # Une clôture rejouée peut avoir réécrit les mêmes parties : la dernière version l'emporte
+    morceaux = {int(r["partie"]): str(r["donnees"]) for r in archives if str(r["saison"]) == saison}
+    if not morceaux:
+        return pd.DataFrame()
+    valeurs = decompresser([morceaux[p] for p in sorted(morceaux)])
+    return pd.DataFrame(valeurs[1:], columns=valeurs[0]) if valeurs else pd.DataFrame()
+
+# Fonctions des résumés
+#######################
+def lignes_resume(saison, cloture, classement):
+    """
+    Lignes du sheet saisons à partir du classement final (index = joueurs dans l'ordre
+    du classement, colonnes de stats_championnat) ; les joueurs sans match sont ignorés.
+    """
+    lignes = []
+    rang = 0
+    for joueur, stats in classement.iterrows():
+        if stats["Victoires"] + stats["Défaites"] == 0:
+            continue
+        rang += 1
+        lignes.append([saison, cloture, joueur, rang] + [int(stats[c]) for c in COLONNES_RESUME[4:]])
+    return lignes
+
+def stats_toutes_saisons(resumes):
+    """
+    Stats cumulées de toutes les saisons clôturées à partir des seuls résumés (sans relire
+    les matchs archivés) : saisons jouées, titres, podiums, meilleur rang et totaux.
+    """
+    if resumes.empty:
+        return pd.DataFrame(columns=["Saisons", "Titres", "Podiums", "Meilleur rang"] + COLONNES_RESUME[4:])
+    resumes = resumes.copy()
+    for c in ["rang"] + COLONNES_RESUME[4:]:
+        resumes[c] = pd.to_numeric(resumes[c], errors="coerce").fillna(0).astype(int)
+    groupes = resumes.groupby("joueur")
+    cumul = groupes[COLONNES_RESUME[4:]].sum()
+    cumul.insert(0, "Saisons", groupes["saison"].nunique())
+    cumul.insert(1, "Titres", groupes["rang"].agg(lambda r: int((r == 1).sum())))
+    cumul.insert(2, "Podiums", groupes["rang"].agg(lambda r: int((r <= 3).sum())))
+    cumul.insert(3, "Meilleur rang", groupes["rang"].min())
+    return cumul.sort_values(["Titres", "Podiums", "Points"], ascending=False)
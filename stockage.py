@@ -0,0 +1,283 @@
+# stockage.py
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from gspread.exceptions import WorksheetNotFound
+from gspread.utils import a1_range_to_grid_range, rowcol_to_a1
+from ordonnanceur import Ordonnanceur
+from saisons import COLONNES_RESUME
+from evenements import COLONNES_EVENEMENTS, COLONNES_INSTANTANES
+
+# Colonnes de chaque table, dans l'ordre des colonnes du Google Sheet
+SCHEMAS = {
+    "joueurs": ["prenom", "nom"],
+    "resultats_simple": ["vainqueur", "adversaire", "Set_1", "Set_2", "Set_3", "Set_4", "Set_5", "date"],
+    "resultats_double": ["vainqueur_1", "vainqueur_2", "adversaire_1", "adversaire_2", "Set_1", "Set_2", "Set_3", "Set_4", "Set_5", "date"],
+    "tournoi": ["tour", "position", "joueur_1", "joueur_2", "vainqueur", "Set_1", "Set_2", "Set_3", "Set_4", "Set_5", "date"],
+    "championnat": ["joueur_1", "joueur_2", "tour n°", "statut", "vainqueur", "adversaire", "Set_1", "Set_2", "Set_3", "Set_4", "Set_5", "date"],
+    "saisons": COLONNES_RESUME,
+    "archives": ["saison", "partie", "donnees"],
+    "evenements": COLONNES_EVENEMENTS,
+    "instantanes": COLONNES_INSTANTANES,
+}
+
+# Tables en ajout seul (recopiées par incréments)
+TABLES_AJOUT_SEUL = ("resultats_simple", "resultats_double", "saisons", "archives", "evenements", "instantanes")
+
+# Index SQLite pour les requêtes par joueur, par date et par match
+INDEX = {
+    "resultats_simple": [["vainqueur"], ["adversaire"], ["date"]],
+    "resultats_double": [["vainqueur_1"], ["vainqueur_2"], ["adversaire_1"], ["adversaire_2"], ["date"]],
+    "tournoi": [["tour", "position"]],
+    "championnat": [["joueur_1", "joueur_2"], ["statut"], ["vainqueur"], ["adversaire"]],
+    "saisons": [["saison"], ["joueur"]],
+    "archives": [["saison"]],
+    "instantanes": [["derniere_ligne"]],
+}
+
+class Stockage(ABC):
+    """
+    Interface de stockage : une feuille par table (joueurs, résultats simple/double,
+    tournoi, championnat, saisons, archives, evenements, instantanes). Chaque feuille expose le sous-ensemble de
+    l'API gspread Worksheet utilisé par l'application : title, get_all_values, get,
+    col_values, append_row, append_rows, update, batch_update et batch_clear.
+    """
+
+    @abstractmethod
+    def feuille(self, nom):
+        """Poignée de la table `nom`, vue comme un worksheet"""
+
+    def horodatage(self):
+        """Jeton qui change à chaque modification des données (None = inconnu : tout relire)"""
+        return None
+
+class StockageSheets(Stockage):
+    """
+    Stockage dans le Google Sheet du club (un worksheet par table).
+    Rien n'est demandé à l'API à la création : le classeur est ouvert au premier accès,
+    et tous les worksheets sont récupérés en une seule lecture des métadonnées.
+    `temps` garde la durée (ms) de ces deux étapes pour le rapport de démarrage.
+    """
+
+    def __init__(self, ouvrir, ordonnanceur=None):
+        self._ouvrir = ouvrir           # fonction sans argument qui retourne le Spreadsheet gspread
+        self.ordonnanceur = ordonnanceur or Ordonnanceur(None, None)
+        self._spreadsheet = None
+        self._worksheets = None
+        self._feuilles = {}
+        self._verrou = threading.RLock()
+        self.temps = {}
+
+    @property
+    def spreadsheet(self):
+        with self._verrou:
+            if self._spreadsheet is None:
+                debut = time.perf_counter()
+                self._spreadsheet = self._ouvrir()
+                self.temps["Ouverture du classeur"] = (time.perf_counter() - debut) * 1000
+            return self._spreadsheet
+
+    def worksheet(self, nom):
+        with self._verrou:
+            if self._worksheets is None:
+                spreadsheet = self.spreadsheet
+                debut = time.perf_counter()
+                self._worksheets = {ws.title: ws for ws in spreadsheet.worksheets()}
+                self.temps["Liste des worksheets"] = (time.perf_counter() - debut) * 1000
+            if nom not in self._worksheets:
+                if nom not in SCHEMAS:
+                    raise WorksheetNotFound(nom)
+                self._worksheets[nom] = self._creer(nom)
+            return self._worksheets[nom]
+
+    def _creer(self, nom):
+        """
+        Tables ajoutées après la création du classeur (saisons, archives, journal) : créées
+        au premier accès, par l'ordonnanceur comme toute autre écriture. La création n'est
+        pas renvoyée si le worksheet est arrivé malgré une erreur serveur.
+        """
+        spreadsheet = self.spreadsheet
+        existe = lambda: nom in [ws.title for ws in spreadsheet.worksheets()]
+        ws = self.ordonnanceur.ajouter(spreadsheet.add_worksheet, nom, rows=100, cols=len(SCHEMAS[nom]), deja_applique=existe)
+        if ws is None:
+            ws = self.ordonnanceur.lire(("worksheet", nom), spreadsheet.worksheet, nom)
+        self.ordonnanceur.ecrire(ws.update, values=[SCHEMAS[nom]], range_name="A1")
+        return ws
+
+    def feuille(self, nom):
+        """Une seule poignée par worksheet : partagée par toutes les sessions du process"""
+        with self._verrou:
+            return self._feuilles.setdefault(nom, FeuilleDifferee(self, nom))
+
+    def horodatage(self):
+        """Date de dernière modification du classeur (métadonnées Drive : une seule petite requête)"""
+        return self.spreadsheet.get_lastUpdateTime()
+
+class FeuilleDifferee:
+    """
+    Poignée de worksheet ouverte au premier appel à l'API. Le titre est connu d'avance :
+    les lectures servies par le cache des feuilles n'ouvrent jamais le worksheet.
+    """
+
+    def __init__(self, stockage, nom):
+        self.stockage = stockage
+        self.title = nom
+
+    def __getattr__(self, attribut):
+        if attribut in ("stockage", "title"):
+            raise AttributeError(attribut)  # objet pas encore initialisé (copie, pickle)
+        return getattr(self.stockage.worksheet(self.title), attribut)
+
+class StockageSQLite(Stockage):
+    """Stockage dans une base SQLite locale (":memory:" pour les tests et benchmarks)"""
+
+    def __init__(self, chemin="ttcv.sqlite"):
+        self.chemin = chemin
+        self.verrou = threading.RLock()
+        self.connexion = sqlite3.connect(chemin, check_same_thread=False)
+        if chemin != ":memory:":
+            self.connexion.execute("PRAGMA journal_mode=WAL")
+        with self.verrou, self.connexion:
+            for nom, colonnes in SCHEMAS.items():
+                definition = ", ".join(f'"{c}" TEXT NOT NULL DEFAULT \'\'' for c in colonnes)
+                # ligne = numéro de ligne équivalent dans le sheet (1 = en-tête)
+                self.connexion.execute(f'CREATE TABLE IF NOT EXISTS "{nom}" (ligne INTEGER PRIMARY KEY, {definition})')
+                for cols in INDEX.get(nom, []):
+                    nom_index = f"idx_{nom}_{'_'.join(cols)}".replace(" ", "_").replace("°", "")
+                    liste = ", ".join(f'"{c}"' for c in cols)
+                    self.connexion.execute(f'CREATE INDEX IF NOT EXISTS "{nom_index}" ON "{nom}" ({liste})')
+
+    def feuille(self, nom):
+        return FeuilleSQLite(self, nom)
+
+    def horodatage(self):
+        """
+        data_version change quand une autre connexion modifie la base, total_changes()
+        à chaque modification faite par celle-ci
+        """
+        with self.verrou:
+            return tuple(self.connexion.execute("SELECT (SELECT data_version FROM pragma_data_version), total_changes()").fetchone())
+
+class FeuilleSQLite:
+    """Table SQLite vue comme un worksheet : ligne 1 = en-tête, données à partir de la ligne 2"""
+
+    def __init__(self, stockage, nom):
+        self.stockage = stockage
+        self.title = nom
+        self.colonnes = SCHEMAS[nom]
+
+    def _lignes(self, debut=2, fin=None):
+        sql = f'SELECT ligne, {", ".join(chr(34) + c + chr(34) for c in self.colonnes)} FROM "{self.title}" WHERE ligne >= ?'
+        params = [debut]
+        if fin is not None:
+            sql += " AND ligne <= ?"
+            params.append(fin)
+        with self.stockage.verrou:
+            resultat = self.stockage.connexion.execute(sql + " ORDER BY ligne", params).fetchall()
+        # Les numéros de ligne sans données correspondent à des lignes vides du sheet
+        lignes = []
+        attendu = debut
+        for ligne, *valeurs in resultat:
+            lignes.extend([""] * len(self.colonnes) for _ in range(ligne - attendu))
+            lignes.append(list(valeurs))
+            attendu = ligne + 1
+        return lignes
+
+    def get_all_values(self):
+        return [list(self.colonnes)] + self._lignes()
+
+    def get(self, plage=None):
+        if plage is None:
+            return self.get_all_values()
+        grille = a1_range_to_grid_range(plage)
+        debut = grille.get("startRowIndex", 0) + 1
+        fin = grille.get("endRowIndex")
+        c0 = grille.get("startColumnIndex", 0)
+        c1 = grille.get("endColumnIndex", len(self.colonnes))
+        lignes = ([list(self.colonnes)] if debut == 1 else []) + self._lignes(max(debut, 2), fin)
+        return [ligne[c0:c1] for ligne in lignes]
+
+    def col_values(self, colonne):
+        return [ligne[colonne - 1] for ligne in self.get_all_values()]
+
+    def append_row(self, ligne, **kwargs):
+        self.append_rows([ligne])
+
+    def append_rows(self, lignes, **kwargs):
+        n = len(self.colonnes)
+        with self.stockage.verrou, self.stockage.connexion as cx:
+            derniere = cx.execute(f'SELECT COALESCE(MAX(ligne), 1) FROM "{self.title}"').fetchone()[0]
+            cx.executemany(
+                f'INSERT INTO "{self.title}" VALUES ({", ".join(["?"] * (n + 1))})',
+                [[derniere + 1 + i] + _ligne_texte(ligne, n) for i, ligne in enumerate(lignes)],
+            )
+        # Même réponse que l'API Sheets : plage où les lignes sont arrivées
+        return {"updates": {"updatedRange": f"{self.title}!A{derniere + 1}:{rowcol_to_a1(derniere + len(lignes), n)}"}}
+
+    def update(self, values=None, range_name=None, **kwargs):
+        """Même signature que gspread 6 : update(values, range_name) ; sans plage, à partir de A1"""
+        with self.stockage.verrou, self.stockage.connexion as cx:
+            self._ecrire(cx, range_name or "A1", values or [])
+
+    def batch_update(self, donnees, **kwargs):
+        """Plusieurs plages en une seule transaction : [{"range": "A2:C3", "values": [[...]]}, ...]"""
+        with self.stockage.verrou, self.stockage.connexion as cx:
+            for bloc in donnees:
+                self._ecrire(cx, bloc["range"], bloc["values"])
+
+    def _ecrire(self, cx, plage, valeurs):
+        """Écrit une plage dans la transaction en cours (validée ou annulée par l'appelant)"""
+        grille = a1_range_to_grid_range(plage)
+        r0 = grille.get("startRowIndex", 0) + 1
+        c0 = grille.get("startColumnIndex", 0)
+        for i, ligne in enumerate(valeurs):
+            numero = r0 + i
+            if numero == 1:
+                continue  # l'en-tête est fixé par le schéma
+            cx.execute(f'INSERT OR IGNORE INTO "{self.title}" (ligne) VALUES (?)', [numero])
+            colonnes = self.colonnes[c0:c0 + len(ligne)]
+            if colonnes:
+                affectations = ", ".join(f'"{c}" = ?' for c in colonnes)
+                cx.execute(f'UPDATE "{self.title}" SET {affectations} WHERE ligne = ?', _ligne_texte(ligne, len(colonnes)) + [numero])
+
+    def batch_clear(self, plages):
+        """Vide des plages ; les lignes vidées sur toute leur largeur sont supprimées"""
+        n = len(self.colonnes)
+        with self.stockage.verrou, self.stockage.connexion as cx:
+            for plage in plages:
+                grille = a1_range_to_grid_range(plage)
+                r0 = max(grille.get("startRowIndex", 0) + 1, 2)
+                r1 = grille.get("endRowIndex", 10 ** 9)
+                c0 = grille.get("startColumnIndex", 0)
+                c1 = min(grille.get("endColumnIndex", n), n)
+                if c0 == 0 and c1 == n:
+                    cx.execute(f'DELETE FROM "{self.title}" WHERE ligne BETWEEN ? AND ?', [r0, r1])
+                elif c0 < c1:
+                    affectations = ", ".join(f'"{c}" = \'\'' for c in self.colonnes[c0:c1])
+                    cx.execute(f'UPDATE "{self.title}" SET {affectations} WHERE ligne BETWEEN ? AND ?', [r0, r1])
+
+def _ligne_texte(ligne, n):
+    """Valeurs stockées comme le sheet les renvoie (texte, "" pour les cellules vides)"""
+    return (["" if v is None else str(v) for v in ligne] + [""] * n)[:n]
+
+def synchroniser_stockages(source, cible, tables=None):
+    """
+    Recopie les tables de `source` vers `cible` (par ex. SQLite -> Google Sheets).
+    Les tables de résultats et d'archives étant en ajout seul, seules les lignes
+    manquantes sont envoyées ; les autres tables sont réécrites en un bloc.
+    """
+    for nom in tables or SCHEMAS:
+        lignes_source = source.feuille(nom).get_all_values()[1:]
+        feuille_cible = cible.feuille(nom)
+        if nom in TABLES_AJOUT_SEUL:
+            deja = len(feuille_cible.get_all_values()) - 1
+            if len(lignes_source) > deja:
+                feuille_cible.append_rows(lignes_source[deja:])
+        else:
+            if lignes_source:
+                feuille_cible.update(values=lignes_source, range_name="A2")
+            # Lignes en trop dans la cible (table vidée à la clôture d'une saison)
+            en_trop = len(feuille_cible.get_all_values()) - 1 - len(lignes_source)
+            if en_trop > 0:
+                feuille_cible.batch_clear([f"A{len(lignes_source) + 2}:{rowcol_to_a1(1, len(SCHEMAS[nom])).rstrip('0123456789')}"])
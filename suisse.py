@@ -0,0 +1,152 @@
+# suisse.py
+import random
+import threading
+from championnat import POINTS_VICTOIRE, POINTS_DEFAITE, EXEMPT, STATUT_EXEMPT
+
+PREFIXE_RONDE = "Ronde"     # "Ronde 3" dans la colonne tour n° : championnat au système suisse
+FENETRE_DEFAUT = 8          # adversaires candidats de part et d'autre dans le classement
+
+class AppariementSuisse:
+    """
+    État d'un championnat au système suisse, tenu à jour par incréments depuis le sheet
+    championnat (mêmes règles que IndexChampionnat) : points, adversaires déjà rencontrés
+    et exemptions. Seules les lignes nouvelles ou modifiées depuis la dernière
+    synchronisation sont appliquées (retrait de l'ancienne version, ajout de la nouvelle) :
+    l'état n'est jamais recalculé depuis tout l'historique.
+    """
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self.generation = None
+        self.nb_lignes = 0
+        self._reinitialiser()
+
+    def _reinitialiser(self):
+        self.joueurs = []
+        self.points = {}
+        self.adversaires = {}   # joueur -> joueurs déjà rencontrés ou programmés
+        self.exemptes = set()
+        self.ronde = 0          # dernière ronde programmée
+        self.a_jouer = 0        # matchs de la dernière ronde encore à jouer
+        self._lignes = {}       # numéro de ligne -> ligne prise en compte
+
+    def synchroniser(self, generation, valeurs):
+        """
+        valeurs : instantané du sheet (en-tête compris). Une génération différente
+        (ligne modifiée : résultat saisi ou rechargement) relit les lignes qui ont changé.
+        """
+        with self._verrou:
+            if len(valeurs) < self.nb_lignes:
+                self._reinitialiser()
+                self.nb_lignes = 1
+            debut = 1 if generation != self.generation else max(self.nb_lignes, 1)
+            for numero in range(debut, len(valeurs)):
+                ligne = list(valeurs[numero]) + [""] * 6
+                if self._lignes.get(numero) != ligne:
+                    if numero in self._lignes:
+                        self._retirer(self._lignes.pop(numero))
+                    self._ajouter(ligne)
+                    self._lignes[numero] = ligne
+            self.generation = generation
+            self.nb_lignes = max(len(valeurs), 1)
+        return self
+
+    def inscrire(self, joueurs):
+        """Inscrit les participants avant la première ronde (ordre conservé)"""
+        with self._verrou:
+            for j in joueurs:
+                self._inscrire(j)
+
+    def _inscrire(self, joueur):
+        if joueur not in self.points:
+            self.joueurs.append(joueur)
+            self.points[joueur] = 0
+            self.adversaires[joueur] = set()
+
+    def _ajouter(self, ligne, signe=1):
+        j1, j2, tour, statut, vainqueur, adversaire = ligne[:6]
+        if not j1 or not str(tour).startswith(PREFIXE_RONDE):
+            return
+        ronde = int(str(tour).split()[-1])
+        self._inscrire(j1)
+        if j2 == EXEMPT:
+            if signe > 0:
+                self.exemptes.add(j1)
+            else:
+                self.exemptes.discard(j1)
+            self.points[j1] += signe * POINTS_VICTOIRE
+        else:
+            self._inscrire(j2)
+            if signe > 0:
+                self.adversaires[j1].add(j2)
+                self.adversaires[j2].add(j1)
+            else:
+                self.adversaires[j1].discard(j2)
+                self.adversaires[j2].discard(j1)
+            if statut == "terminé" and vainqueur in (j1, j2):
+                self.points[vainqueur] += signe * POINTS_VICTOIRE
+                self.points[adversaire] += signe * POINTS_DEFAITE
+        if signe > 0 and ronde > self.ronde:
+            self.ronde, self.a_jouer = ronde, 0
+        if ronde == self.ronde and statut == "à jouer":
+            self.a_jouer += signe
+
+    def _retirer(self, ligne):
+        self._ajouter(ligne, signe=-1)
+
+    def classement(self):
+        """Joueurs du meilleur au moins bon (points, puis ordre d'inscription)"""
+        ordre = {j: k for k, j in enumerate(self.joueurs)}
+        return sorted(self.joueurs, key=lambda j: (-self.points[j], ordre[j]))
+
+    def apparier(self, fenetre=FENETRE_DEFAUT, seed=None):
+        """
+        Appariements de la ronde suivante : liste de (j1, j2) et joueur exempté (ou None).
+        Graphe creux, reconstruit à chaque ronde (les poids dépendent du classement du moment) :
+        chaque joueur n'est relié qu'aux `fenetre` joueurs suivants du classement qu'il n'a pas
+        encore rencontrés, avec un poids d'autant plus fort que les points sont proches. Le
+        couplage de poids maximal (networkx) porte sur O(n x fenetre) arêtes ; s'il laisse des
+        joueurs seuls, la fenêtre est doublée. Lève ValueError si aucun
+        appariement sans revanche n'existe.
+        """
+        import networkx as nx   # import coûteux (~100 ms) : seulement quand une ronde est appariée
+        with self._verrou:
+            classement = self.classement()
+            if seed is not None and self.ronde == 0:
+                random.Random(seed).shuffle(classement)     # première ronde : tirage au sort
+            exempte = None
+            if len(classement) % 2 == 1:
+                # Le moins bien classé qui n'a pas encore été exempté
+                exempte = next((j for j in reversed(classement) if j not in self.exemptes), classement[-1])
+                classement.remove(exempte)
+            rang = {j: k for k, j in enumerate(classement)}
+            while True:
+                graphe = nx.Graph()
+                graphe.add_nodes_from(classement)
+                for k, j in enumerate(classement):
+                    candidats = 0
+                    for autre in classement[k + 1:]:
+                        if autre in self.adversaires[j]:
+                            continue
+                        ecart = self.points[j] - self.points[autre]
+                        # Écart de points au carré d'abord, écart de rang ensuite
+                        graphe.add_edge(j, autre, weight=1_000_000 - 1000 * ecart * ecart - (rang[autre] - k))
+                        candidats += 1
+                        if candidats >= fenetre:
+                            break
+                couplage = nx.max_weight_matching(graphe, maxcardinality=True)
+                if 2 * len(couplage) == len(classement):
+                    break
+                if fenetre >= len(classement):
+                    raise ValueError("Aucun appariement sans revanche possible pour cette ronde")
+                fenetre *= 2
+            paires = sorted((tuple(sorted(p, key=rang.get)) for p in couplage), key=lambda p: rang[p[0]])
+            return paires, exempte
+
+    def lignes_ronde(self, paires, exempte):
+        """Lignes du sheet championnat pour la ronde suivante"""
+        tour = f"{PREFIXE_RONDE} {self.ronde + 1}"
+        lignes = [[j1, j2, tour, "à jouer"] for j1, j2 in paires]
+        if exempte is not None:
+            lignes.append([exempte, EXEMPT, tour, STATUT_EXEMPT])
+        return lignes
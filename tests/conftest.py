@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modules du club à la racine du dépôt (comme pour les pages)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,59 @@
+import pytest
+import utils
+from stockage import StockageSQLite
+from utils import CacheFeuilles, ResultatsIncrementaux
+
+JOUEURS = ["A", "B", "C"]
+
+@pytest.fixture
+def stockage():
+    return StockageSQLite(":memory:")
+
+@pytest.fixture
+def cache(stockage, monkeypatch):
+    # TTL nul : chaque lecture passe par la synchronisation par incréments
+    cache = CacheFeuilles(0, horodatage=stockage.horodatage)
+    monkeypatch.setattr(utils, "get_cache_feuilles", lambda: cache)
+    return cache
+
+def resultat(vainqueur, perdant, jour):
+    return [vainqueur, perdant, 11, 11, 11, 0, 0, f"2025-01-{jour:02d} 20:00:00"]
+
+def test_ajouts_lus_par_increments(stockage, cache):
+    ws = stockage.feuille("resultats_simple")
+    ws.append_rows([resultat("A", "B", 1)])
+    cache.valeurs(ws)
+    utils.ajouter_lignes(ws, [resultat("B", "C", 2)])
+    ws.append_rows([resultat("C", "A", 3)])     # ajout fait hors de l'application
+    valeurs = cache.valeurs(ws)
+    assert [l[0] for l in valeurs[1:]] == ["A", "B", "C"]
+    assert valeurs == ws.get_all_values()
+
+def test_edition_au_milieu_du_sheet(stockage, cache):
+    ws = stockage.feuille("resultats_simple")
+    ws.append_rows([resultat("A", "B", j) for j in range(1, 6)])
+    resultats = ResultatsIncrementaux().synchroniser(ws, JOUEURS)
+    assert resultats.classement.loc["A", "Victoires"] == 5
+
+    # Édition de la ligne 3 (ni la première ni la dernière), sans passer par le cache
+    ws.batch_update([{"range": "A3:B3", "values": [["B", "A"]]}])
+    resultats.synchroniser(ws, JOUEURS)
+    assert cache.valeurs(ws) == ws.get_all_values()
+    assert resultats.classement.loc["A", "Victoires"] == 4
+    assert resultats.classement.loc["B", "Victoires"] == 1
+
+def test_suppression_au_milieu_du_sheet(stockage, cache):
+    ws = stockage.feuille("resultats_simple")
+    ws.append_rows([resultat("A", "B", j) for j in range(1, 6)])
+    cache.valeurs(ws)
+    ws.batch_clear(["A2:H2"])
+    assert cache.valeurs(ws) == ws.get_all_values()
+
+def test_rien_de_change_rien_de_relu(stockage, cache):
+    ws = stockage.feuille("resultats_simple")
+    ws.append_rows([resultat("A", "B", 1)])
+    cache.valeurs(ws)
+    requetes = cache.ordonnanceur.compteurs["requetes"]
+    cache.valeurs(ws)
+    # Seul l'horodatage du stockage est demandé
+    assert cache.ordonnanceur.compteurs["requetes"] == requetes + 1
@@ -0,0 +1,61 @@
+import pandas as pd
+from evenements import Journal, Projection, evenements_manquants, maintenant, resultat, DELAI_RAPPROCHEMENT, FORMAT_DATE
+from ordonnanceur import Ordonnanceur
+from stockage import StockageSQLite
+
+def journal(stockage, intervalle=3):
+    return Journal(Ordonnanceur(None, None), intervalle), stockage.feuille("evenements"), stockage.feuille("instantanes")
+
+def partie(vainqueur, perdant, minute):
+    return resultat("simple", vainqueur, perdant, [11, 11, 11], f"2025-01-01 20:{minute:02d}:00")
+
+def test_restauration_egale_rejeu_complet():
+    stockage = StockageSQLite(":memory:")
+    j, ws_e, ws_i = journal(stockage)
+    for minute in range(8):
+        j.enregistrer(ws_e, ws_i, [partie("A", "B", minute)], joueurs=["A", "B"])
+    assert j.ligne_instantane > 1 and j.ligne > j.ligne_instantane
+
+    restaure, _, _ = journal(stockage)
+    restaure.restaurer(ws_e, ws_i)
+    # Rejeu complet : même journal, sans aucun instantané
+    rejoue, _, sans_instantane = journal(StockageSQLite(":memory:"))
+    rejoue.restaurer(ws_e, sans_instantane)
+    assert restaure.rejoues < rejoue.rejoues
+    assert restaure.projection.vers_dict() == rejoue.projection.vers_dict() == j.projection.vers_dict()
+    assert restaure.projection.classement("simple").loc["A", "Victoires"] == 8
+
+def test_enregistrement_sans_relecture(monkeypatch):
+    stockage = StockageSQLite(":memory:")
+    j, ws_e, ws_i = journal(stockage, intervalle=100)
+    j.enregistrer(ws_e, ws_i, [partie("A", "B", 0)], joueurs=["A", "B"])
+    relectures = []
+    monkeypatch.setattr(j, "_rattraper", lambda ws: relectures.append(ws))
+    j.enregistrer(ws_e, ws_i, [partie("B", "A", 1)], joueurs=["A", "B"])
+    assert relectures == []
+    assert j.ligne == len(ws_e.get_all_values())
+
+def test_lignes_d_un_autre_process_relues():
+    stockage = StockageSQLite(":memory:")
+    j, ws_e, ws_i = journal(stockage, intervalle=100)
+    autre, _, _ = journal(stockage, intervalle=100)
+    j.enregistrer(ws_e, ws_i, [partie("A", "B", 0)], joueurs=["A", "B"])
+    autre.enregistrer(ws_e, ws_i, [partie("C", "A", 1)], joueurs=["A", "C"])
+    j.enregistrer(ws_e, ws_i, [partie("B", "A", 2)])
+    assert j.ligne == len(ws_e.get_all_values())
+    assert j.projection.classement("simple").loc["C", "Victoires"] == 1
+
+def test_rapprochement_retablit_les_resultats_manquants():
+    stockage = StockageSQLite(":memory:")
+    j, ws_e, ws_i = journal(stockage)
+    donnees = {"simple": [["vainqueur", "perdant"], ["A", "B", 11, 11, 11, 0, 0, "2025-01-01 20:00:00"]]}
+    assert j.rapprocher(ws_e, ws_i, donnees) == 1
+    assert j.rapprocher(ws_e, ws_i, donnees) == 0
+    assert not j.a_rapprocher
+
+def test_resultat_recent_laisse_a_la_session():
+    instant = maintenant()
+    recent = (pd.Timestamp(instant) - pd.Timedelta(seconds=DELAI_RAPPROCHEMENT // 2)).strftime(FORMAT_DATE)
+    donnees = {"simple": [["vainqueur", "perdant"], ["A", "B", 11, 11, 11, 0, 0, recent]]}
+    lignes, en_attente = evenements_manquants(Projection(), donnees, instant)
+    assert lignes == [] and en_attente
@@ -0,0 +1,35 @@
+import threading
+import time
+from ordonnanceur import Ordonnanceur
+
+def test_ecriture_seule_envoyee_sans_attendre():
+    ordonnanceur = Ordonnanceur(None, None, fenetre_groupage=1.0)
+    debut = time.perf_counter()
+    assert ordonnanceur.grouper("cle", 1, lambda elements: list(elements)) == [1]
+    assert time.perf_counter() - debut < 0.5
+    assert ordonnanceur.compteurs["lots_sans_attente"] == 1
+
+def test_ecritures_simultanees_groupees():
+    ordonnanceur = Ordonnanceur(None, None, fenetre_groupage=0.2)
+    envois, resultats = [], []
+    liberee = threading.Event()
+
+    def bloquante():
+        liberee.wait()
+
+    # Une autre écriture en cours : le premier arrivé attend la fenêtre
+    autre = threading.Thread(target=ordonnanceur.ecrire, args=(bloquante,))
+    autre.start()
+    time.sleep(0.05)
+    fils = [threading.Thread(target=lambda k=k: resultats.append(ordonnanceur.grouper("cle", k, lambda e: envois.append(list(e)) or len(e))))
+            for k in range(3)]
+    for f in fils:
+        f.start()
+        time.sleep(0.01)
+    for f in fils:
+        f.join()
+    liberee.set()
+    autre.join()
+    assert envois == [[0, 1, 2]]
+    assert resultats == [3, 3, 3]
+    assert ordonnanceur.compteurs["lots_sans_attente"] == 0
@@ -0,0 +1,85 @@
+from gspread.exceptions import APIError
+from ordonnanceur import Ordonnanceur
+from stockage import SCHEMAS, StockageSheets, StockageSQLite, synchroniser_stockages
+
+def simple(vainqueur, perdant, jour):
+    return [vainqueur, perdant, "11", "11", "11", "", "", f"2025-01-{jour:02d} 20:00:00"]
+
+def test_aller_retour_des_lignes():
+    ws = StockageSQLite(":memory:").feuille("resultats_simple")
+    reponse = ws.append_rows([simple("A", "B", 1), simple("B", "C", 2)])
+    assert reponse["updates"]["updatedRange"] == "resultats_simple!A2:H3"
+    ws.append_row(simple("C", "A", 3))
+    assert ws.get_all_values() == [SCHEMAS["resultats_simple"], simple("A", "B", 1), simple("B", "C", 2), simple("C", "A", 3)]
+    assert ws.get("A3:B4") == [["B", "C"], ["C", "A"]]
+    assert ws.col_values(1) == ["vainqueur", "A", "B", "C"]
+
+def test_update_signature_gspread_6():
+    ws = StockageSQLite(":memory:").feuille("joueurs")
+    ws.update(values=[["Ada", "L"], ["Alan", "T"]], range_name="A2")
+    ws.update([["Grace"]], "A3")
+    assert ws.get_all_values() == [["prenom", "nom"], ["Ada", "L"], ["Grace", "T"]]
+
+def test_lignes_videes_et_lignes_vides():
+    ws = StockageSQLite(":memory:").feuille("resultats_simple")
+    ws.append_rows([simple("A", "B", j) for j in range(1, 5)])
+    ws.batch_clear(["A3:H3", "C4:D4"])
+    valeurs = ws.get_all_values()
+    assert valeurs[2] == [""] * 8
+    assert valeurs[3] == ["A", "B", "", "", "11", "", "", "2025-01-03 20:00:00"]
+    assert len(valeurs) == 5
+
+def test_synchronisation_entre_stockages():
+    source, cible = StockageSQLite(":memory:"), StockageSQLite(":memory:")
+    source.feuille("resultats_simple").append_rows([simple("A", "B", 1), simple("B", "A", 2)])
+    source.feuille("joueurs").update(values=[["Ada", "L"], ["Alan", "T"]], range_name="A2")
+    cible.feuille("joueurs").update(values=[["x", "x"], ["y", "y"], ["z", "z"]], range_name="A2")
+    synchroniser_stockages(source, cible)
+    source.feuille("resultats_simple").append_rows([simple("A", "B", 3)])
+    synchroniser_stockages(source, cible, ["resultats_simple"])
+    for nom in SCHEMAS:
+        assert cible.feuille(nom).get_all_values() == source.feuille(nom).get_all_values()
+
+class WorksheetFactice:
+    def __init__(self, title):
+        self.title = title
+        self.valeurs = []
+
+    def update(self, values=None, range_name=None):
+        self.valeurs = values
+
+class ClasseurFactice:
+    """add_worksheet arrive, puis l'API répond 503 une fois"""
+
+    def __init__(self):
+        self.feuilles = {}
+        self.erreurs = 1
+
+    def worksheets(self):
+        return list(self.feuilles.values())
+
+    def worksheet(self, nom):
+        return self.feuilles[nom]
+
+    def add_worksheet(self, nom, rows, cols):
+        self.feuilles[nom] = WorksheetFactice(nom)
+        if self.erreurs:
+            self.erreurs -= 1
+            raise APIError(ReponseFactice())
+        return self.feuilles[nom]
+
+class ReponseFactice:
+    status_code = 503
+    text = "indisponible"
+
+    def json(self):
+        return {"error": {"code": 503, "message": "indisponible", "status": "UNAVAILABLE"}}
+
+def test_creation_d_un_worksheet_par_l_ordonnanceur():
+    classeur = ClasseurFactice()
+    ordonnanceur = Ordonnanceur(None, None, attente=0)
+    stockage = StockageSheets(lambda: classeur, ordonnanceur)
+    ws = stockage.worksheet("evenements")
+    assert ws.valeurs == [SCHEMAS["evenements"]]
+    assert list(classeur.feuilles) == ["evenements"]
+    assert ordonnanceur.compteurs["reprises_evitees"] == 1
@@ -0,0 +1,142 @@
+# tournoi.py
+import random
+from championnat import EXEMPT
+from moteur_stats import COLONNES_SETS
+
+# Colonnes du sheet tournoi : tour, position, joueur_1, joueur_2, vainqueur, Set_1..Set_5, date (A à K)
+COLONNE_VAINQUEUR = "E"
+COLONNE_DATE = "K"
+
+def ordre_tetes_de_serie(taille):
+    """
+    Tête de série placée à chaque position du premier tour (taille = puissance de 2) :
+    la 1 et la 2 ne peuvent se rencontrer qu'en finale, les 1 à 4 qu'en demi-finale, etc.
+    """
+    ordre = [1]
+    while len(ordre) < taille:
+        n = 2 * len(ordre)
+        ordre = [s for t in ordre for s in (t, n + 1 - t)]
+    return ordre
+
+def nom_tour(tour, nb_tours):
+    restants = nb_tours - tour
+    return {0: "Finale", 1: "Demi-finales", 2: "Quarts de finale"}.get(restants, f"{2 ** restants}es de finale")
+
+class Tableau:
+    """
+    Tableau à élimination directe gardé en mémoire sous forme d'arbre compact :
+    un match par nœud, le match (tour, position) alimente (tour + 1, (position + 1) // 2).
+    Chaque match occupe une ligne fixe du sheet (tours dans l'ordre, puis positions), si bien
+    que faire avancer un vainqueur ne touche que la ligne du match et une cellule du suivant.
+    """
+
+    def __init__(self, taille):
+        self.taille = taille                            # joueurs au premier tour (puissance de 2)
+        self.nb_tours = max(taille.bit_length() - 1, 1)
+        # (tour, position) -> [joueur_1, joueur_2, vainqueur, sets, date]
+        self.matchs = {
+            (t, p): ["", "", "", [""] * len(COLONNES_SETS), ""]
+            for t in range(1, self.nb_tours + 1) for p in range(1, self.nb_matchs(t) + 1)
+        }
+
+    def nb_matchs(self, tour):
+        return self.taille >> tour
+
+    def ligne(self, tour, position):
+        """Numéro de ligne du match dans le sheet (ligne 1 = en-tête)"""
+        return 1 + sum(self.nb_matchs(t) for t in range(1, tour)) + position
+
+    def suivant(self, tour, position):
+        """(tour, position, case 0 ou 1) où va le vainqueur ; None après la finale"""
+        if tour == self.nb_tours:
+            return None
+        return tour + 1, (position + 1) // 2, (position + 1) % 2
+
+    @classmethod
+    def creer(cls, joueurs, seed=None):
+        """
+        Tableau pour des joueurs classés du meilleur au moins bon (tirage au sort si seed est
+        donné). Les meilleures têtes de série sont exemptées du premier tour quand le nombre
+        de joueurs n'est pas une puissance de 2.
+        """
+        joueurs = list(dict.fromkeys(joueurs))
+        if len(joueurs) < 2:
+            raise ValueError("Il faut au moins 2 joueurs pour un tableau")
+        if seed is not None:
+            random.Random(seed).shuffle(joueurs)
+        taille = 1 << (len(joueurs) - 1).bit_length()
+        tableau = cls(taille)
+        places = [joueurs[s - 1] if s <= len(joueurs) else EXEMPT for s in ordre_tetes_de_serie(taille)]
+        for position in range(1, taille // 2 + 1):
+            match = tableau.matchs[(1, position)]
+            match[0], match[1] = places[2 * position - 2], places[2 * position - 1]
+            if EXEMPT in match[:2]:
+                tableau._avancer(1, position, match[0] if match[1] == EXEMPT else match[1], [""] * len(COLONNES_SETS), "")
+        return tableau
+
+    @classmethod
+    def depuis_valeurs(cls, valeurs):
+        """Tableau relu depuis le sheet (get_all_values, en-tête compris) ; None s'il est vide"""
+        lignes = [ligne for ligne in valeurs[1:] if ligne and str(ligne[0]).strip()]
+        if not lignes:
+            return None
+        premier_tour = sum(1 for ligne in lignes if str(ligne[0]) == "1")
+        tableau = cls(2 * premier_tour)
+        for ligne in lignes:
+            ligne = list(ligne) + [""] * 11
+            cle = (int(ligne[0]), int(ligne[1]))
+            if cle in tableau.matchs:
+                tableau.matchs[cle] = [ligne[2], ligne[3], ligne[4], list(ligne[5:10]), ligne[10]]
+        return tableau
+
+    def copie(self):
+        """Copie indépendante : le tableau en cache est partagé par toutes les sessions"""
+        tableau = Tableau(self.taille)
+        tableau.matchs = {cle: [m[0], m[1], m[2], list(m[3]), m[4]] for cle, m in self.matchs.items()}
+        return tableau
+
+    def vers_lignes(self):
+        """Toutes les lignes du sheet, dans l'ordre de ligne()"""
+        return [
+            [t, p, m[0], m[1], m[2]] + list(m[3]) + [m[4]]
+            for (t, p), m in sorted(self.matchs.items())
+        ]
+
+    def _avancer(self, tour, position, vainqueur, sets, date):
+        """Enregistre le vainqueur en mémoire ; retourne la case mise à jour au tour suivant"""
+        match = self.matchs[(tour, position)]
+        match[2], match[3], match[4] = vainqueur, list(sets), date
+        suivant = self.suivant(tour, position)
+        if suivant is None:
+            return None
+        t, p, case = suivant
+        self.matchs[(t, p)][case] = vainqueur
+        return suivant
+
+    def enregistrer(self, tour, position, vainqueur, sets, date):
+        """
+        Enregistre le résultat d'un match et qualifie le vainqueur. Retourne les plages A1
+        à écrire dans le sheet : la fin de la ligne du match (vainqueur, sets, date) et la
+        seule case du match suivant qui reçoit le vainqueur.
+        """
+        match = self.matchs[(tour, position)]
+        if vainqueur not in match[:2] or EXEMPT in match[:2] or match[2]:
+            raise ValueError("Ce match ne peut pas recevoir de résultat")
+        suivant = self._avancer(tour, position, vainqueur, sets, date)
+        ligne = self.ligne(tour, position)
+        plages = [(f"{COLONNE_VAINQUEUR}{ligne}:{COLONNE_DATE}{ligne}", [[vainqueur] + list(sets) + [date]])]
+        if suivant is not None:
+            t, p, case = suivant
+            plages.append((f"{'CD'[case]}{self.ligne(t, p)}", [[vainqueur]]))
+        return plages
+
+    def a_jouer(self):
+        """Matchs dont les deux joueurs sont connus et sans résultat : liste de (tour, position, j1, j2)"""
+        return [
+            (t, p, m[0], m[1]) for (t, p), m in sorted(self.matchs.items())
+            if m[0] and m[1] and EXEMPT not in m[:2] and not m[2]
+        ]
+
+    @property
+    def champion(self):
+        return self.matchs[(self.nb_tours, 1)][2] or None
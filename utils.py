@@ -1,23 +1,832 @@
 # utils.py
+import time
+_DEBUT_IMPORTS = time.perf_counter()
+import sqlite3
+import threading
+from contextlib import contextmanager
 import streamlit as st
 import gspread
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+import numpy as np
+import pandas as pd
+from gspread.exceptions import APIError, GSpreadException
+from gspread.utils import a1_range_to_grid_range, numericise_all, rowcol_to_a1, to_records
+from moteur_stats import COLONNES_STATS, IndexDates, MatchsCompacts, agreger_codes, tableau_classement
+from stockage import StockageSheets, StockageSQLite
+from ordonnanceur import Ordonnanceur, lignes_en_fin, LECTURES_PAR_MINUTE_DEFAUT, ECRITURES_PAR_MINUTE_DEFAUT, FENETRE_GROUPAGE_DEFAUT
+from rafraichisseur import Rafraichisseur, INTERVALLE_DEFAUT
+from mesures import MESURES, demarrer_export, ADRESSE_EXPORT_DEFAUT
+
+# Durée d'import de utils et de ses dépendances (numpy, pandas, gspread, modules du club) ;
+# les modules propres à une fonctionnalité (Elo, système suisse, championnat, journal) sont
+# importés par les fonctions qui s'en servent
+TEMPS_IMPORTS = (time.perf_counter() - _DEBUT_IMPORTS) * 1000
+
+TTL_CACHE_DEFAUT = 120  # secondes, surchargeable via [cache] ttl = ... dans les secrets
+RECHARGEMENT_COMPLET_DEFAUT = 15 * 60  # secondes, via [cache] rechargement_complet = ...
+FICHIER_ELO_DEFAUT = "elo_{variante}.json"  # point de reprise Elo, via [elo] fichier = ...
+TAILLE_POOL_HTTP = 20  # connexions keep-alive vers l'API Google partagées par toutes les sessions
+TIMEOUT_HTTP = (5, 30)  # secondes (connexion, lecture)
+VERIFICATION_PAGES = 5  # secondes entre deux comparaisons (en mémoire) des versions par une page ouverte
+
+# Échecs d'une lecture ou d'une écriture du stockage : API Sheets, transport HTTP (connexion, délai) ou SQLite
+ERREURS_STOCKAGE = (GSpreadException, RequestException, sqlite3.Error)
+
+# Worksheets alimentés uniquement par append_row : synchronisés par incréments
+FEUILLES_AJOUT_SEUL = {"resultats_simple", "resultats_double", "saisons", "archives"}
 
 def init_google_sheets():
-    """Initialise la connexion Google Sheets si nécessaire"""
+    """Initialise la connexion au stockage (Google Sheets ou SQLite local) si nécessaire"""
+    get_export_mesures()
     if 'sheets_loaded' not in st.session_state:
-        gc = gspread.service_account_from_dict(st.secrets["gcp_service_account"])
-        sh = gc.open_by_key(st.secrets["sheet"]["id"])
-        
-        # Charger tous les worksheets
-        st.session_state.sheet_joueurs = sh.worksheet("joueurs")
-        st.session_state.sheet_resultats_simp = sh.worksheet("resultats_simple")
-        st.session_state.sheet_resultats_doub = sh.worksheet("resultats_double")
-        st.session_state.sheet_tournoi = sh.worksheet("tournoi")
-        st.session_state.sheet_championnat = sh.worksheet("championnat")
-        
-        # Charger les joueurs
-        prenoms = st.session_state.sheet_joueurs.col_values(1)[1:]
-        noms = st.session_state.sheet_joueurs.col_values(2)[1:]
-        st.session_state.liste_joueurs_complet = [f"{p} {n}" for p, n in zip(prenoms, noms)]
-        
-        st.session_state.sheets_loaded = True
\ No newline at end of file
+        with chrono("Connexion au stockage"):
+            stockage = get_stockage()
+        st.session_state.stockage = stockage
+        get_cache_feuilles().horodatage = stockage.horodatage
+        get_rafraichisseur(stockage)
+
+        # Poignées des worksheets : ouvertes au premier appel à l'API (Google Sheets)
+        st.session_state.sheet_joueurs = stockage.feuille("joueurs")
+        st.session_state.sheet_resultats_simp = stockage.feuille("resultats_simple")
+        st.session_state.sheet_resultats_doub = stockage.feuille("resultats_double")
+        st.session_state.sheet_tournoi = stockage.feuille("tournoi")
+        st.session_state.sheet_championnat = stockage.feuille("championnat")
+        st.session_state.sheet_saisons = stockage.feuille("saisons")
+        st.session_state.sheet_archives = stockage.feuille("archives")
+        st.session_state.sheet_evenements = stockage.feuille("evenements")
+        st.session_state.sheet_instantanes = stockage.feuille("instantanes")
+
+        # Charger les joueurs (depuis le cache partagé)
+        with chrono("Lecture des joueurs"):
+            joueurs = lire_valeurs(st.session_state.sheet_joueurs)[1:]
+        st.session_state.liste_joueurs_complet = [f"{row[0]} {row[1]}" for row in joueurs if len(row) >= 2]
+
+        st.session_state.sheets_loaded = True
+
+def get_stockage():
+    """
+    Choisit le stockage selon la section [stockage] des secrets :
+    type = "sqlite" (chemin = "...") pour une base locale, Google Sheets sinon.
+    """
+    config = st.secrets.get("stockage", {})
+    if config.get("type") == "sqlite":
+        return get_stockage_sqlite(config.get("chemin", "ttcv.sqlite"))
+    return get_stockage_sheets(st.secrets["sheet"]["id"])
+
+@st.cache_resource
+def get_stockage_sqlite(chemin):
+    """Une seule connexion SQLite par process"""
+    return StockageSQLite(chemin)
+
+@st.cache_resource
+def get_client_sheets():
+    """
+    Client gspread unique pour le process : une seule authentification, une session HTTP
+    keep-alive avec un pool de connexions partagé par toutes les sessions, et un jeton
+    renouvelé en arrière-plan avant son expiration (google-auth).
+    """
+    gc = gspread.service_account_from_dict(st.secrets["gcp_service_account"])
+    gc.http_client.auth.with_non_blocking_refresh()
+    gc.http_client.session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=TAILLE_POOL_HTTP))
+    gc.http_client.set_timeout(TIMEOUT_HTTP)
+    return gc
+
+@st.cache_resource
+def get_stockage_sheets(cle):
+    """Classeur et poignées de worksheets partagés par toutes les sessions"""
+    return StockageSheets(lambda: get_client_sheets().open_by_key(cle), get_ordonnanceur())
+
+###########################
+# Temps de démarrage      #
+###########################
+
+@contextmanager
+def chrono(etape):
+    """Mesure une étape du chargement de la page pour le rapport de démarrage"""
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        duree = time.perf_counter() - debut
+        st.session_state.setdefault("temps_demarrage", {})[etape] = duree * 1000
+        MESURES.enregistrer(f"chargement.{etape}", duree)
+
+def rapport_demarrage():
+    """
+    Affiche dans la barre latérale le temps passé par étape jusqu'au premier affichage
+    (avec ?temps=1 dans l'URL ou [debug] temps_demarrage = true dans les secrets).
+    Le rapport est figé au premier affichage de la session.
+    """
+    if st.query_params.get("temps") != "1" and not st.secrets.get("debug", {}).get("temps_demarrage", False):
+        return
+    if "rapport_demarrage" not in st.session_state:
+        temps = {"Import des modules (une fois par process)": TEMPS_IMPORTS}
+        temps.update(st.session_state.get("temps_demarrage", {}))
+        stockage = st.session_state.get("stockage")
+        for etape, duree in getattr(stockage, "temps", {}).items():
+            temps[f"dont {etape.lower()}"] = duree
+        st.session_state.rapport_demarrage = pd.DataFrame({"Étape": list(temps), "ms": [round(t, 1) for t in temps.values()]})
+    with st.sidebar.expander("⏱️ Temps de démarrage", expanded=True):
+        rapport = st.session_state.rapport_demarrage
+        st.dataframe(rapport, hide_index=True, use_container_width=True)
+        st.caption(f"Total mesuré : {rapport.loc[~rapport['Étape'].str.startswith('dont '), 'ms'].sum():.0f} ms")
+
+##########################
+# Cache des worksheets   #
+##########################
+
+class CacheFeuilles:
+    """
+    Instantanés des worksheets partagés par toutes les sessions du process.
+    Chaque worksheet est téléchargé au plus une fois par TTL ; les écritures faites
+    par l'application via ce cache mettent l'instantané à jour sans le re-télécharger.
+    Tous les appels à l'API passent par l'ordonnanceur (quota, fusion, lots, reprises).
+    """
+
+    def __init__(self, ttl, rechargement_complet=RECHARGEMENT_COMPLET_DEFAUT, ordonnanceur=None, horodatage=None):
+        self.ttl = ttl
+        self.horodatage = horodatage    # fonction sans argument (Stockage.horodatage) ; None = pas de contrôle global
+        self.rechargement_complet = rechargement_complet
+        self.ordonnanceur = ordonnanceur or Ordonnanceur(None, None)
+        self.perimes_servis = 0     # lectures servies depuis un instantané périmé après une erreur de l'API
+        self._verrou = threading.Lock()
+        self._verrous = {}      # titre -> verrou du worksheet
+        self._valeurs = {}      # titre -> lignes brutes (en-tête incluse)
+        self._records = {}      # titre -> records dérivés des valeurs
+        self._dates = {}        # titre -> date de la dernière synchronisation
+        self._dates_completes = {}  # titre -> date du dernier téléchargement complet
+        self._generations = {}  # titre -> incrémenté à chaque fois que des lignes existantes changent
+        self._feuilles = {}     # titre -> poignée du worksheet (pour le rafraîchisseur)
+        self._ecritures = 0     # écritures faites par l'application via ce cache
+        self._jetons = {}       # titre -> (horodatage du stockage, écritures) à la dernière synchronisation
+
+    def _verrou_feuille(self, titre):
+        with self._verrou:
+            return self._verrous.setdefault(titre, threading.RLock())
+
+    def _est_frais(self, titre):
+        return titre in self._valeurs and time.monotonic() - self._dates[titre] < self.ttl
+
+    def _jeton(self):
+        """(horodatage du stockage, écritures de l'application) ; None si le stockage ne sait pas le dire"""
+        if self.horodatage is None:
+            return None
+        ecritures = self._ecritures
+        try:
+            jeton = self.ordonnanceur.lire(("horodatage",), self.horodatage)
+        except ERREURS_STOCKAGE:
+            return None
+        return None if jeton is None else (jeton, ecritures)
+
+    def _charger(self, ws, jeton=None):
+        titre = ws.title
+        self._jetons[titre] = jeton if jeton is not None else self._jeton()
+        self._valeurs[titre] = self.ordonnanceur.lire(("valeurs", titre), ws.get_all_values)
+        self._records.pop(titre, None)
+        self._dates[titre] = self._dates_completes[titre] = time.monotonic()
+        self._generations[titre] = self._generations.get(titre, 0) + 1
+
+    def _synchroniser(self, ws):
+        """
+        Ne télécharge que les lignes ajoutées depuis la dernière synchronisation.
+        L'horodatage du stockage est comparé d'abord : inchangé, rien n'est relu ;
+        changé sans qu'aucune écriture de l'application ne l'explique (édition ou
+        suppression faite ailleurs, n'importe où dans le sheet), on repasse par un
+        téléchargement complet. Sinon la dernière ligne connue est relue avec les
+        nouvelles : si elle a changé, téléchargement complet aussi. Une modification
+        extérieure simultanée d'une écriture de l'application est rattrapée par le
+        rechargement complet périodique.
+        """
+        titre = ws.title
+        jeton, precedent = self._jeton(), self._jetons.get(titre)
+        if jeton is not None and precedent is not None:
+            if jeton == precedent:
+                self._dates[titre] = time.monotonic()
+                return
+            if jeton[1] == precedent[1]:
+                self._charger(ws, jeton)
+                return
+        lignes = self._valeurs[titre]
+        largeur = len(lignes[0])
+        if largeur == 0:
+            self._charger(ws, jeton)
+            return
+        derniere = rowcol_to_a1(len(lignes), 1)
+        fin = rowcol_to_a1(1, largeur).rstrip("0123456789")
+        plage = f"{derniere}:{fin}"
+        bloc = [_normaliser(ligne, largeur) for ligne in self.ordonnanceur.lire(("plage", titre, plage), ws.get, plage)]
+        if not bloc or bloc[0] != _normaliser(lignes[-1], largeur):
+            self._charger(ws, jeton)
+            return
+        if len(bloc) > 1:
+            lignes.extend(bloc[1:])
+            self._records.pop(titre, None)
+        self._dates[titre] = time.monotonic()
+        self._jetons[titre] = jeton
+
+    def _actualiser(self, ws, force=False):
+        titre = ws.title
+        self._feuilles[titre] = ws
+        if not force and self._est_frais(titre):
+            return
+        incremental = (
+            titre in FEUILLES_AJOUT_SEUL
+            and self._valeurs.get(titre)
+            and time.monotonic() - self._dates_completes[titre] < self.rechargement_complet
+        )
+        try:
+            if incremental:
+                self._synchroniser(ws)
+            else:
+                self._charger(ws)
+        except APIError:
+            # Quota épuisé malgré les reprises : mieux vaut un instantané un peu ancien qu'une page en erreur
+            if not self._valeurs.get(titre):
+                raise
+            self.perimes_servis += 1
+
+    def valeurs(self, ws):
+        """Retourne les valeurs brutes du worksheet (équivalent de get_all_values)"""
+        with self._verrou_feuille(ws.title):
+            self._actualiser(ws)
+            return self._valeurs[ws.title]
+
+    def instantane(self, ws):
+        """Retourne (génération, copie de la liste des lignes) pour les consommateurs incrémentaux"""
+        with self._verrou_feuille(ws.title):
+            self._actualiser(ws)
+            return self._generations[ws.title], list(self._valeurs[ws.title])
+
+    def version(self, ws):
+        """(génération, nombre de lignes) de l'instantané : change à chaque écriture ou rechargement"""
+        with self._verrou_feuille(ws.title):
+            self._actualiser(ws)
+            return self._generations[ws.title], len(self._valeurs[ws.title])
+
+    def records(self, ws):
+        """Retourne les lignes sous forme de dictionnaires (équivalent de get_all_records)"""
+        titre = ws.title
+        with self._verrou_feuille(titre):
+            valeurs = self.valeurs(ws)
+            if titre not in self._records:
+                self._records[titre] = _records(valeurs[0], valeurs[1:]) if valeurs else []
+            return self._records[titre]
+
+    def titres(self):
+        """Worksheets dont un instantané est en cache"""
+        with self._verrou:
+            return [t for t in self._feuilles if t in self._valeurs]
+
+    def feuille(self, titre):
+        return self._feuilles[titre]
+
+    def prolonger(self, titre):
+        """Rien n'a changé dans le classeur : l'instantané reste valable un TTL de plus, sans relecture"""
+        with self._verrou_feuille(titre):
+            if titre in self._valeurs:
+                self._dates[titre] = time.monotonic()
+
+    def rafraichir(self, ws):
+        """
+        Relit un worksheet déjà en cache sans attendre la fin du TTL (par incréments pour
+        les feuilles en ajout seul). Retourne True si son contenu a changé ; sinon
+        l'instantané garde sa génération et ses records.
+        """
+        titre = ws.title
+        with self._verrou_feuille(titre):
+            if titre not in self._valeurs:
+                return False
+            avant = list(self._valeurs[titre])
+            generation, records = self._generations[titre], self._records.get(titre)
+            self._actualiser(ws, force=True)
+            if self._valeurs[titre] != avant:
+                return True
+            self._generations[titre] = generation
+            if records is not None:
+                self._records[titre] = records
+            return False
+
+    def invalider(self, titre=None):
+        """Oublie l'instantané d'un worksheet (ou de tous)"""
+        with self._verrou:
+            titres = list(self._valeurs) if titre is None else [titre]
+            for t in titres:
+                self._valeurs.pop(t, None)
+                self._records.pop(t, None)
+                self._dates.pop(t, None)
+                self._dates_completes.pop(t, None)
+
+    def ajouter_lignes(self, ws, lignes):
+        """
+        Ajoute des lignes en fin de worksheet puis dans l'instantané. Les ajouts simultanés
+        sur le même worksheet partent en un seul append_rows, dans l'ordre d'arrivée.
+        """
+        titre = ws.title
+
+        def envoyer(lots):
+            toutes = [ligne for lot in lots for ligne in lot]
+            self._compter_ecriture()
+            self.ordonnanceur.ajouter(ws.append_rows, toutes, deja_applique=lambda: lignes_en_fin(ws, toutes))
+            with self._verrou_feuille(titre):
+                if titre in self._valeurs:
+                    self._valeurs[titre].extend([_en_texte(ligne) for ligne in toutes])
+                    self._records.pop(titre, None)
+
+        self.ordonnanceur.grouper(("ajout", titre), lignes, envoyer)
+
+    def mettre_a_jour(self, ws, plage, valeurs):
+        """
+        Écrit une plage A1 dans le worksheet puis la recopie dans l'instantané. Les mises
+        à jour simultanées du même worksheet partent en un seul batch_update.
+        Retourne la nouvelle génération de l'instantané (None s'il n'était pas en cache).
+        """
+        return self.mettre_a_jour_plages(ws, [(plage, valeurs)])
+
+    def mettre_a_jour_plages(self, ws, plages):
+        """Comme mettre_a_jour pour une liste de (plage, valeurs), envoyées dans le même batch_update"""
+        titre = ws.title
+
+        def envoyer(lots):
+            toutes = [plage for lot in lots for plage in lot]
+            self._compter_ecriture()
+            self.ordonnanceur.ecrire(ws.batch_update, [{"range": p, "values": v} for p, v in toutes])
+            with self._verrou_feuille(titre):
+                if titre not in self._valeurs:
+                    return None
+                for p, v in toutes:
+                    self._recopier(titre, p, v)
+                self._records.pop(titre, None)
+                self._generations[titre] += 1
+                return self._generations[titre]
+
+        return self.ordonnanceur.grouper(("mise_a_jour", titre), list(plages), envoyer)
+
+    def effacer(self, ws, premiere_ligne):
+        """
+        Vide le worksheet à partir de `premiere_ligne` (une seule requête batch_clear)
+        et tronque l'instantané en conséquence.
+        """
+        titre = ws.title
+        with self._verrou_feuille(titre):
+            largeur = len(self._valeurs[titre][0]) if self._valeurs.get(titre) else 26
+            fin = rowcol_to_a1(1, largeur).rstrip("0123456789")
+            self._compter_ecriture()
+            self.ordonnanceur.ecrire(ws.batch_clear, [f"A{premiere_ligne}:{fin}"])
+            if titre in self._valeurs:
+                del self._valeurs[titre][premiere_ligne - 1:]
+                self._records.pop(titre, None)
+                self._generations[titre] += 1
+
+    def _compter_ecriture(self):
+        # Compté avant l'envoi : un doute ne peut conduire qu'à un téléchargement complet de trop
+        with self._verrou:
+            self._ecritures += 1
+
+    def _recopier(self, titre, plage, valeurs):
+        grille = a1_range_to_grid_range(plage)
+        lignes = self._valeurs[titre]
+        for i, ligne in enumerate(valeurs):
+            r = grille.get("startRowIndex", 0) + i
+            while len(lignes) <= r:
+                lignes.append([])
+            for j, valeur in enumerate(ligne):
+                c = grille.get("startColumnIndex", 0) + j
+                if len(lignes[r]) <= c:
+                    lignes[r].extend([""] * (c + 1 - len(lignes[r])))
+                lignes[r][c] = _en_texte([valeur])[0]
+
+def _en_texte(ligne):
+    """Convertit une ligne écrite en valeurs telles que relues par get_all_values"""
+    return ["" if v is None else str(v) for v in ligne]
+
+def _normaliser(ligne, largeur):
+    return (list(ligne) + [""] * largeur)[:largeur]
+
+def _records(entete, lignes):
+    """Même conversion que get_all_records (valeurs numériques converties)"""
+    return to_records(entete, [numericise_all(_normaliser(ligne, len(entete))) for ligne in lignes])
+
+@st.cache_resource
+def get_cache_feuilles():
+    """Cache unique pour tout le process (partagé entre les sessions)"""
+    config = st.secrets.get("cache", {})
+    return CacheFeuilles(config.get("ttl", TTL_CACHE_DEFAUT), config.get("rechargement_complet", RECHARGEMENT_COMPLET_DEFAUT), get_ordonnanceur())
+
+@st.cache_resource
+def get_ordonnanceur():
+    """
+    Ordonnanceur unique des requêtes vers l'API, réglé par la section [quota] des secrets
+    (lectures_par_minute, ecritures_par_minute, fenetre_groupage en secondes). Pas de quota
+    pour le stockage SQLite.
+    """
+    config = st.secrets.get("quota", {})
+    fenetre = config.get("fenetre_groupage", FENETRE_GROUPAGE_DEFAUT)
+    if st.secrets.get("stockage", {}).get("type") == "sqlite":
+        return Ordonnanceur(None, None, fenetre_groupage=fenetre)
+    return Ordonnanceur(config.get("lectures_par_minute", LECTURES_PAR_MINUTE_DEFAUT), config.get("ecritures_par_minute", ECRITURES_PAR_MINUTE_DEFAUT),
+                        fenetre_groupage=fenetre)
+
+def lire_valeurs(ws):
+    return get_cache_feuilles().valeurs(ws)
+
+def lire_records(ws):
+    return get_cache_feuilles().records(ws)
+
+def version_feuille(ws):
+    return get_cache_feuilles().version(ws)
+
+def ajouter_ligne(ws, ligne):
+    get_cache_feuilles().ajouter_lignes(ws, [ligne])
+
+def ajouter_lignes(ws, lignes):
+    get_cache_feuilles().ajouter_lignes(ws, lignes)
+
+def mettre_a_jour(ws, plage, valeurs):
+    return get_cache_feuilles().mettre_a_jour(ws, plage, valeurs)
+
+def mettre_a_jour_plages(ws, plages):
+    return get_cache_feuilles().mettre_a_jour_plages(ws, plages)
+
+def effacer(ws, premiere_ligne=2):
+    get_cache_feuilles().effacer(ws, premiere_ligne)
+
+def ecrire_bloc(ws, premiere_ligne, lignes):
+    """
+    Écrit un bloc de lignes à partir de `premiere_ligne` en une seule requête, puis
+    relit la plage pour vérifier que tout est arrivé. Une plage explicite (plutôt
+    qu'un append) rend l'écriture rejouable sans créer de doublons.
+    """
+    largeur = max(len(ligne) for ligne in lignes)
+    plage = f"A{premiere_ligne}:{rowcol_to_a1(premiere_ligne + len(lignes) - 1, largeur)}"
+    mettre_a_jour(ws, plage, [list(ligne) for ligne in lignes])
+
+    relu = [_normaliser(ligne, largeur) for ligne in get_ordonnanceur().lire(("plage", ws.title, plage), ws.get, plage)]
+    attendu = [_normaliser(_en_texte(ligne), largeur) for ligne in lignes]
+    if relu != attendu:
+        get_cache_feuilles().invalider(ws.title)
+        manquantes = sum(1 for a, b in zip(attendu, relu + [[]] * len(attendu)) if a != b)
+        raise GSpreadException(f"{manquantes} ligne(s) sur {len(lignes)} mal écrite(s) dans {ws.title}")
+
+###########################################
+# Résultats synchronisés par incréments   #
+###########################################
+
+class ResultatsIncrementaux:
+    """
+    Résultats d'un worksheet en ajout seul, gardés sous forme compacte (MatchsCompacts),
+    avec les stats par joueur. Seules les lignes nouvelles depuis la dernière
+    synchronisation sont converties et agrégées ; si le cache a rechargé le worksheet
+    en entier, tout est reconstruit. Le classement de tout l'historique est matérialisé
+    à la synchronisation qui suit une écriture : les lectures le reçoivent tout prêt.
+    Chaque synchronisation publie d'un bloc un nouvel état (matchs, stats, classement,
+    dérivés) qui n'est plus modifié ensuite : une lecture concurrente voit l'ancien ou le
+    nouveau, jamais un mélange des deux.
+    """
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self.generation = None
+        self.nb_lignes = 0
+        # classement = (joueurs, tableau mis en forme) ou None ; dérivés = DataFrame et index des dates, construits à la demande
+        self._etat = (MatchsCompacts(), np.zeros((0, len(COLONNES_STATS)), dtype=np.int64), None, {})
+
+    def synchroniser(self, ws, joueurs=()):
+        """Les identifiants suivent l'ordre de `joueurs` (sheet joueurs) à la reconstruction"""
+        generation, valeurs = get_cache_feuilles().instantane(ws)
+        with self._verrou:
+            matchs, stats, classement, derives = self._etat
+            if generation != self.generation or len(valeurs) < self.nb_lignes:
+                matchs = MatchsCompacts(joueurs)
+                stats = np.zeros((len(matchs.noms), len(COLONNES_STATS)), dtype=np.int64)
+                classement, derives = None, {}
+                self.nb_lignes = 1
+            if valeurs and len(valeurs) > self.nb_lignes:
+                ajout = self._ajouter(matchs, stats, valeurs[0], valeurs[self.nb_lignes:])
+                if ajout is not None:
+                    (matchs, stats), classement, derives = ajout, None, {}
+            if joueurs and (classement is None or classement[0] != tuple(joueurs)):
+                classement = (tuple(joueurs), tableau_classement(self._tableau_stats(matchs, stats, joueurs)))
+            self._etat = (matchs, stats, classement, derives)
+            self.generation = generation
+            self.nb_lignes = max(len(valeurs), 1)
+        return self
+
+    @staticmethod
+    def _ajouter(matchs, stats, entete, lignes):
+        """Nouveaux (matchs, stats) avec les lignes ajoutées ; les objets reçus ne sont pas modifiés"""
+        nouveau = pd.DataFrame(_records(entete, lignes), columns=entete)
+        if not {"vainqueur", "adversaire"} <= set(nouveau.columns):
+            return None
+        matchs = matchs.copie()
+        debut = len(matchs)
+        matchs.ajouter_dataframe(nouveau, strict=False)
+        n = len(matchs.noms)
+        increment = agreger_codes(matchs.vainqueurs[debut:], matchs.perdants[debut:], matchs.sets[debut:], n)
+        return matchs, np.vstack([stats, np.zeros((n - len(stats), len(COLONNES_STATS)), dtype=np.int64)]) + increment
+
+    @property
+    def matchs(self):
+        return self._etat[0]
+
+    @property
+    def stats(self):
+        return self._etat[1]
+
+    @property
+    def df(self):
+        """DataFrame au format du sheet, reconstruit à la demande depuis la forme compacte"""
+        matchs, _, _, derives = self._etat
+        if "df" not in derives:
+            derives["df"] = matchs.vers_dataframe()
+        return derives["df"]
+
+    @property
+    def index_dates(self):
+        """Index des stats par période, reconstruit à la demande quand des matchs ont été ajoutés"""
+        matchs, _, _, derives = self._etat
+        if "index_dates" not in derives:
+            derives["index_dates"] = IndexDates(matchs)
+        return derives["index_dates"]
+
+    @staticmethod
+    def _tableau_stats(matchs, stats, joueurs):
+        tableau = pd.DataFrame(stats, index=pd.Index(matchs.noms, dtype=object), columns=COLONNES_STATS)
+        return tableau.reindex(pd.Index(joueurs).drop_duplicates(), fill_value=0)
+
+    def stats_joueurs(self, joueurs):
+        """Stats par joueur pour la liste demandée (0 pour les joueurs sans match)"""
+        matchs, stats = self._etat[:2]
+        return self._tableau_stats(matchs, stats, joueurs)
+
+    @property
+    def classement(self):
+        """Classement de tout l'historique (tableau_classement) pour les joueurs de la dernière synchronisation"""
+        matchs, stats, classement, _ = self._etat
+        return classement[1] if classement else tableau_classement(self._tableau_stats(matchs, stats, []))
+
+@st.cache_resource
+def get_resultats_incrementaux(titre):
+    """Une instance par worksheet, partagée par toutes les sessions"""
+    return ResultatsIncrementaux()
+
+@st.cache_resource
+def get_classement_elo(variante):
+    """Classement Elo partagé par toutes les sessions, repris depuis le dernier point sauvegardé"""
+    from elo import ClassementElo, K_DEFAUT
+    config = st.secrets.get("elo", {})
+    chemin = config.get("fichier", FICHIER_ELO_DEFAUT).format(variante=variante)
+    return ClassementElo.charger(chemin, variante, config.get("k", K_DEFAUT)), chemin
+
+def notes_elo(ws, joueurs, variante="classique"):
+    """
+    DataFrame Elo / Parties par joueur. Seuls les matchs ajoutés depuis le dernier appel
+    sont appliqués ; le point de reprise est sauvegardé quand il a changé.
+    """
+    elo, chemin = get_classement_elo(variante)
+    avant = elo.nb_lignes
+    generation, valeurs = get_cache_feuilles().instantane(ws)
+    # Après un rechargement complet (ou au démarrage), tout l'historique est revérifié
+    reconstruit = elo.synchroniser(valeurs, verifier=generation != elo.generation)
+    elo.generation = generation
+    if reconstruit or elo.nb_lignes != avant:
+        try:
+            elo.sauvegarder(chemin)
+        except OSError:
+            pass    # système de fichiers en lecture seule : le classement reste en mémoire
+    classement = pd.DataFrame(elo.classement(pd.Index(joueurs).drop_duplicates()), columns=["Joueur", "Elo", "Parties"])
+    return classement.set_index("Joueur")
+
+####################################
+# Index des matchs du championnat  #
+####################################
+
+class IndexChampionnat:
+    """
+    Index paire de joueurs (non ordonnée) -> [numéro de ligne du sheet, statut].
+    Construit une fois depuis l'instantané du cache puis tenu à jour à chaque
+    résultat enregistré : la saisie n'a plus besoin de relire le worksheet.
+    """
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self.generation = None
+        self.nb_lignes = 0
+        self.matchs = {}    # frozenset({j1, j2}) -> liste de [ligne, statut]
+
+    def synchroniser(self, ws):
+        generation, valeurs = get_cache_feuilles().instantane(ws)
+        with self._verrou:
+            if generation != self.generation or len(valeurs) < self.nb_lignes:
+                self.matchs = {}
+                self.nb_lignes = 1
+            for i, row in enumerate(valeurs[self.nb_lignes:], start=self.nb_lignes + 1):
+                if len(row) > 3:
+                    self.matchs.setdefault(frozenset((row[0], row[1])), []).append([i, row[3]])
+            self.generation = generation
+            self.nb_lignes = max(len(valeurs), 1)
+        return self
+
+    def ligne_a_jouer(self, j1, j2):
+        """Numéro de ligne du match (j1, j2) encore à jouer, None sinon"""
+        for ligne, statut in self.matchs.get(frozenset((j1, j2)), []):
+            if statut == "à jouer":
+                return ligne
+        return None
+
+    def enregistrer_resultat(self, ws, j1, j2, resultat):
+        """
+        Écrit le résultat (colonnes D à L : statut, vainqueur, adversaire, sets, date)
+        sur la ligne du match par une seule écriture ciblée. Retourne False si le match
+        n'est pas à jouer.
+        """
+        with self._verrou:
+            ligne = self.ligne_a_jouer(j1, j2)
+            if ligne is None:
+                return False
+            generation = mettre_a_jour(ws, f"D{ligne}:L{ligne}", [resultat])
+            for entree in self.matchs[frozenset((j1, j2))]:
+                if entree[0] == ligne:
+                    entree[1] = resultat[0]
+            # Seule notre écriture a changé l'instantané : l'index reste valable
+            if generation is not None and generation == self.generation + 1:
+                self.generation = generation
+            return True
+
+@st.cache_resource
+def get_index_championnat():
+    """Index unique pour le process, partagé par toutes les sessions"""
+    return IndexChampionnat()
+
+@st.cache_resource
+def get_appariement_suisse():
+    """État du système suisse unique pour le process, partagé par toutes les sessions"""
+    from suisse import AppariementSuisse
+    return AppariementSuisse()
+
+def appariement_suisse(ws):
+    """État du système suisse synchronisé avec l'instantané du sheet championnat"""
+    generation, valeurs = get_cache_feuilles().instantane(ws)
+    return get_appariement_suisse().synchroniser(generation, valeurs)
+
+@st.cache_resource
+def get_classement_championnat():
+    """Classement matérialisé du championnat, unique pour le process et partagé par toutes les sessions"""
+    from championnat import ClassementChampionnat
+    return ClassementChampionnat()
+
+def classement_championnat(ws):
+    """
+    Classement du championnat à jour de l'instantané du sheet. Appelé juste après une
+    écriture, il applique le changement ; ensuite les lectures n'ont plus rien à calculer.
+    """
+    generation, valeurs = get_cache_feuilles().instantane(ws)
+    return get_classement_championnat().synchroniser(generation, valeurs)
+
+@st.cache_resource
+def get_journal():
+    """
+    Journal des événements unique pour le process ; [journal] intervalle = ... dans les
+    secrets règle le nombre d'événements entre deux instantanés.
+    """
+    from evenements import Journal, INTERVALLE_INSTANTANE
+    return Journal(get_ordonnanceur(), st.secrets.get("journal", {}).get("intervalle", INTERVALLE_INSTANTANE))
+
+def journal():
+    """
+    Journal à jour : dernier instantané + événements suivants au premier appel, puis les
+    nouveaux seulement ; rapproché des sheets de données quand c'est nécessaire.
+    """
+    etat = get_journal().synchroniser(st.session_state.sheet_evenements, st.session_state.sheet_instantanes)
+    if etat.a_rapprocher:
+        try:
+            rapprocher_journal()
+        except ERREURS_STOCKAGE:
+            pass    # compté dans Journal.echecs ; réessayé au prochain appel
+    return etat
+
+def rapprocher_journal():
+    """Ajoute au journal les événements absents des sheets de données (lus depuis le cache) ; retourne leur nombre"""
+    donnees = {
+        "simple": lire_valeurs(st.session_state.sheet_resultats_simp),
+        "double": lire_valeurs(st.session_state.sheet_resultats_doub),
+        "championnat": lire_valeurs(st.session_state.sheet_championnat),
+        "tournoi": lire_valeurs(st.session_state.sheet_tournoi),
+    }
+    return get_journal().rapprocher(st.session_state.sheet_evenements, st.session_state.sheet_instantanes, donnees)
+
+def journaliser(*lignes):
+    """
+    Ajoute des événements (evenements.evenement, resultat, match_programme) au journal,
+    après l'écriture dans le sheet de données. Les joueurs du sheet joueurs encore
+    inconnus du journal y sont ajoutés d'abord. Le résultat étant déjà enregistré, un
+    échec du journal n'interrompt pas la page : le rapprochement rétablira les événements.
+    """
+    try:
+        get_journal().enregistrer(st.session_state.sheet_evenements, st.session_state.sheet_instantanes, lignes, st.session_state.liste_joueurs_complet)
+        if get_journal().a_rapprocher:
+            rapprocher_journal()
+    except ERREURS_STOCKAGE:
+        pass    # compté dans Journal.echecs ; les événements seront rétablis au prochain rapprochement
+
+####################################
+# Rafraîchissement en arrière-plan #
+####################################
+
+@st.cache_resource
+def get_rafraichisseur(_stockage):
+    """
+    Rafraîchisseur unique pour le process, démarré au premier appel ; [rafraichissement]
+    intervalle = ... dans les secrets règle les secondes entre deux sondages (0 = désactivé).
+    """
+    intervalle = st.secrets.get("rafraichissement", {}).get("intervalle", INTERVALLE_DEFAUT)
+    return Rafraichisseur(get_cache_feuilles(), _stockage.horodatage, intervalle).demarrer()
+
+def rafraichisseur():
+    """Rafraîchisseur du process (None tant que le stockage n'est pas connecté)"""
+    stockage = st.session_state.get("stockage")
+    return get_rafraichisseur(stockage) if stockage is not None else None
+
+def suivre_mises_a_jour(*feuilles):
+    """
+    À appeler par les pages qui affichent des worksheets partagés : dès que le
+    rafraîchisseur y a apporté des changements, la page se réexécute d'elle-même depuis
+    les instantanés déjà à jour (aucun appel à l'API par session).
+    """
+    r = rafraichisseur()
+    if r is None or not r.actif:
+        return
+    titres = tuple(ws.title for ws in feuilles)
+    _verifier_mises_a_jour(titres, r.version(titres))
+
+@st.fragment(run_every=VERIFICATION_PAGES)
+def _verifier_mises_a_jour(titres, vue):
+    if rafraichisseur().version(titres) != vue:
+        st.rerun()
+
+###########################
+# Sélection d'une période #
+###########################
+
+MOIS_DEBUT_SAISON = 9   # la saison du club commence en septembre
+
+def debut_saison(maintenant=None):
+    maintenant = pd.Timestamp.now() if maintenant is None else pd.Timestamp(maintenant)
+    annee = maintenant.year if maintenant.month >= MOIS_DEBUT_SAISON else maintenant.year - 1
+    return pd.Timestamp(annee, MOIS_DEBUT_SAISON, 1)
+
+def choisir_periode(key):
+    """Sélecteur de période ; retourne (début inclus, fin exclue), None = sans limite"""
+    aujourd_hui = pd.Timestamp.now().normalize()
+    choix = st.selectbox("Période", ["Tout l'historique", "Saison en cours", "30 derniers jours", "Un mois", "Une soirée", "Dates au choix"], key=key)
+    if choix == "Saison en cours":
+        return debut_saison(), None
+    if choix == "30 derniers jours":
+        return aujourd_hui - pd.Timedelta(days=29), None
+    if choix == "Un mois":
+        mois = pd.period_range(debut_saison() - pd.DateOffset(years=2), aujourd_hui, freq="M")[::-1]
+        periode = st.selectbox("Mois", mois, format_func=lambda m: m.strftime("%m/%Y"), key=f"{key}_mois")
+        return periode.start_time, (periode + 1).start_time
+    if choix == "Une soirée":
+        jour = st.date_input("Date", value=aujourd_hui, format="DD/MM/YYYY", key=f"{key}_jour")
+        if jour is None:
+            return None, None   # sélecteur vidé : sans limite
+        jour = pd.Timestamp(jour)
+        return jour, jour + pd.Timedelta(days=1)
+    if choix == "Dates au choix":
+        dates = st.date_input("Du ... au ...", value=(debut_saison(), aujourd_hui), format="DD/MM/YYYY", key=f"{key}_dates")
+        if len(dates) == 2:
+            return pd.Timestamp(dates[0]), pd.Timestamp(dates[1]) + pd.Timedelta(days=1)
+        if len(dates) == 1:
+            return pd.Timestamp(dates[0]), None
+        return None, None   # sélecteur vidé : sans limite
+    return None, None
+
+#############################
+# Mesures et administration #
+#############################
+
+@st.cache_resource
+def get_export_mesures():
+    """
+    Démarre une fois par process les exports des mesures selon la section [mesures]
+    des secrets : port = 9100 (texte Prometheus sur /metrics, servi sur adresse =
+    "127.0.0.1" par défaut), journal = "mesures.jsonl" et intervalle = 60 (une ligne
+    JSON par intervalle). Retourne l'état des exports : un port déjà pris désactive
+    /metrics au lieu de lever à chaque chargement de page (les exceptions ne sont pas
+    mises en cache).
+    """
+    config = st.secrets.get("mesures", {})
+    ordonnanceur = get_ordonnanceur()
+    return demarrer_export(ordonnanceur.metriques, config.get("port"), config.get("journal"), config.get("intervalle", 60),
+                           config.get("adresse", ADRESSE_EXPORT_DEFAUT))
+
+def est_admin():
+    """Vrai si la session a saisi le mot de passe de [admin] mot_de_passe"""
+    mot_de_passe = st.secrets.get("admin", {}).get("mot_de_passe")
+    if not mot_de_passe:
+        return False
+    if not st.session_state.get("admin"):
+        saisie = st.text_input("Mot de passe administrateur", type="password", key="mot_de_passe_admin")
+        st.session_state.admin = saisie == mot_de_passe
+    return st.session_state.admin